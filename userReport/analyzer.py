@@ -2,69 +2,364 @@
 # -*- coding: utf-8 -*-
 
 import os
+import json
+import hashlib
 import numpy as np
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from cache import AnalysisCache, make_cache_key
+from profanity import profanity_filter
+from local_model import get_local_model
+from suggestion_memory import suggestion_memory
+from resilience import Deadline, NO_DEADLINE, guarded_call, moderation_breaker, suggestion_breaker
+from utils import looks_short_neutral
+from config import HEDGE_DELAY
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, NOT_GIVEN
 
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     client = OpenAI() if OPENAI_API_KEY else None
 except Exception:
     client = None
+    NOT_GIVEN = None
 
+# 모델/프롬프트 설정 (변경 시 PROMPT_VERSION을 올려 캐시를 무효화)
+MODERATION_MODEL = "omni-moderation-latest"
+SUGGESTION_MODEL = "gpt-4o-mini"
+SUGGESTION_PROMPT = (
+    "너는 온라인 커뮤니케이션 코치다. 원문 의미는 유지하되 비하/조롱/혐오/욕설을 제거하고, "
+    "친근하고 사실 중심의 한국어 1문장을 제안하라. 훈계는 금지."
+)
+PROMPT_VERSION = "1"
+MODERATION_BATCH_SIZE = 32  # Moderation API 요청당 최대 입력 수
+SCORE_CACHE_VERSION = f"score|{MODERATION_MODEL}"
+SUGGESTION_CACHE_VERSION = f"suggest|{SUGGESTION_MODEL}|{PROMPT_VERSION}"
+SIMULATED_SUGGESTION = "감정 대신 사실 중심으로 표현해볼래?"
 
-def analyze_text(text: str) -> Dict[str, any]:
+# 전역 분석 결과 캐시 (API 미사용 시 디스크 계층을 만들지 않음)
+analysis_cache = AnalysisCache() if client is not None else AnalysisCache(path=None)
+
+
+def analyze_text(text: str, deadline: Optional[Deadline] = None) -> Dict[str, any]:
     """
     텍스트를 분석하여 유해성 점수와 개선 제안을 반환합니다.
 
+    Args:
+        deadline: 점수와 제안 요청이 함께 쓰는 마감 시간. 지나면 로컬 대체 결과를 사용
+
     Returns:
         dict: {toxicity, hate, aggression, demean, reasons, suggestion}
     """
+    res = score_text(text, deadline)
+    res["suggestion"] = suggest_rewrite(text, deadline)
+    return res
+
+
+def analyze_texts(texts: List[str], deadline: Optional[Deadline] = None) -> List[Dict[str, any]]:
+    """
+    여러 텍스트를 한 번에 분석합니다. 결과는 입력 순서대로, analyze_text와 동일한 형식입니다.
+    """
+    texts = list(texts)
+    results = score_texts(texts, deadline)
+    for res, suggestion in zip(results, suggest_rewrites(texts, deadline)):
+        res["suggestion"] = suggestion
+    return results
+
+
+def score_text(text: str, deadline: Optional[Deadline] = None) -> Dict[str, any]:
+    """
+    1단계: 유해성 점수만 계산합니다 (제안 생성 없음, suggestion=None).
+
+    Returns:
+        dict: {toxicity, hate, aggression, demean, reasons, suggestion}
+    """
+    return score_texts([text], deadline)[0]
+
+
+def score_texts(texts: List[str], deadline: Optional[Deadline] = None) -> List[Dict[str, any]]:
+    """
+    1단계: 여러 텍스트의 유해성 점수를 입력 순서대로 계산합니다.
+
+    로컬 사전 필터로 판정되는 텍스트는 바로 반환하고, 나머지만
+    Moderation API에 MODERATION_BATCH_SIZE 단위로 묶어서 요청합니다.
+    캐시에 있는 텍스트와 중복 텍스트는 다시 요청하지 않습니다.
+    마감이 지났거나 서킷 브레이커가 열려 있으면 남은 텍스트는 로컬 대체 경로로 계산합니다.
+    """
+    return with_local_tier(texts, lambda rest: _score_upstream(rest, deadline))
+
+
+def with_local_tier(texts: List[str], upstream: Callable[[List[str]], List[Dict[str, any]]]) -> List[Dict[str, any]]:
+    """로컬 1차 판정을 적용하고, 판정되지 않은 텍스트만 upstream으로 점수를 계산합니다."""
+    texts = list(texts)
+    results = [local_verdict(t) for t in texts]
+    remaining = [i for i, r in enumerate(results) if r is None]
+    if remaining:
+        for i, res in zip(remaining, upstream([texts[i] for i in remaining])):
+            results[i] = res
+    return results
+
+
+def local_verdict(text: str) -> Optional[Dict[str, any]]:
+    """
+    1차 로컬 판정. 욕설 사전에 강하게 걸리면 유해로, 사전에 걸리지 않는 짧은 중성 표현은 정상으로
+    바로 판정하고, 애매한 텍스트는 None을 반환합니다 ("ㅅㅂ"처럼 짧은 욕설은 사전 판정이 먼저).
+    """
+    verdict = profanity_filter.verdict(text)
+    if verdict is not None:
+        return verdict
+    if looks_short_neutral(text) and not profanity_filter.matches(text):
+        return _build_result(0.0, 0.0, 0.0, 0.0)
+    return None
 
-    # OpenAI API가 없으면 시뮬레이션 사용
-    if client is None or not os.getenv("OPENAI_API_KEY"):
-        return _simulate_analysis(text)
 
-    # 실제 OpenAI 분석
+def _score_upstream(texts: List[str], deadline: Optional[Deadline] = None) -> List[Dict[str, any]]:
+    """Moderation API(또는 시뮬레이션)로 점수를 계산합니다."""
+    # OpenAI API가 없으면 로컬 모델(또는 시뮬레이션) 사용
+    if not _api_available():
+        return fallback_scores(texts)
+
+    results, pending = _lookup_cached(texts, SCORE_CACHE_VERSION)
+
+    keys = list(pending.keys())
+    for start in range(0, len(keys), MODERATION_BATCH_SIZE):
+        chunk = keys[start:start + MODERATION_BATCH_SIZE]
+        chunk_texts = [texts[pending[k][0]] for k in chunk]
+
+        try:
+            mod_results = guarded_call(lambda timeout, batch=chunk_texts: _moderate(batch, timeout),
+                                       moderation_breaker, deadline, hedge_after=HEDGE_DELAY)
+            chunk_results = [_build_result(*_moderation_scores(r)) for r in mod_results]
+            for key, res in zip(chunk, chunk_results):
+                analysis_cache.set(key, res)
+        except Exception:
+            # API 오류/마감 초과/브레이커 open → 로컬 대체 경로 (캐시에 저장하지 않음)
+            chunk_results = fallback_scores(chunk_texts)
+
+        for key, res in zip(chunk, chunk_results):
+            _fill(results, pending[key], res)
+
+    return results
+
+
+def suggest_rewrite(text: str, deadline: Optional[Deadline] = None) -> str:
+    """
+    2단계: 순화 제안 1문장을 생성합니다. 결과는 캐시에 저장되어 재사용됩니다.
+    """
+    return suggest_rewrites([text], deadline)[0]
+
+
+def suggest_rewrites(texts: List[str], deadline: Optional[Deadline] = None) -> List[str]:
+    """2단계: 여러 텍스트의 순화 제안을 입력 순서대로 생성합니다."""
+    texts = list(texts)
+
+    if not _api_available():
+        return [SIMULATED_SUGGESTION for _ in texts]
+
+    cached, pending = _lookup_cached(texts, SUGGESTION_CACHE_VERSION)
+    pending = reuse_similar_suggestions(texts, cached, pending)
+    for key, idxs in pending.items():
+        try:
+            suggestion = guarded_call(lambda timeout, t=texts[idxs[0]]: _generate_suggestion(t, timeout),
+                                      suggestion_breaker, deadline, hedge_after=HEDGE_DELAY)
+            res = {"suggestion": suggestion}
+            _remember(key, texts[idxs[0]], res["suggestion"])
+        except Exception:
+            res = {"suggestion": SIMULATED_SUGGESTION}
+        _fill(cached, idxs, res)
+
+    return [c["suggestion"] for c in cached]
+
+
+def stream_suggestion(text: str, deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    2단계 제안을 토큰 단위로 스트리밍합니다 (Streamlit st.write_stream 등에서 사용).
+    캐시에 있으면 전체 문장을 한 번에 내보내고, 완료된 제안은 캐시에 저장합니다.
+    마감은 요청 timeout과 청크 사이에서 확인하며, 넘기면 받은 데까지만 내보냅니다.
+    """
+    if not _api_available():
+        yield SIMULATED_SUGGESTION
+        return
+
+    key = make_cache_key(text, SUGGESTION_CACHE_VERSION)
+    cached = analysis_cache.get(key)
+    if cached is None:
+        cached = _recall_similar(text)
+    if cached is not None:
+        yield cached["suggestion"]
+        return
+
+    deadline = deadline or NO_DEADLINE
+    parts: List[str] = []
     try:
-        return _analyze_with_openai(text)
+        # 브레이커/마감은 스트림 연결까지 적용 (스트림은 헤지하지 않음)
+        stream = guarded_call(
+            lambda timeout: client.chat.completions.create(
+                model=SUGGESTION_MODEL,
+                messages=_suggestion_messages(text),
+                stream=True,
+                timeout=_request_timeout(timeout)
+            ),
+            suggestion_breaker, deadline
+        )
+        for chunk in stream:
+            deadline.check()
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                # 앞쪽 공백은 내보내지 않음 (비스트리밍 결과의 strip()과 맞춤)
+                if not parts:
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                parts.append(delta)
+                yield delta
     except Exception:
-        return _simulate_analysis(text)
+        if not parts:
+            yield SIMULATED_SUGGESTION
+        return
 
+    if parts:
+        _remember(key, text, "".join(parts).strip())
 
-def _simulate_analysis(text: str) -> Dict[str, any]:
-    """시뮬레이션을 통한 텍스트 분석"""
-    seed = abs(hash(text)) % 2 ** 32
-    rng = np.random.default_rng(seed)
 
-    tox = float(rng.beta(2.2, 2.0))
-    hate = float(min(1.0, tox * rng.uniform(0.3, 1.0) * rng.uniform(0.2, 0.9)))
-    aggr = float(min(1.0, tox * rng.uniform(0.5, 1.0)))
-    demean = float(min(1.0, tox * rng.uniform(0.2, 0.8)))
+def reuse_similar_suggestions(texts: List[str], results: List[Optional[Dict[str, any]]],
+                              pending: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    """
+    캐시 미스 텍스트 중 제안 메모리에 충분히 비슷한 이전 댓글이 있으면 그 제안을 채우고,
+    여전히 LLM 호출이 필요한 항목만 남긴 pending을 반환합니다.
+    """
+    remaining: Dict[str, List[int]] = {}
+    for key, idxs in pending.items():
+        res = _recall_similar(texts[idxs[0]])
+        if res is None:
+            remaining[key] = idxs
+        else:
+            _fill(results, idxs, res)
+    return remaining
 
-    base = np.array([hate, aggr, demean]) + 1e-9
-    base = base / base.max()
 
-    return {
-        "toxicity": tox,
-        "hate": hate,
-        "aggression": aggr,
-        "demean": float(demean),
-        "reasons": {
-            "혐오": float(base[0]),
-            "조롱/모욕": float(base[1]),
-            "비하": float(base[2])
-        },
-        "suggestion": "감정 대신 사실 중심으로 표현해볼래?",
-    }
+def _recall_similar(text: str) -> Optional[Dict[str, str]]:
+    """
+    제안 메모리에서 유사 댓글의 제안을 찾아 반환합니다.
+    다른 댓글의 제안이므로 이 텍스트의 정확 일치 캐시에는 저장하지 않습니다 (메모리에서 제거되면 함께 사라짐).
+    """
+    suggestion = suggestion_memory.lookup(text)
+    return None if suggestion is None else {"suggestion": suggestion}
+
+
+def _remember(key: str, text: str, suggestion: str):
+    """새로 생성한 제안을 캐시와 제안 메모리에 저장합니다."""
+    analysis_cache.set(key, {"suggestion": suggestion})
+    suggestion_memory.add(text, suggestion)
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    """Server-Sent Events 프레임 한 개를 만듭니다 (data는 JSON 문자열로 인코딩)."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_suggestion_sse(text: str, deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """stream_suggestion을 SSE 프레임으로 변환합니다. 마지막에 'done' 이벤트를 보냅니다."""
+    for token in stream_suggestion(text, deadline):
+        yield sse_event(token)
+    yield sse_event("", event="done")
+
+
+def _api_available() -> bool:
+    return client is not None and bool(os.getenv("OPENAI_API_KEY"))
+
+
+def _fill(results: List[Optional[Dict[str, any]]], idxs: List[int], res: Dict[str, any]):
+    """같은 텍스트의 모든 위치에 결과 사본을 채웁니다."""
+    for i in idxs:
+        results[i] = dict(res)
+
+
+def fallback_scores(texts: List[str]) -> List[Dict[str, any]]:
+    """
+    API를 쓸 수 없을 때의 점수 (제안 없음).
+    로컬 모델 가중치(LOCAL_MODEL_PATH)가 있으면 로컬 모델로, 없으면 시뮬레이션으로 계산합니다.
+    """
+    model = get_local_model()
+    if model is None:
+        return simulate_batch(texts, suggestion=None)
+    return [_build_result(*row) for row in model.predict(list(texts)).tolist()]
+
+
+def _beta_inverse_cdf_table(a: float, b: float, size: int = 4097) -> Tuple[np.ndarray, np.ndarray]:
+    """Beta(a, b) 역CDF 보간용 (CDF, x) 테이블을 만듭니다."""
+    x = np.linspace(0.0, 1.0, size)
+    pdf = x ** (a - 1.0) * (1.0 - x) ** (b - 1.0)
+    cdf = np.concatenate([[0.0], np.cumsum((pdf[1:] + pdf[:-1]) * 0.5 * np.diff(x))])
+    return cdf / cdf[-1], x
+
+
+_SIM_BETA_CDF, _SIM_BETA_X = _beta_inverse_cdf_table(2.2, 2.0)
+
 
+def simulate_batch(texts: List[str], suggestion: Optional[str] = SIMULATED_SUGGESTION) -> List[Dict[str, any]]:
+    """
+    시뮬레이션 분석을 배치로 수행합니다.
+
+    텍스트별 난수는 blake2b 다이제스트에서 바로 만들기 때문에 프로세스/재시작과
+    관계없이 같은 텍스트는 항상 같은 점수를 받고, 모든 난수를 한 번에 벡터 연산합니다.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    # 텍스트당 64바이트 다이제스트 → uint64 8개 → [0, 1) 균등 난수 8개
+    digests = b"".join(hashlib.blake2b((t or "").encode("utf-8"), digest_size=64).digest() for t in texts)
+    bits = np.frombuffer(digests, dtype="<u8").reshape(len(texts), 8)
+    u = (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    tox = np.interp(u[:, 0], _SIM_BETA_CDF, _SIM_BETA_X)
+    hate = np.minimum(1.0, tox * (0.3 + 0.7 * u[:, 1]) * (0.2 + 0.7 * u[:, 2]))
+    aggr = np.minimum(1.0, tox * (0.5 + 0.5 * u[:, 3]))
+    demean = np.minimum(1.0, tox * (0.2 + 0.6 * u[:, 4]))
+
+    base = np.stack([hate, aggr, demean], axis=1) + 1e-9
+    base = base / base.max(axis=1, keepdims=True)
+
+    return [
+        {
+            "toxicity": t,
+            "hate": h,
+            "aggression": ag,
+            "demean": d,
+            "reasons": {"혐오": r[0], "조롱/모욕": r[1], "비하": r[2]},
+            "suggestion": suggestion,
+        }
+        for t, h, ag, d, r in zip(tox.tolist(), hate.tolist(), aggr.tolist(), demean.tolist(), base.tolist())
+    ]
+
+
+def _lookup_cached(texts: List[str], version: str) -> Tuple[List[Optional[Dict[str, any]]], Dict[str, List[int]]]:
+    """
+    캐시를 조회하고 중복 텍스트를 묶습니다.
+
+    Returns:
+        tuple: (캐시_적중_결과_목록, {캐시_키: [미스된_인덱스들]})
+    """
+    results: List[Optional[Dict[str, any]]] = [None] * len(texts)
+    pending: Dict[str, List[int]] = {}
+
+    for i, t in enumerate(texts):
+        key = make_cache_key(t, version)
+        if key in pending:
+            pending[key].append(i)
+            continue
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending[key] = [i]
+
+    return results, pending
 
-def _analyze_with_openai(text: str) -> Dict[str, any]:
-    """OpenAI API를 사용한 실제 텍스트 분석"""
-    # Moderation API 호출
-    mod = client.moderations.create(model="omni-moderation-latest", input=text)
-    r = mod.results[0]
+
+def _moderation_scores(r) -> Tuple[float, float, float, float]:
+    """Moderation 결과 한 건에서 (toxicity, hate, harassment, demean) 점수를 계산합니다."""
 
     def score(key):
         if hasattr(r, "category_scores") and key in r.category_scores:
@@ -78,23 +373,44 @@ def _analyze_with_openai(text: str) -> Dict[str, any]:
     viol = max(score("violence"), score("violence/threats"))
     tox = max(hate, haras, viol)
     demean = min(1.0, 0.6 * haras + 0.5 * hate)
+    return tox, hate, haras, demean
 
-    # 개선 제안 생성
-    sys_prompt = (
-        "너는 온라인 커뮤니케이션 코치다. 원문 의미는 유지하되 비하/조롱/혐오/욕설을 제거하고, "
-        "친근하고 사실 중심의 한국어 1문장을 제안하라. 훈계는 금지."
-    )
 
+def _moderate(texts: List[str], timeout: Optional[float] = None) -> list:
+    """Moderation API를 한 번 호출해 입력 순서대로 결과를 반환합니다."""
+    mod = client.moderations.create(model=MODERATION_MODEL, input=texts, timeout=_request_timeout(timeout))
+    results = list(mod.results)
+    if len(results) != len(texts):
+        raise ValueError("moderation result count mismatch")
+    return results
+
+
+def _generate_suggestion(text: str, timeout: Optional[float] = None) -> str:
+    """Chat Completions API로 순화 제안 1문장을 생성합니다."""
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": f"원문: {text}\n요구: 한국어 1문장으로 순화"}
-        ]
+        model=SUGGESTION_MODEL,
+        messages=_suggestion_messages(text),
+        timeout=_request_timeout(timeout)
     )
+    return response.choices[0].message.content.strip()
+
+
+def _request_timeout(timeout: Optional[float]):
+    """요청 timeout 인자. 마감이 없으면 클라이언트 기본값을 사용합니다."""
+    return NOT_GIVEN if timeout is None else timeout
 
-    suggestion = response.choices[0].message.content.strip()
 
+def _suggestion_messages(text: str) -> List[Dict[str, str]]:
+    """순화 제안 요청 메시지를 구성합니다."""
+    return [
+        {"role": "system", "content": SUGGESTION_PROMPT},
+        {"role": "user", "content": f"원문: {text}\n요구: 한국어 1문장으로 순화"}
+    ]
+
+
+def _build_result(tox: float, hate: float, haras: float, demean: float,
+                  suggestion: Optional[str] = None) -> Dict[str, any]:
+    """점수(와 제안)로 분석 결과 딕셔너리를 구성합니다."""
     # 사유별 점수 정규화
     vec = np.array([hate, haras, demean])
     if vec.max() == 0:
@@ -112,4 +428,4 @@ def _analyze_with_openai(text: str) -> Dict[str, any]:
             "비하": float(reasons[2])
         },
         "suggestion": suggestion,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,433 @@
+# async_analyzer.py
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import random
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Any
+
+import analyzer
+from analyzer import (
+    MODERATION_MODEL, SUGGESTION_MODEL, MODERATION_BATCH_SIZE,
+    SCORE_CACHE_VERSION, SUGGESTION_CACHE_VERSION, SIMULATED_SUGGESTION,
+    with_local_tier, _lookup_cached, _fill, _moderation_scores, _build_result, _suggestion_messages,
+    _request_timeout, fallback_scores, sse_event, reuse_similar_suggestions, _recall_similar, _remember
+)
+from cache import make_cache_key
+from resilience import (
+    OPEN, Deadline, DeadlineExceeded, CircuitOpenError, NO_DEADLINE, CircuitBreaker, aguarded_call,
+    moderation_breaker, suggestion_breaker
+)
+from config import (
+    ASYNC_CONCURRENCY, OPENAI_RPM, OPENAI_TPM,
+    OPENAI_MAX_RETRIES, OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAX, HEDGE_DELAY
+)
+
+try:
+    from openai import AsyncOpenAI, APIConnectionError
+except Exception:
+    AsyncOpenAI = None
+    APIConnectionError = None
+
+# 제안 응답 길이 추정치 (토큰)
+_SUGGESTION_OUTPUT_TOKENS = 80
+
+
+class TokenBucket:
+    """
+    분당 허용량 기반 토큰 버킷.
+
+    이벤트 루프와 무관한 스레드 락으로 보호하므로 한 인스턴스를 여러 이벤트 루프(Streamlit 재실행,
+    동시 세션의 run_sync 스레드)가 함께 쓸 수 있습니다. 락은 잔량 계산/차감에만 잡고 기다림은 락 밖에서 합니다.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = max(float(per_minute), 1e-9) / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """토큰이 충분하면 차감하고 0을, 부족하면 차감하지 않고 더 기다려야 할 시간(초)을 반환합니다."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0):
+        """amount 만큼의 토큰이 모일 때까지 기다린 뒤 차감합니다."""
+        while True:
+            wait = self.try_acquire(amount)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class SharedSemaphore:
+    """
+    여러 이벤트 루프가 함께 쓸 수 있는 카운팅 세마포어.
+
+    asyncio.Semaphore는 처음 기다린 이벤트 루프에 묶이므로 run_sync가 호출마다 새로 만드는 루프들이
+    공유할 수 없습니다. TokenBucket처럼 스레드 락으로 보호하고, 기다리는 루프에는
+    call_soon_threadsafe로 허가를 넘깁니다 (넘겨받은 뒤 취소된 대기자는 허가를 돌려줌).
+    """
+
+    def __init__(self, value: int):
+        self.value = max(1, int(value))
+        self._available = self.value
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except BaseException:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._available = min(self.value, self._available + 1)
+                return
+            loop, fut = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(_grant, fut)
+        except RuntimeError:
+            # 대기자의 루프가 이미 닫힘: 다음 대기자에게 넘김
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+def _grant(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_result(None)
+
+
+# 프로세스 전역 레이트 리밋/동시 요청 수 (모든 세션/재실행의 OpenAI 호출이 함께 씀)
+request_bucket = TokenBucket(OPENAI_RPM)
+token_bucket = TokenBucket(OPENAI_TPM)
+request_slots = SharedSemaphore(ASYNC_CONCURRENCY)
+
+
+def estimate_tokens(text: str) -> int:
+    """요청 토큰 수를 대략 추정합니다 (한국어는 글자당 1토큰 내외)."""
+    return max(1, len(text or ""))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429/5xx 응답과 연결 오류만 재시도 대상으로 봅니다."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return APIConnectionError is not None and isinstance(exc, APIConnectionError)
+
+
+def backoff_delay(attempt: int, base: float = OPENAI_BACKOFF_BASE, cap: float = OPENAI_BACKOFF_MAX,
+                  retry_after: Optional[float] = None) -> float:
+    """지수 백오프 + 전체 지터(full jitter) 대기 시간을 계산합니다."""
+    delay = random.uniform(0.0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncAnalyzer:
+    """
+    비동기 OpenAI 분석기.
+
+    - 동시 요청 수를 세마포어로 제한 (기본: 프로세스 전역 request_slots 공유)
+    - 분당 요청 수(RPM)/토큰 수(TPM)를 토큰 버킷으로 제한 (기본: 프로세스 전역 request_bucket/token_bucket 공유)
+    - 429/5xx 응답은 지터가 있는 지수 백오프로 재시도
+    - 모든 대기/요청/재시도는 deadline 안에서만 수행하고, 서킷 브레이커가 열려 있으면 바로 실패
+    - hedge_after 초 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+    """
+
+    def __init__(self, client, concurrency: Optional[int] = None,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_retries: int = OPENAI_MAX_RETRIES, deadline: Optional[Deadline] = None,
+                 hedge_after: Optional[float] = HEDGE_DELAY):
+        self.client = client
+        self.max_retries = max(0, int(max_retries))
+        self.deadline = deadline or NO_DEADLINE
+        self.hedge_after = hedge_after
+        # concurrency/rpm/tpm을 따로 주면 이 분석기 전용, 아니면 전역 세마포어/버킷 (호출마다 새로 만들면 한도가 초기화됨)
+        self._semaphore = SharedSemaphore(concurrency) if concurrency is not None else request_slots
+        self._requests = TokenBucket(rpm) if rpm is not None else request_bucket
+        self._tokens = TokenBucket(tpm) if tpm is not None else token_bucket
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    async def _acquire(self, tokens: int):
+        """레이트 리밋 토큰을 마감 안에서 확보합니다."""
+        try:
+            await asyncio.wait_for(self._requests.acquire(1), self.deadline.remaining())
+            await asyncio.wait_for(self._tokens.acquire(tokens), self.deadline.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("deadline exceeded while rate limited")
+
+    async def _call(self, make_request, tokens: int, breaker: CircuitBreaker, hedge: bool = True):
+        """
+        레이트 리밋, 브레이커, 마감, 재시도를 적용해 요청을 보냅니다.
+        make_request(timeout)은 남은 시간을 요청 timeout으로 쓰는 코루틴을 반환해야 합니다.
+        """
+        if breaker.state == OPEN:
+            # 열린 브레이커로 레이트 리밋 토큰을 소모하지 않도록 먼저 거절
+            raise CircuitOpenError(breaker.name)
+        attempt = 0
+        while True:
+            await self._acquire(tokens)
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    return await aguarded_call(make_request, breaker, self.deadline,
+                                               self.hedge_after if hedge else None)
+            except Exception as e:
+                delay = backoff_delay(attempt, retry_after=_retry_after(e))
+                left = self.deadline.remaining()
+                if attempt >= self.max_retries or not is_retryable(e) or (left is not None and delay >= left):
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def moderate(self, texts: List[str]) -> list:
+        """Moderation API를 한 번 호출해 입력 순서대로 결과를 반환합니다."""
+        mod = await self._call(
+            lambda timeout: self.client.moderations.create(model=MODERATION_MODEL, input=texts,
+                                                           timeout=_request_timeout(timeout)),
+            sum(estimate_tokens(t) for t in texts),
+            moderation_breaker
+        )
+        results = list(mod.results)
+        if len(results) != len(texts):
+            raise ValueError("moderation result count mismatch")
+        return results
+
+    async def suggest(self, text: str) -> str:
+        """순화 제안 1문장을 생성합니다."""
+        messages = _suggestion_messages(text)
+        response = await self._call(
+            lambda timeout: self.client.chat.completions.create(model=SUGGESTION_MODEL, messages=messages,
+                                                                timeout=_request_timeout(timeout)),
+            sum(estimate_tokens(m["content"]) for m in messages) + _SUGGESTION_OUTPUT_TOKENS,
+            suggestion_breaker
+        )
+        return response.choices[0].message.content.strip()
+
+    async def score_many(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        1단계: 텍스트들의 점수를 계산합니다. 실패한 항목은 None으로 반환합니다.
+        Moderation은 MODERATION_BATCH_SIZE 단위 배치로 병렬 호출합니다.
+        """
+        chunks = [texts[i:i + MODERATION_BATCH_SIZE] for i in range(0, len(texts), MODERATION_BATCH_SIZE)]
+        moderated = await asyncio.gather(*(self.moderate(c) for c in chunks), return_exceptions=True)
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for chunk, mod_results in zip(chunks, moderated):
+            if isinstance(mod_results, BaseException):
+                results.extend(None for _ in chunk)
+            else:
+                results.extend(_build_result(*_moderation_scores(r)) for r in mod_results)
+        return results
+
+    async def suggest_many(self, texts: List[str]) -> List[Optional[str]]:
+        """2단계: 텍스트별 순화 제안을 병렬 생성합니다. 실패한 항목은 None으로 반환합니다."""
+        results = await asyncio.gather(*(self.suggest(t) for t in texts), return_exceptions=True)
+        return [None if isinstance(r, BaseException) else r for r in results]
+
+    async def stream_suggest(self, text: str) -> AsyncIterator[str]:
+        """순화 제안을 토큰 단위로 스트리밍합니다 (스트림 시작 전까지만 재시도, 헤지하지 않음)."""
+        messages = _suggestion_messages(text)
+        stream = await self._call(
+            lambda timeout: self.client.chat.completions.create(model=SUGGESTION_MODEL, messages=messages,
+                                                                stream=True, timeout=_request_timeout(timeout)),
+            sum(estimate_tokens(m["content"]) for m in messages) + _SUGGESTION_OUTPUT_TOKENS,
+            suggestion_breaker,
+            hedge=False
+        )
+        async for chunk in stream:
+            self.deadline.check()
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+async def _run_with_client(method: str, texts: List[str], concurrency: Optional[int] = None,
+                           deadline: Optional[Deadline] = None) -> list:
+    # 이벤트 루프마다 클라이언트를 새로 만들고, 재시도는 AsyncAnalyzer가 담당
+    async with AsyncOpenAI(max_retries=0) as client:
+        return await getattr(AsyncAnalyzer(client, concurrency=concurrency, deadline=deadline), method)(texts)
+
+
+def run_sync(coro):
+    """
+    코루틴을 동기 코드에서 실행합니다.
+    이미 실행 중인 이벤트 루프가 있으면 별도 스레드에서 실행합니다.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def _api_available() -> bool:
+    return analyzer.client is not None and AsyncOpenAI is not None and bool(os.getenv("OPENAI_API_KEY"))
+
+
+def _fetch_uncached(texts: List[str], version: str, method: str, concurrency: Optional[int] = None, reuse=None,
+                    deadline: Optional[Deadline] = None):
+    """
+    캐시에 없는 텍스트만 비동기로 요청합니다. 반환: (결과_목록, pending, 키별_응답)
+    reuse(texts, results, pending)가 주어지면 요청 전에 pending을 줄이는 데 사용합니다.
+    """
+    results, pending = _lookup_cached(texts, version)
+    if reuse is not None and pending:
+        pending = reuse(texts, results, pending)
+    keys = list(pending.keys())
+    if not keys:
+        return results, pending, {}
+
+    try:
+        fetched = run_sync(_run_with_client(method, [texts[pending[k][0]] for k in keys], concurrency, deadline))
+    except Exception:
+        fetched = [None] * len(keys)
+    return results, pending, dict(zip(keys, fetched))
+
+
+def score_texts_concurrent(texts: List[str], concurrency: Optional[int] = None,
+                           deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """
+    score_texts의 비동기 병렬 버전입니다 (동기 래퍼).
+    결과 형식과 로컬 1차 판정/캐시/대체 규칙, 마감/브레이커 처리는 score_texts와 같습니다.
+    concurrency를 주지 않으면 동시 요청 수는 프로세스 전역 request_slots(ASYNC_CONCURRENCY)로 제한됩니다.
+    """
+    return with_local_tier(texts, lambda rest: _score_upstream_concurrent(rest, concurrency, deadline))
+
+
+def _score_upstream_concurrent(texts: List[str], concurrency: Optional[int] = None,
+                               deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    # OpenAI API가 없으면 로컬 모델(또는 시뮬레이션) 사용
+    if not _api_available():
+        return fallback_scores(texts)
+
+    results, pending, fetched = _fetch_uncached(texts, SCORE_CACHE_VERSION, "score_many", concurrency,
+                                                deadline=deadline)
+    missing = [key for key in pending if fetched.get(key) is None]
+    fallback = dict(zip(missing, fallback_scores([texts[pending[k][0]] for k in missing]))) if missing else {}
+    for key, idxs in pending.items():
+        res = fetched.get(key)
+        if res is None:
+            res = fallback[key]
+        else:
+            analyzer.analysis_cache.set(key, res)
+        _fill(results, idxs, res)
+
+    return results
+
+
+def suggest_rewrites_concurrent(texts: List[str], concurrency: Optional[int] = None,
+                                deadline: Optional[Deadline] = None) -> List[str]:
+    """suggest_rewrites의 비동기 병렬 버전입니다 (동기 래퍼)."""
+    texts = list(texts)
+
+    if not _api_available():
+        return [SIMULATED_SUGGESTION for _ in texts]
+
+    results, pending, fetched = _fetch_uncached(texts, SUGGESTION_CACHE_VERSION, "suggest_many", concurrency,
+                                                reuse=reuse_similar_suggestions, deadline=deadline)
+    for key, idxs in pending.items():
+        suggestion = fetched.get(key)
+        if suggestion is not None:
+            _remember(key, texts[idxs[0]], suggestion)
+        _fill(results, idxs, {"suggestion": suggestion if suggestion is not None else SIMULATED_SUGGESTION})
+
+    return [r["suggestion"] for r in results]
+
+
+async def astream_suggestion(text: str, deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+    """
+    stream_suggestion의 비동기 버전입니다 (비동기 HTTP 서버에서 사용).
+    캐시에 있으면 전체 문장을 한 번에 내보내고, 완료된 제안은 캐시에 저장합니다.
+    """
+    if not _api_available():
+        yield SIMULATED_SUGGESTION
+        return
+
+    key = make_cache_key(text, SUGGESTION_CACHE_VERSION)
+    cached = analyzer.analysis_cache.get(key)
+    if cached is None:
+        cached = _recall_similar(text)
+    if cached is not None:
+        yield cached["suggestion"]
+        return
+
+    parts: List[str] = []
+    try:
+        async with AsyncOpenAI(max_retries=0) as client:
+            async for delta in AsyncAnalyzer(client, deadline=deadline).stream_suggest(text):
+                if not parts:
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                parts.append(delta)
+                yield delta
+    except Exception:
+        if not parts:
+            yield SIMULATED_SUGGESTION
+        return
+
+    if parts:
+        _remember(key, text, "".join(parts).strip())
+
+
+async def astream_suggestion_sse(text: str, deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+    """astream_suggestion을 SSE 프레임으로 변환합니다. 마지막에 'done' 이벤트를 보냅니다."""
+    async for token in astream_suggestion(text, deadline):
+        yield sse_event(token)
+    yield sse_event("", event="done")
@@ -0,0 +1,144 @@
+# bench.py
+# -*- coding: utf-8 -*-
+"""
+로컬 분석 경로 벤치마크 (단일 코어).
+
+    python bench.py profanity --n 100000
+    python bench.py weekly --n 200000   # 주간 리포트: 원시 이벤트 집계 vs DB 집계 푸시다운 (결과 비교 포함)
+"""
+
+import time
+import random
+import argparse
+from typing import Callable, List
+
+SAMPLE_COMMENTS = [
+    "뭐 이런 걸 올려? 진짜 수준 바닥이네 ㅅㅂ.",
+    "관종짓 그만해라. 보는 사람 기분 더러워지니까.",
+    "말꼬리 잡고 떠드는 꼴 역겹다. 자중해.",
+    "이건 좀 선 넘었다. 말투부터 남 무시하는데?",
+    "완전 최고! 다음 것도 기대함.",
+    "꺼져라 제발. 이런 쓰레기 콘텐츠는 노답.",
+    "오늘 사진 분위기 너무 좋네요 ㅎㅎ",
+    "시1발 진짜 어이없다",
+    "이 부분은 출처가 어디인지 궁금합니다.",
+    "ㅋㅋㅋㅋ",
+]
+
+
+def make_corpus(n: int, seed: int = 0) -> List[str]:
+    """샘플 댓글에 무작위 한글 음절을 덧붙여 n개의 댓글을 만듭니다."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        base = rng.choice(SAMPLE_COMMENTS)
+        noise = "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randrange(0, 12)))
+        corpus.append(f"{base} {noise}")
+    return corpus
+
+
+def run(name: str, fn: Callable[[List[str]], object], corpus: List[str]):
+    """fn(corpus)를 실행하고 초당 처리 댓글 수를 출력합니다."""
+    start = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - start
+    rate = len(corpus) / elapsed if elapsed > 0 else float("inf")
+    print(f"{name:<24} {len(corpus):>8} comments  {elapsed:8.3f}s  {rate:12,.0f} comments/s")
+
+
+def bench_profanity(corpus: List[str]):
+    from profanity import profanity_filter
+    from analyzer import local_verdict
+
+    run("profanity.matches", lambda c: [profanity_filter.matches(t) for t in c], corpus)
+    run("analyzer.local_verdict", lambda c: [local_verdict(t) for t in c], corpus)
+
+
+def bench_simulate(corpus: List[str]):
+    from analyzer import simulate_batch
+
+    run("analyzer.simulate_batch", simulate_batch, corpus)
+
+
+def bench_local_model(corpus: List[str]):
+    import numpy as np
+    from local_model import LocalToxicityModel, get_local_model
+
+    model = get_local_model()
+    if model is None:
+        # 가중치 파일이 없으면 무작위 가중치로 추론 속도만 측정
+        model = LocalToxicityModel()
+        model.weights = np.random.default_rng(0).normal(0, 0.1, model.weights.shape).astype(np.float32)
+        model.trained[:] = True
+
+    run("local_model.predict", model.predict, corpus)
+
+
+def make_events_db(corpus: List[str], seed: int = 0):
+    """댓글 수만큼의 이벤트(사용자 3명, 7일)를 담은 메모리 SQLite 엔진을 만듭니다."""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import text
+    from database import get_engine
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    engine = get_engine("sqlite://")  # 테이블은 get_engine이 만듦
+    with engine.begin() as conn:
+        conn.execute(text(
+            """
+            INSERT INTO EVENTS (CREATED_AT, USER_ID, RAW_TEXT, SUGGESTION, TOXICITY, AGGRESSION, HATE, TEMP_C, SENT_CHOICE)
+            VALUES (:created_at, :user_id, :raw_text, :suggestion, :toxicity, :aggression, :hate, :temp_c, :sent_choice)
+            """
+        ), [
+            {
+                "created_at": (start + timedelta(seconds=rng.randrange(7 * 86400))).isoformat(sep=" "),
+                "user_id": f"u{rng.randrange(3)}",
+                "raw_text": t,
+                "suggestion": t[::-1] if rng.random() < 0.7 else None,
+                "toxicity": rng.random(),
+                "aggression": rng.random(),
+                "hate": rng.random(),
+                "temp_c": round(rng.uniform(36.5, 40.0), 2) if rng.random() < 0.95 else None,
+                "sent_choice": rng.choice(["순화", "원문"]),
+            }
+            for t in corpus
+        ])
+    return engine, start, start + timedelta(days=7)
+
+
+def bench_weekly(corpus: List[str]):
+    """
+    원시 이벤트를 읽어 process_weekly_data로 집계하는 경로와 DB 집계 푸시다운(pushdown.weekly_report)의 시간을 잽니다.
+    두 결과가 같은지는 tests/test_pushdown.py에서 확인합니다.
+    """
+    from database import get_user_events
+    from data_processor import process_weekly_data
+    from pushdown import weekly_report
+
+    engine, start, end = make_events_db(corpus)
+    run("process_weekly_data(raw)", lambda c: process_weekly_data(get_user_events(engine, "u0", start, end)), corpus)
+    run("pushdown.weekly_report", lambda c: weekly_report(engine, "u0", start, end), corpus)
+
+
+BENCHMARKS = {
+    "profanity": bench_profanity,
+    "simulate": bench_simulate,
+    "local_model": bench_local_model,
+    "weekly": bench_weekly,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="D-Talks 로컬 분석 벤치마크")
+    parser.add_argument("target", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--n", type=int, default=50_000, help="댓글 수")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n)
+    targets = sorted(BENCHMARKS) if args.target == "all" else [args.target]
+    for t in targets:
+        BENCHMARKS[t](corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# cache.py
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+from config import (
+    ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_MEMORY_SIZE, ANALYSIS_CACHE_DISK_SIZE, ANALYSIS_CACHE_TTL,
+    ANALYSIS_CACHE_MAINTENANCE_EVERY, ANALYSIS_CACHE_ACCESS_FLUSH
+)
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용으로 텍스트를 정규화합니다 (NFC, 앞뒤 공백 제거, 연속 공백 축약)."""
+    t = unicodedata.normalize("NFC", text or "")
+    return " ".join(t.split())
+
+
+def make_cache_key(text: str, version: str) -> str:
+    """정규화된 텍스트와 모델/프롬프트 버전으로 내용 기반 키를 만듭니다."""
+    payload = f"{version}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class AnalysisCache:
+    """
+    분석 결과용 2단 캐시 (프로세스 내 LRU + SQLite 디스크).
+
+    - 메모리 계층: 최대 memory_size 개, LRU 방식으로 제거
+    - 디스크 계층: 최대 disk_size 개, 마지막 접근 시각이 오래된 순으로 제거
+    - 두 계층 모두 ttl(초)이 지나면 만료
+    - 디스크 적중의 접근 시각은 모아 두었다가 다음 쓰기 또는 access_flush개마다 한 번에 기록하고,
+      만료/크기 초과 정리는 maintenance_every번 쓰기마다 합니다 (그 사이 디스크 크기는 disk_size를 조금 넘을 수 있음)
+    """
+
+    def __init__(self, path: Optional[str] = ANALYSIS_CACHE_PATH,
+                 memory_size: int = ANALYSIS_CACHE_MEMORY_SIZE,
+                 disk_size: int = ANALYSIS_CACHE_DISK_SIZE,
+                 ttl: float = ANALYSIS_CACHE_TTL,
+                 maintenance_every: int = ANALYSIS_CACHE_MAINTENANCE_EVERY,
+                 access_flush: int = ANALYSIS_CACHE_ACCESS_FLUSH):
+        self.memory_size = max(0, int(memory_size))
+        self.disk_size = max(0, int(disk_size))
+        self.ttl = float(ttl)
+        self.maintenance_every = max(1, int(maintenance_every))
+        self.access_flush = max(1, int(access_flush))
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pending_access: Dict[str, float] = {}
+        self._writes_since_maintenance = 0
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+        if path and self.disk_size > 0:
+            self._open_disk(path)
+
+    def _open_disk(self, path: str):
+        """SQLite 디스크 계층을 엽니다. 실패하면 메모리 계층만 사용합니다."""
+        try:
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+            # WAL + NORMAL: 커밋마다 fsync하지 않음 (캐시이므로 충돌 시 마지막 몇 건 유실은 허용)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ANALYSIS_CACHE (
+                  CACHE_KEY    TEXT PRIMARY KEY,
+                  VALUE_JSON   TEXT NOT NULL,
+                  CREATED_AT   REAL NOT NULL,
+                  ACCESSED_AT  REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS IX_ANALYSIS_CACHE_ACCESSED ON ANALYSIS_CACHE (ACCESSED_AT)"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception:
+            self._conn = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """키에 해당하는 결과를 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return dict(value)
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is not None:
+                self._memory_put(key, value[0], value[1])
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return dict(value[1])
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """결과를 두 계층에 모두 저장합니다."""
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, now, dict(value))
+            self._disk_put(key, value, now)
+
+    def flush(self):
+        """모아 둔 접근 시각을 기록하고 만료/크기 초과 항목을 정리합니다 (종료 전/테스트용)."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._flush_access()
+                self._evict(time.time())
+                self._conn.commit()
+            except Exception:
+                pass
+
+    def clear(self):
+        """두 계층을 모두 비웁니다."""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM ANALYSIS_CACHE")
+                    self._conn.commit()
+                except Exception:
+                    pass
+
+    def hit_rate(self) -> float:
+        """전체 조회 대비 적중률(0-1)을 반환합니다."""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def _memory_put(self, key: str, created_at: float, value: Dict[str, Any]):
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT VALUE_JSON, CREATED_AT FROM ANALYSIS_CACHE WHERE CACHE_KEY = ?", (key,)
+            ).fetchone()
+            # 만료 행은 지우지 않고 건너뜀 (주기적 정리에서 삭제)
+            if row is None or now - row[1] > self.ttl:
+                return None
+            # 접근 시각은 모아서 기록 (읽기마다 UPDATE/커밋하지 않음)
+            self._pending_access[key] = now
+            if len(self._pending_access) >= self.access_flush:
+                self._flush_access()
+                self._conn.commit()
+            return row[1], json.loads(row[0])
+        except Exception:
+            return None
+
+    def _flush_access(self):
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE ANALYSIS_CACHE SET ACCESSED_AT = ? WHERE CACHE_KEY = ?",
+                [(ts, key) for key, ts in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def _evict(self, now: float):
+        """만료 항목을 지우고 크기 초과분을 오래된 접근 순으로 제거합니다 (커밋은 호출자가)."""
+        self._conn.execute("DELETE FROM ANALYSIS_CACHE WHERE CREATED_AT < ?", (now - self.ttl,))
+        cur = self._conn.execute(
+            """
+            DELETE FROM ANALYSIS_CACHE WHERE CACHE_KEY IN (
+              SELECT CACHE_KEY FROM ANALYSIS_CACHE
+              ORDER BY ACCESSED_AT DESC
+              LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.disk_size,)
+        )
+        if cur.rowcount and cur.rowcount > 0:
+            self.stats["evictions"] += cur.rowcount
+        self._writes_since_maintenance = 0
+
+    def _disk_put(self, key: str, value: Dict[str, Any], now: float):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ANALYSIS_CACHE (CACHE_KEY, VALUE_JSON, CREATED_AT, ACCESSED_AT) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            # 모아 둔 접근 시각은 같은 커밋에 기록하고, 정리는 maintenance_every번 쓰기마다
+            self._pending_access.pop(key, None)
+            self._flush_access()
+            self._writes_since_maintenance += 1
+            if self._writes_since_maintenance >= self.maintenance_every:
+                self._evict(now)
+            self._conn.commit()
+        except Exception:
+            pass
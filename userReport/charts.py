@@ -9,10 +9,38 @@ from config import PASTEL_PINK, PASTEL_ORANGE, LAVENDER, ORANGE, RED
 from utils import hex_to_rgba
 
 
+# 집계 단위별 x축 라벨 (date는 각 구간의 시작일)
+_X_HOVER = {"day": "%{x|%Y-%m-%d}", "week": "%{x|%Y-%m-%d} 주", "month": "%{x|%Y-%m}"}
+
+
+def _x_hover(daily_data: pd.DataFrame) -> str:
+    return _X_HOVER.get(daily_data.attrs.get("granularity", "day"), _X_HOVER["day"])
+
+
+def _temp_band_traces(daily_data: pd.DataFrame, x_hover: str, **axis):
+    """temp_p50~temp_p90 구간을 채운 띠 (분위수 열이 없으면 빈 목록)."""
+    if "temp_p90" not in daily_data or "temp_p50" not in daily_data:
+        return []
+    return [
+        go.Scatter(
+            x=daily_data["date"], y=daily_data["temp_p50"], mode="lines",
+            line=dict(width=0, color=LAVENDER), showlegend=False, hoverinfo="skip", **axis
+        ),
+        go.Scatter(
+            x=daily_data["date"], y=daily_data["temp_p90"], mode="lines",
+            name="온도 p50~p90", fill="tonexty", fillcolor=hex_to_rgba(LAVENDER, 0.18),
+            line=dict(width=0, color=LAVENDER), connectgaps=False,
+            customdata=daily_data["temp_p50"],
+            hovertemplate=x_hover + "<br>p50: %{customdata:.2f}°C · p90: %{y:.2f}°C<extra></extra>", **axis
+        ),
+    ]
+
+
 def create_split_charts(daily_data: pd.DataFrame):
-    """표현율과 온도를 분리된 차트로 생성합니다."""
+    """표현율과 온도를 분리된 차트로 생성합니다 (일/주/월 구간 모두 지원)."""
     caution = st.session_state.get("caution_c", 37.8)
     warn = st.session_state.get("warn_c", 39.0)
+    x_hover = _x_hover(daily_data)
 
     # 상단: 혐오/조롱 표현율
     fig1 = go.Figure()
@@ -23,7 +51,7 @@ def create_split_charts(daily_data: pd.DataFrame):
         name="혐오율",
         line=dict(color=PASTEL_PINK, width=4, shape="spline", smoothing=1.05),
         marker=dict(size=7, color=PASTEL_PINK, line=dict(color="#fff", width=2)),
-        hovertemplate="%{x|%Y-%m-%d}<br>혐오율: %{y:.1f}%<extra></extra>"
+        hovertemplate=x_hover + "<br>혐오율: %{y:.1f}%<extra></extra>"
     ))
     fig1.add_trace(go.Scatter(
         x=daily_data["date"],
@@ -32,7 +60,7 @@ def create_split_charts(daily_data: pd.DataFrame):
         name="조롱율",
         line=dict(color=PASTEL_ORANGE, width=4, shape="spline", smoothing=1.05),
         marker=dict(size=7, color=PASTEL_ORANGE, line=dict(color="#fff", width=2)),
-        hovertemplate="%{x|%Y-%m-%d}<br>조롱율: %{y:.1f}%<extra></extra>"
+        hovertemplate=x_hover + "<br>조롱율: %{y:.1f}%<extra></extra>"
     ))
 
     fig1.update_yaxes(range=[0, 100], ticksuffix='%', gridcolor="#EEF2F7", title_text="", tickangle=0)
@@ -55,6 +83,8 @@ def create_split_charts(daily_data: pd.DataFrame):
     fig2 = go.Figure()
     fig2.add_hrect(y0=caution, y1=warn, fillcolor=hex_to_rgba(ORANGE, 0.08), line_width=0)
     fig2.add_hrect(y0=warn, y1=40.0, fillcolor=hex_to_rgba(RED, 0.08), line_width=0)
+    for trace in _temp_band_traces(daily_data, x_hover):
+        fig2.add_trace(trace)
     fig2.add_trace(go.Scatter(
         x=daily_data["date"],
         y=temp_avg,
@@ -62,7 +92,7 @@ def create_split_charts(daily_data: pd.DataFrame):
         name="평균 유해온도",
         line=dict(color=LAVENDER, width=5, shape="spline", smoothing=1.05),
         marker=dict(size=8, color=LAVENDER, line=dict(color="#fff", width=2)),
-        hovertemplate="%{x|%Y-%m-%d}<br>평균 온도: %{y:.2f}°C<extra></extra>"
+        hovertemplate=x_hover + "<br>평균 온도: %{y:.2f}°C<extra></extra>"
     ))
 
     fig2.add_hline(y=warn, line=dict(color=RED, dash="dash"))
@@ -138,7 +168,9 @@ def create_combined_chart(daily_data: pd.DataFrame):
         marker=dict(size=6, color=PASTEL_ORANGE, line=dict(color="#fff", width=2))
     ))
 
-    # 평균 온도 (오른쪽 y축)
+    # 평균 온도와 p50~p90 띠 (오른쪽 y축)
+    for trace in _temp_band_traces(daily_data, _x_hover(daily_data), yaxis="y2"):
+        fig.add_trace(trace)
     fig.add_trace(go.Scatter(
         x=daily_data["date"],
         y=temp_avg,
@@ -3,7 +3,7 @@
 
 import streamlit as st
 import streamlit.components.v1 as components
-from typing import Dict
+from typing import Dict, Optional
 from config import SEVERITY_COLOR, RED, ORANGE
 from utils import severity_from_temp
 
@@ -227,9 +227,15 @@ def blur_block(text: str, temp_c: float, key: str):
     )
 
 
-def firebase_kpi_table(suggested: int, accepted: int):
-    """Firebase 사용자 데이터를 KPI 테이블 스타일로 표시합니다."""
+def firebase_kpi_table(suggested: int, accepted: int, temp_quantiles: Optional[Dict[str, float]] = None):
+    """
+    Firebase 사용자 데이터를 KPI 테이블 스타일로 표시합니다.
+    temp_quantiles({"p50": 37.9, "p90": ...})가 주어지면 기간 온도 분위수 열을 덧붙입니다.
+    """
     accept_rate = (accepted / max(suggested, 1)) * 100
+    quantiles = {k: v for k, v in (temp_quantiles or {}).items() if v == v}  # NaN(온도 없음) 제외
+    q_heads = "".join(f"<th>온도 {k}</th>" for k in quantiles)
+    q_cells = "".join(f"<td class='num'>{v:.2f}°C</td>" for v in quantiles.values())
 
     kpi_html = f"""
     <div class='kpi-grid'>
@@ -239,6 +245,7 @@ def firebase_kpi_table(suggested: int, accepted: int):
             <th>리라이팅 제안</th>
             <th>리라이팅 수락</th>
             <th>수락률</th>
+            {q_heads}
           </tr>
         </thead>
         <tbody>
@@ -246,6 +253,7 @@ def firebase_kpi_table(suggested: int, accepted: int):
             <td class='num'>{suggested}</td>
             <td class='num'>{accepted}</td>
             <td class='num'>{accept_rate:.1f}%</td>
+            {q_cells}
           </tr>
         </tbody>
       </table>
@@ -1,6 +1,7 @@
 # config.py
 # -*- coding: utf-8 -*-
 
+import os
 from datetime import timezone, timedelta
 
 # 시간대 설정
@@ -31,6 +32,7 @@ PASTEL_PURPLE = "#E9D5FF"
 # 분석 관련 상수
 POSITIVE_HINTS = ("최고","좋","멋지","훌륭","고마","감사","축하","응원","사랑","대박","굳","기대")
 NEUTRAL_SHORT_CHARS = set(".!?,ㅋㅎㅠㅜ~ ")
+LEXICON_VERDICT_WEIGHT = 0.8  # 욕설 사전 가중치가 이 값 이상이면 API 없이 유해 판정
 
 # 온도 매핑 상수
 MIN_TEMP = 36.5
@@ -40,4 +42,89 @@ TEMP_RANGE = MAX_TEMP - MIN_TEMP
 # 기본 임계값
 DEFAULT_CAUTION_TEMP = 37.8
 DEFAULT_WARN_TEMP = 39.0
-BLUR_THRESHOLD = 39.0
\ No newline at end of file
+BLUR_THRESHOLD = 39.0
+
+# 분석 결과 캐시 (메모리 LRU + SQLite 디스크)
+ANALYSIS_CACHE_PATH = os.getenv("DTALKS_CACHE_PATH", ".dtalks_analysis_cache.sqlite3")
+ANALYSIS_CACHE_MEMORY_SIZE = 2048
+ANALYSIS_CACHE_DISK_SIZE = 100_000
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600  # 초
+ANALYSIS_CACHE_MAINTENANCE_EVERY = 256  # 디스크 쓰기 이만큼마다 만료/크기 초과 항목 정리
+ANALYSIS_CACHE_ACCESS_FLUSH = 256       # 디스크 적중 접근 시각을 이만큼 모아서 한 번에 기록
+
+# 비동기 분석기 (동시성/레이트 리밋/재시도)
+ASYNC_CONCURRENCY = int(os.getenv("DTALKS_ASYNC_CONCURRENCY", "8"))
+OPENAI_RPM = 500          # 분당 요청 수
+OPENAI_TPM = 200_000      # 분당 토큰 수
+OPENAI_MAX_RETRIES = 5
+OPENAI_BACKOFF_BASE = 0.5  # 초
+OPENAI_BACKOFF_MAX = 20.0  # 초
+
+# 유사 중복 댓글 묶기 (MinHash + LSH)
+DEDUP_THRESHOLD = 0.8    # 추정 자카드 유사도 기준
+DEDUP_SHINGLE_SIZE = 3   # 문자 n-gram 크기
+DEDUP_BANDS = 16
+DEDUP_ROWS = 4           # 서명 길이 = BANDS * ROWS
+
+# 로컬 유해성 모델 (API 없을 때 사용)
+LOCAL_MODEL_PATH = os.getenv("DTALKS_LOCAL_MODEL", "local_model.npz")
+LOCAL_MODEL_FEATURES = 1 << 18  # 해시 공간 크기
+LOCAL_MODEL_NGRAMS = (1, 3)     # 문자 n-gram 범위
+
+# 순화 제안 재사용 메모리
+SUGGESTION_MEMORY_CAPACITY = 2000
+SUGGESTION_MEMORY_DIM = 1 << 10        # 해싱 임베딩 차원
+SUGGESTION_MEMORY_THRESHOLD = 0.85     # 코사인 유사도 기준
+SUGGESTION_MEMORY_IVF_LISTS = 32       # IVF 분할 수 (0이면 전수 검색만 사용)
+SUGGESTION_MEMORY_IVF_PROBES = 4       # 검색 시 확인할 분할 수
+SUGGESTION_MEMORY_IVF_MIN_SIZE = 500   # 이 개수 이상일 때만 IVF 사용
+
+# 업스트림 보호 (마감 시간/서킷 브레이커/헤지 요청)
+ANALYSIS_DEADLINE = float(os.getenv("DTALKS_ANALYSIS_DEADLINE", "8"))  # 페이지당 분석 예산 (초)
+HEDGE_DELAY = float(os.getenv("DTALKS_HEDGE_DELAY", "0"))  # 이 시간(초) 안에 응답이 없으면 같은 요청을 한 번 더 보냄 (0이면 끔)
+HEDGE_MAX_WORKERS = 16
+BREAKER_FAILURE_THRESHOLD = 5    # 연속 실패 횟수
+BREAKER_SLOW_CALL_SECONDS = 5.0  # 이 시간 이상 걸리면 느린 호출
+BREAKER_SLOW_CALL_RATE = 0.5     # 최근 호출 중 느린 호출 비율
+BREAKER_WINDOW = 20              # 느린 호출 비율을 계산할 최근 호출 수
+BREAKER_RESET_TIMEOUT = 30.0     # open 유지 시간 (초), 이후 탐침 호출 허용
+
+# 일별 롤업 (주간 리포트용 사전 집계)
+ROLLUP_BATCH_SIZE = 5000  # 증분 갱신 한 번에 읽을 이벤트 수
+ROLLUP_LATE_ID_WINDOW = 1000  # SQL: 워터마크(마지막 ID) 아래 이 범위의 ID를 다시 확인 (늦게 커밋된 이벤트)
+ROLLUP_LATE_SECONDS = 300     # Firestore: 워터마크(마지막 createdAt) 이전 이 시간(초) 안의 이벤트를 다시 확인
+
+# 이벤트 스트리밍 조회 (주간 리포트, 메모리 상한)
+EVENTS_CHUNK_SIZE = 2000  # 한 번에 가져와 집계할 이벤트 행 수
+
+# 데이터베이스 엔진 (프로세스당 URL별 한 번 생성, 커넥션 풀 공유)
+DATABASE_URL = os.getenv("DTALKS_DATABASE_URL", "")  # 예: sqlite:///dtalks.sqlite3 (비우면 ORA_* 환경변수로 Oracle 연결)
+DB_POOL_SIZE = int(os.getenv("DTALKS_DB_POOL_SIZE", "5"))        # 유지할 커넥션 수
+DB_MAX_OVERFLOW = int(os.getenv("DTALKS_DB_MAX_OVERFLOW", "10"))  # 풀이 다 찼을 때 추가로 열 수 있는 커넥션 수
+DB_POOL_RECYCLE = int(os.getenv("DTALKS_DB_POOL_RECYCLE", "1800"))  # 이 시간(초)보다 오래된 커넥션은 다시 연결
+DB_POOL_TIMEOUT = 30  # 풀에서 커넥션을 기다리는 최대 시간 (초)
+
+# 리포트 조회 기간 (일) — 일/주/월 롤업 계층으로 처리
+REPORT_WINDOWS = (7, 30, 90, 365)
+
+# 임계값 what-if용 온도 히스토그램 구간 폭 (°C) — 온도는 소수 둘째 자리로 반올림되므로 0.01이면 정확
+TEMP_HIST_STEP = 0.01
+TEMP_QUANTILES = (0.5, 0.9, 0.99)  # 리포트에 표시할 온도 분위수 (p50/p90/p99)
+
+# 서로 다른 작성자 수 추정 (HyperLogLog) — 레지스터 2^12개(4KB), 상대 표준오차 약 1.6%
+HLL_PRECISION = 12
+
+# 관리자용 게시글 온도 순위 인덱스
+HOT_POSTS_CAPACITY = 1000    # 유지할 게시글 수 (넘치면 가장 차가운 게시글부터 버림)
+HOT_POSTS_WINDOWS = (1, 6, 24, 72, 168)  # 조회 기간 선택지 (시간)
+
+# 댓글 폭주(레이드) 감지 — 유해 비율 EWMA + CUSUM
+RAID_EWMA_ALPHA = 0.2            # 최근 유해 비율 EWMA 가중치 (댓글 단위)
+RAID_BASELINE_ALPHA = 0.02       # 평소 유해 비율 EWMA 가중치 (레이드 중에는 고정)
+RAID_BASELINE_INIT = 0.1         # 새 게시글의 평소 유해 비율 초기값
+RAID_CUSUM_K = 0.15              # 평소 비율 대비 허용 편차
+RAID_CUSUM_H = 5.0               # CUSUM 경보 임계
+RAID_RATE_HALFLIFE = 600.0       # 도착률 감쇠 반감기 (초)
+RAID_MIN_ARRIVALS_PER_MIN = 0.5  # 레이드로 보는 최소 도착률 (분당 댓글 수)
+RAID_QUIET_SECONDS = 1800        # 이 시간 동안 댓글이 없으면 레이드 종료
+RAID_EVENT_LOG = 1000            # 보관할 최근 시작/종료 이벤트 수
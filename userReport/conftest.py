@@ -0,0 +1,20 @@
+# conftest.py
+# -*- coding: utf-8 -*-
+"""pytest 설정: 앱 모듈(평면 구조)을 tests/에서 바로 import할 수 있게 이 디렉터리를 경로에 추가합니다."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def engine():
+    """테이블이 초기화된 빈 메모리 SQLite 엔진 (프로세스에서 공유되는 엔진이므로 테스트마다 새로 만듦)."""
+    from database import dispose_engines, get_engine
+
+    dispose_engines()
+    yield get_engine("sqlite://")
+    dispose_engines()
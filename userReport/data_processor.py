@@ -3,85 +3,190 @@
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from analyzer import analyze_text
-from utils import map_temp, severity_from_temp, badge_from_comment
-from config import KST, DEFAULT_CAUTION_TEMP, DEFAULT_WARN_TEMP
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from async_analyzer import score_texts_concurrent, suggest_rewrites_concurrent
+from dedup import cluster_texts, cluster_sizes
+from utils import map_temps, severities_from_temps, looks_positive_or_short_many
+from resilience import Deadline
+from post_aggregate import PostAggregate, REASON_KEYS
+from hot_posts import hot_posts
+from raid_detector import raid_detector
+from records import AnalyzedComment, Comment
+from temp_histogram import TempHistogram, N_BINS, temp_bins, quantiles_by_row
+from config import KST, DEFAULT_CAUTION_TEMP, DEFAULT_WARN_TEMP, ANALYSIS_DEADLINE
 import streamlit as st
 
 
-def process_comments(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, float], float, int]:
+def process_comments(items: List[Comment], suggest_all: bool = False, deadline: Optional[Deadline] = None,
+                     aggregate: Optional[PostAggregate] = None
+                     ) -> Tuple[List[AnalyzedComment], Dict[str, float], float, int]:
     """
     댓글 목록을 분석하여 결과를 반환합니다.
 
+    유사 중복 댓글은 클러스터로 묶어 대표 댓글만 분석하고 결과를 구성원에게 나눠 줍니다.
+    1단계로 모든 댓글의 점수만 계산하고, 2단계 순화 제안은 유해 댓글(주의 임계 이상)에만 생성합니다.
+    온도/심각도/배지는 evaluate_comments로 한 번에 계산하고, 게시글 온도/사유는 PostAggregate에서 읽습니다.
+
     Args:
-        items: 댓글 목록 [{"id", "author", "text", "dt", ...}]
+        items: 댓글 목록 (Comment, 또는 같은 키의 딕셔너리)
+        suggest_all: True면 유해 여부와 관계없이 모든 댓글에 제안을 생성
+        deadline: 점수/제안 요청 전체의 마감 (기본: 지금부터 ANALYSIS_DEADLINE초).
+            마감이 지나면 남은 댓글은 로컬 대체 경로로 분석합니다.
+        aggregate: 이 게시글의 집계 상태. 주어지면 새 댓글/사라진 댓글/점수가 바뀐 댓글만 반영하고(임계값이
+            바뀌었으면 다시 만듦) 그 값을 사용합니다. 없으면 이번 댓글 목록으로 새로 만듭니다.
+            aggregate.histogram에는 임계값 what-if용 온도 히스토그램이, aggregate.authors /
+            daily_authors에는 서로 다른 (유해) 작성자 수 스케치가 들어갑니다.
+            post_id가 있는 집계는 갱신 후 게시글 온도 순위(hot_posts)와 레이드 감지(raid_detector)에도 반영합니다.
 
     Returns:
-        tuple: (분석된_댓글들, 집계된_사유들, 게시글_온도, 유해_댓글_수)
+        tuple: (분석된_댓글들(AnalyzedComment), 집계된_사유들, 게시글_온도, 유해_댓글_수)
     """
+    items = [Comment.from_mapping(it) for it in items]
+    deadline = deadline or Deadline(ANALYSIS_DEADLINE)
     caution = st.session_state.get("caution_c", DEFAULT_CAUTION_TEMP)
     warn = st.session_state.get("warn_c", DEFAULT_WARN_TEMP)
 
-    results = []
-    agg_reasons = {"혐오": 0.0, "조롱/모욕": 0.0, "비하": 0.0}
-    harmful_cnt = 0
+    # 유사 중복 댓글 묶기 → 클러스터 대표만 분석
+    texts = [it.text for it in items]
+    labels = cluster_texts(texts)
+    sizes = cluster_sizes(labels)
+    reps = sorted(sizes)
 
-    for it in items:
-        res = analyze_text(it["text"]) or {}
+    # 1단계: 대표 댓글 점수 계산 (Moderation 배치 + 비동기 병렬 호출)
+    rep_scores = score_texts_concurrent([texts[i] for i in reps], deadline=deadline)
 
-        # 시뮬레이션 데이터인 경우 강제 온도/유해 여부 사용
-        if "sim_temp" in it:
-            temp_c = float(it["sim_temp"])
-            sev = severity_from_temp(temp_c)
-            harmful = bool(it.get("sim_harm", False))
-        else:
-            temp_c = map_temp(res.get("toxicity", 0.0))
-            sev = "경고" if temp_c >= warn else ("주의" if temp_c >= caution else "정상")
-            harmful = temp_c >= caution
-
-        # 유해 댓글인 경우 사유 집계
-        if harmful:
-            harmful_cnt += 1
-            r = res.get("reasons", {})
-            agg_reasons["혐오"] += float(r.get("혐오", 0.0))
-            agg_reasons["조롱/모욕"] += float(r.get("조롱/모욕", 0.0))
-            agg_reasons["비하"] += float(r.get("비하", 0.0))
-
-        # 표시용 배지 결정 (오탐 억제 규칙 적용)
-        if "sim_temp" in it:
-            # 시뮬레이션: 온도 기준만 적용
-            badge = ("경고" if temp_c >= warn else ("주의" if temp_c >= caution else None))
-        else:
-            badge = badge_from_comment(it["text"], res, temp_c)
-
-        results.append({
-            "id": it["id"],
-            "author": it["author"],
-            "text": it["text"],
-            "dt": it["dt"],
-            "temp_c": temp_c,
-            "severity": sev,
-            "harmful": harmful,
-            "suggestion": res.get("suggestion"),
-            "badge": badge
-        })
+    # 대표 점수를 열(column) 배열로 펼친 뒤 댓글별로 인덱싱
+    rep_pos = {rep: k for k, rep in enumerate(reps)}
+    row_of = np.fromiter((rep_pos[rep] for rep in labels), dtype=np.int64, count=len(labels))
+    scores = score_columns(rep_scores)
+    cols = {name: col[row_of] for name, col in scores.items()}
+
+    sim_temp = np.fromiter((float(it.sim_temp) for it in items), dtype=np.float64, count=len(items))
+    sim_harm = np.fromiter((bool(it.sim_harm) for it in items), dtype=bool, count=len(items))
+
+    ev = evaluate_comments(cols["toxicity"], cols["hate"], cols["aggression"], cols["reasons"], texts,
+                           caution=caution, warn=warn, sim_temp=sim_temp, sim_harm=sim_harm)
+    histogram = TempHistogram.from_columns(ev["temp_c"], ev["eligible"], cols["reasons"],
+                                           fixed=~np.isnan(sim_temp), fixed_harmful=ev["harmful"])
+
+    results = [
+        AnalyzedComment(it.id, it.author, it.text, it.dt, temp_c, sev, harmful, None, badge, sizes[rep],
+                        tuple(reasons))
+        for it, rep, temp_c, sev, harmful, badge, reasons in zip(
+            items, labels, ev["temp_c"].tolist(), ev["severity"].tolist(),
+            ev["harmful"].tolist(), ev["badge"].tolist(), cols["reasons"].tolist()
+        )
+    ]
+
+    # 2단계: 순화 제안은 유해 댓글에만 생성 (클러스터 대표 문장 기준, 캐시로 재사용)
+    targets = np.arange(len(items)) if suggest_all else np.flatnonzero(ev["harmful"])
+    if len(targets):
+        target_reps = sorted({labels[i] for i in targets.tolist()})
+        rep_suggestions = dict(zip(target_reps, suggest_rewrites_concurrent([texts[i] for i in target_reps],
+                                                                            deadline=deadline)))
+        for i in targets.tolist():
+            results[i].suggestion = rep_suggestions[labels[i]]
 
-    # 게시글 단위 온도 계산 - 중복 함수 제거하고 직접 계산
-    total = len(items)
-    harm_rate = harmful_cnt / total if total else 0.0
-    # 게시글 단위 유해발언 비율(0-1)을 온도(36.5-40.0°C)로 매핑
-    # 명세: 1%p 증가당 0.035°C → 100% = +3.5°C
-    post_temp = round(36.5 + harm_rate * 3.5, 2)
-
-    # 사유 정규화
-    if harmful_cnt > 0:
-        maxv = max(agg_reasons.values()) or 1e-9
-        norm_reasons = {k: (v / maxv) for k, v in agg_reasons.items()}
+    # 게시글 단위 집계 (전체 재계산 없이 집계 상태에서 읽음)
+    if aggregate is None:
+        aggregate = PostAggregate.from_columns([it.id for it in items], ev["harmful"], cols["reasons"],
+                                               caution=caution)
+    elif aggregate.caution != caution or not len(aggregate):
+        aggregate.reset_from_columns([it.id for it in items], ev["harmful"], cols["reasons"], caution)
     else:
-        norm_reasons = {"혐오": 0.0, "조롱/모욕": 0.0, "비하": 0.0}
+        aggregate.sync(results)
+    aggregate.histogram = histogram
+    times = comment_times([it.dt for it in items])
+    aggregate.add_authors([it.author for it in items], ev["harmful"],
+                          [None if pd.isna(t) else t.date() for t in times])
+    if aggregate.post_id is not None:
+        hot_posts.update_from_aggregate(aggregate)
+        # 새로 들어온 댓글만 시간순으로 반영 (같은 목록을 다시 넣어도 중복 반영되지 않음, 같은 시각은 ID로 구분)
+        epoch = np.where(times.isna(), np.nan, times.asi8 / 1e9)
+        raid_detector.observe(aggregate.post_id, epoch, ev["harmful"], [it.id for it in items])
 
-    return results, norm_reasons, post_temp, harmful_cnt
+    return results, aggregate.norm_reasons, aggregate.post_temp, aggregate.harmful
+
+
+def comment_times(dts: List[Any]) -> pd.DatetimeIndex:
+    """댓글 작성 시각 목록을 KST 시각으로 바꿉니다 (해석할 수 없으면 NaT, 시각 해석은 _weekly_columns와 같음)."""
+    return pd.DatetimeIndex(pd.to_datetime(pd.Series(dts, dtype=object), utc=True, errors='coerce')).tz_convert(KST)
+
+
+def comment_days(dts: List[Any]) -> List[Optional[Any]]:
+    """댓글 작성 시각 목록을 KST 날짜 목록으로 바꿉니다 (해석할 수 없으면 None)."""
+    return [None if pd.isna(t) else t.date() for t in comment_times(dts)]
+
+
+def score_columns(scores: List[Optional[Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """
+    분석 결과 딕셔너리 목록을 열 배열로 변환합니다. 없는 값은 0으로 채웁니다.
+
+    Returns:
+        dict: {"toxicity": (n,), "hate": (n,), "aggression": (n,), "reasons": (n, 3) — REASON_KEYS 순서}
+    """
+    scores = [res or {} for res in scores]
+    n = len(scores)
+    reasons = np.zeros((n, len(REASON_KEYS)), dtype=np.float64)
+    for i, res in enumerate(scores):
+        r = res.get("reasons") or {}
+        reasons[i] = [float(r.get(k, 0.0)) for k in REASON_KEYS]
+    cols = {
+        name: np.fromiter((float(res.get(name, 0.0)) for res in scores), dtype=np.float64, count=n)
+        for name in ("toxicity", "hate", "aggression")
+    }
+    cols["reasons"] = reasons
+    return cols
+
+
+def evaluate_comments(toxicity, hate, aggression, reasons, texts: List[str], caution: float, warn: float,
+                      sim_temp=None, sim_harm=None) -> Dict[str, np.ndarray]:
+    """
+    점수 배열로 댓글별 온도/심각도/유해 여부/배지를 한 번에 계산합니다.
+
+    결과는 map_temp, severity_from_temp, badge_from_comment를 댓글마다 호출한 것과 같습니다.
+    sim_temp가 NaN이 아닌 댓글(시뮬레이션 데이터)은 그 온도와 sim_harm을 그대로 사용하고,
+    배지는 온도 기준만 적용합니다.
+
+    Args:
+        reasons: (n, 3) 사유 점수 (REASON_KEYS 순서)
+        caution, warn: 주의/경고 임계 온도
+
+    Returns:
+        dict: {"temp_c": float, "severity": object, "harmful": bool, "badge": object(None 포함),
+               "eligible": bool(주의 구간이면 '주의' 배지를 받는지)} 배열
+    """
+    n = len(texts)
+    temp_c = map_temps(toxicity)
+    harmful = temp_c >= caution
+
+    if sim_temp is not None:
+        sim = ~np.isnan(sim_temp)
+        temp_c = np.where(sim, sim_temp, temp_c)
+        harmful = np.where(sim, sim_harm if sim_harm is not None else False, harmful)
+    else:
+        sim = np.zeros(n, dtype=bool)
+
+    severity = severities_from_temps(temp_c, caution, warn)
+
+    badge = np.full(n, None, dtype=object)
+    badge[temp_c >= warn] = "경고"
+
+    # 주의 배지 대상: 시뮬레이션 댓글 전부, 실데이터는 사유/공격성/혐오 점수 조건 + 긍정·짧은 표현 오탐 억제.
+    # 임계값과 무관하게 정해지므로 온도 히스토그램(what-if)에도 그대로 씁니다.
+    strong = ((np.asarray(reasons).max(axis=1, initial=0.0) >= 0.5)
+              | (np.asarray(aggression) >= 0.5) | (np.asarray(hate) >= 0.4))
+    eligible = sim.copy()
+    candidates = np.flatnonzero(~sim & strong)
+    if len(candidates):
+        suppressed = looks_positive_or_short_many([texts[i] for i in candidates.tolist()])
+        eligible[candidates[~suppressed]] = True
+
+    caution_band = (temp_c >= caution) & (temp_c < warn)
+    badge[caution_band & eligible] = "주의"
+
+    return {"temp_c": temp_c, "severity": severity, "harmful": harmful.astype(bool), "badge": badge,
+            "eligible": eligible}
 
 
 def post_temp_from_rate(rate: float) -> float:
@@ -92,7 +197,7 @@ def post_temp_from_rate(rate: float) -> float:
 
 def process_weekly_data(df: pd.DataFrame) -> Tuple[Dict[str, int], pd.DataFrame]:
     """
-    주간 데이터를 처리하여 KPI와 일별 집계를 반환합니다.
+    주간 데이터를 처리하여 KPI와 일별 집계를 반환합니다 (입력 데이터프레임은 변경하지 않음).
 
     Args:
         df: 이벤트 데이터프레임
@@ -103,41 +208,279 @@ def process_weekly_data(df: pd.DataFrame) -> Tuple[Dict[str, int], pd.DataFrame]
     if df.empty:
         return {}, pd.DataFrame()
 
-    # 날짜 파생
+    cols = _weekly_columns(df)
+    kpi = _weekly_kpis(cols.sum(numeric_only=True), cols["temp_c"].mean(), _temp_counts(cols, None))
+    daily = _daily_rates(cols, ["date"])
+    return kpi, daily
+
+
+def process_weekly_data_by_user(df: pd.DataFrame, user_col: str = "user_id"
+                                ) -> Tuple[Dict[Any, Dict[str, Any]], pd.DataFrame]:
+    """
+    여러 사용자의 이벤트를 한 번에 처리합니다 (사용자별 process_weekly_data와 같은 결과).
+
+    Returns:
+        tuple: ({사용자: KPI_딕셔너리}, [user_col, date, 혐오율, 조롱율, temp_avg, temp_p50/p90/p99] 일별 집계)
+    """
+    if df.empty:
+        return {}, pd.DataFrame()
+
+    cols = _weekly_columns(df)
+    cols[user_col] = df[user_col].to_numpy()
+
+    grp = cols.groupby(user_col, sort=True)
+    sums = grp[["n", "suggested", "accepted"]].sum()
+    temp_mean = grp["temp_c"].mean()
+    hists = _temp_counts(cols, [user_col])
+    kpis = {user: _weekly_kpis(row, temp_mean[user], hists[i]) for i, (user, row) in enumerate(sums.iterrows())}
+
+    daily = _daily_rates(cols, [user_col, "date"])
+    return kpis, daily
+
+
+def _weekly_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    주간 집계에 필요한 열(KST 날짜, 제안/수락 여부, 혐오/조롱 여부, 온도)만 담은 새 데이터프레임을 만듭니다.
+    제안 열(suggestion 또는 has_suggestion)이 없으면 모든 이벤트를 제안으로, 선택 열이 없으면 모두 수락으로 봅니다.
+    """
     dt_series = pd.to_datetime(df["created_at"], utc=True, errors='coerce')
     dt_series = dt_series.fillna(pd.to_datetime(df["created_at"]))
     try:
         dt_kst = dt_series.dt.tz_convert(KST)
     except Exception:
         dt_kst = dt_series
-    df["date"] = dt_kst.dt.date
 
-    # KPI 계산
-    total = len(df)
-    suggested = int(df["suggestion"].notna().sum()) if "suggestion" in df.columns else total
-    accepted = int((df.get("sent_choice", "순화") == "순화").sum())
-    accept_rate = (accepted / max(suggested, 1)) * 100
-    avg_temp = float(df["temp_c"].mean())
+    n = len(df)
+    if "has_suggestion" in df.columns:
+        # CLOB을 읽지 않는 조회 경로: SUGGESTION IS NOT NULL 여부만 받아옴
+        suggested = df["has_suggestion"].fillna(0).to_numpy().astype(bool)
+    elif "suggestion" in df.columns:
+        suggested = df["suggestion"].notna().to_numpy()
+    else:
+        suggested = np.ones(n, dtype=bool)
+
+    return pd.DataFrame({
+        "date": dt_kst.dt.date.to_numpy(),
+        "n": np.ones(n, dtype=np.int64),
+        "suggested": suggested,
+        "accepted": (df["sent_choice"] == "순화").to_numpy() if "sent_choice" in df.columns else np.ones(n, dtype=bool),
+        "hate_hit": (df["hate"] >= 0.5).to_numpy(),
+        "mock_hit": (df["aggression"] >= 0.5).to_numpy(),
+        "temp_c": pd.to_numeric(df["temp_c"], errors="coerce").to_numpy(dtype=np.float64),
+    })
+
 
+def _weekly_kpis(sums, temp_mean: float, temp_hist: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    열 합계(n/suggested/accepted)와 평균 온도로 KPI 딕셔너리를 만듭니다.
+    temp_hist(온도 구간별 건수)가 주어지면 온도 분위수(temp_p50/temp_p90/temp_p99)도 넣습니다.
+    """
+    suggested = int(sums["suggested"])
+    accepted = int(sums["accepted"])
     kpi = {
-        "total": total,
+        "total": int(sums["n"]),
         "suggested": suggested,
         "accepted": accepted,
-        "accept_rate": accept_rate,
-        "avg_temp": avg_temp
+        "accept_rate": (accepted / max(suggested, 1)) * 100,
+        "avg_temp": float(temp_mean)
     }
+    if temp_hist is not None:
+        kpi.update({f"temp_{k}": float(v[0]) for k, v in quantiles_by_row(temp_hist).items()})
+    return kpi
+
+
+def _temp_counts(cols: pd.DataFrame, keys: Optional[List[str]]) -> np.ndarray:
+    """
+    온도 구간별 건수. keys가 없으면 전체 (N_BINS,), 있으면 groupby(keys, sort=True) 순서의 (그룹 수, N_BINS).
+    """
+    temp = cols["temp_c"].to_numpy(dtype=np.float64)
+    if keys is None:
+        return np.bincount(temp_bins(temp[~np.isnan(temp)]), minlength=N_BINS)
+
+    codes = cols.groupby(keys, sort=True).ngroup().to_numpy(dtype=np.float64)
+    valid = ~np.isnan(codes)
+    n_groups = int(codes[valid].max()) + 1 if valid.any() else 0
+    counts = np.zeros((n_groups, N_BINS), dtype=np.int64)
+    m = valid & ~np.isnan(temp)
+    np.add.at(counts, (codes[m].astype(np.int64), temp_bins(temp[m])), 1)
+    return counts
 
-    # 일별 집계 (Pandas 경고 해결)
-    grp = df.groupby("date")
-    daily = pd.DataFrame({"date": sorted(df["date"].unique())})
 
-    hate_rate = grp.apply(lambda g: (g["hate"] >= 0.5).mean() * 100, include_groups=False).reindex(daily["date"]).values
-    mock_rate = grp.apply(lambda g: (g["aggression"] >= 0.5).mean() * 100, include_groups=False).reindex(
-        daily["date"]).values
-    temp_avg = grp["temp_c"].mean().reindex(daily["date"]).values
+def _quantile_frame(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """구간별 건수 행들 → {"temp_p50": (g,), ...}"""
+    return {f"temp_{k}": v for k, v in quantiles_by_row(counts).items()}
+
+
+def _daily_rates(cols: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    keys(날짜 또는 사용자+날짜)별 혐오율/조롱율(%)과 평균 온도를 한 번의 groupby로 계산합니다.
+    온도 분위수(temp_p50/p90/p99)는 같은 그룹 순서의 온도 구간 히스토그램에서 구합니다.
+    """
+    dated = cols.dropna(subset=["date"])
+    daily = (
+        dated
+        .groupby(keys, sort=True)
+        .agg(혐오율=("hate_hit", "mean"), 조롱율=("mock_hit", "mean"), temp_avg=("temp_c", "mean"))
+        .reset_index()
+    )
+    daily["혐오율"] = np.nan_to_num(daily["혐오율"].to_numpy(dtype=np.float64) * 100)
+    daily["조롱율"] = np.nan_to_num(daily["조롱율"].to_numpy(dtype=np.float64) * 100)
+    daily["temp_avg"] = np.nan_to_num(daily["temp_avg"].to_numpy(dtype=np.float64))
+    for name, values in _quantile_frame(_temp_counts(dated, keys)).items():
+        daily[name] = values
+    return daily
 
-    daily["혐오율"] = np.nan_to_num(hate_rate)
-    daily["조롱율"] = np.nan_to_num(mock_rate)
-    daily["temp_avg"] = np.nan_to_num(temp_avg)
 
-    return kpi, daily
\ No newline at end of file
+# 일별 롤업 행의 가산(더해도 되는) 열
+ROLLUP_COLUMNS = ("n", "suggested", "accepted", "temp_sum", "temp_n", "hate_n", "aggr_n")
+
+
+def daily_rollup(df: pd.DataFrame, user_col: str = "user_id") -> pd.DataFrame:
+    """
+    이벤트를 (사용자, KST 날짜)별 합계 행으로 접습니다.
+
+    Returns:
+        DataFrame: [user_col, date, n, suggested, accepted, temp_sum, temp_n, hate_n, aggr_n]
+            같은 키의 행끼리 더해도 되므로 증분 갱신에 그대로 사용합니다.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=[user_col, "date", *ROLLUP_COLUMNS])
+
+    cols = _weekly_columns(df)
+    cols[user_col] = df[user_col].to_numpy()
+    cols["temp_n"] = cols["temp_c"].notna()
+    return (
+        cols.dropna(subset=["date"])
+        .groupby([user_col, "date"], sort=True)
+        .agg(n=("n", "sum"), suggested=("suggested", "sum"), accepted=("accepted", "sum"),
+             temp_sum=("temp_c", "sum"), temp_n=("temp_n", "sum"),
+             hate_n=("hate_hit", "sum"), aggr_n=("mock_hit", "sum"))
+        .reset_index()
+    )
+
+
+def daily_temp_histogram(df: pd.DataFrame, user_col: str = "user_id") -> pd.DataFrame:
+    """
+    이벤트 온도를 (사용자, KST 날짜, 온도 구간)별 건수로 접습니다 (임계값 what-if용).
+
+    Returns:
+        DataFrame: [user_col, date, bin, count] — 같은 키끼리 더해도 되는 가산 행
+    """
+    if df.empty:
+        return pd.DataFrame(columns=[user_col, "date", "bin", "count"])
+
+    cols = _weekly_columns(df)
+    cols[user_col] = df[user_col].to_numpy()
+    cols = cols.dropna(subset=["date", "temp_c"])
+    cols["bin"] = temp_bins(cols["temp_c"].to_numpy())
+    return cols.groupby([user_col, "date", "bin"], sort=True).size().reset_index(name="count")
+
+
+def weekly_from_rollup(rows: pd.DataFrame, temp_hists: Optional[Dict[Any, np.ndarray]] = None
+                       ) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    일별 롤업 행(한 사용자)으로 process_weekly_data와 같은 형식의 KPI/일별 집계를 만듭니다.
+    원시 이벤트를 다시 읽지 않으며, 일별 비율은 원시 이벤트로 계산한 값과 같습니다.
+
+    Args:
+        temp_hists: {날짜: 온도 구간별 건수 (N_BINS,)}. 주어지면 날짜별/전체 온도 분위수도 계산합니다.
+    """
+    if rows.empty:
+        return {}, pd.DataFrame()
+
+    daily = rows.groupby("date", sort=True)[list(ROLLUP_COLUMNS)].sum().reset_index()
+    totals = daily[list(ROLLUP_COLUMNS)].sum()
+    if temp_hists is None:
+        return _weekly_kpis(totals, _temp_mean(totals)), _daily_from_sums(daily)
+
+    counts = np.stack([temp_hists.get(d, np.zeros(N_BINS, dtype=np.int64)) for d in daily["date"]])
+    return (_weekly_kpis(totals, _temp_mean(totals), counts.sum(axis=0)),
+            _daily_from_sums(daily, counts))
+
+
+def _temp_mean(sums) -> float:
+    return sums["temp_sum"] / sums["temp_n"] if sums["temp_n"] else float("nan")
+
+
+def _daily_from_sums(daily: pd.DataFrame, temp_counts: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    날짜별 합계 행(ROLLUP_COLUMNS)을 혐오율/조롱율(%)과 평균 온도로 바꿉니다.
+    temp_counts(행 순서의 온도 구간별 건수)가 주어지면 온도 분위수 열도 붙입니다.
+    """
+    n = daily["n"].to_numpy(dtype=np.float64)
+    temp_n = daily["temp_n"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = pd.DataFrame({
+            "date": daily["date"],
+            "혐오율": np.nan_to_num(daily["hate_n"].to_numpy(dtype=np.float64) / n * 100),
+            "조롱율": np.nan_to_num(daily["aggr_n"].to_numpy(dtype=np.float64) / n * 100),
+            "temp_avg": np.nan_to_num(daily["temp_sum"].to_numpy(dtype=np.float64) / temp_n),
+        })
+    if temp_counts is not None:
+        for name, values in _quantile_frame(temp_counts).items():
+            out[name] = values
+    return out
+
+
+class WeeklyAggregator:
+    """
+    이벤트 청크를 차례로 받아 주간 KPI/일별 집계를 누적합니다.
+
+    날짜별 합계(ROLLUP_COLUMNS)와 온도 구간 히스토그램, 전체 합계만 들고 있으므로 이벤트 수와 무관하게
+    메모리는 기간의 일 수에 비례합니다. result()는 process_weekly_data와 같은 형식입니다.
+    """
+
+    def __init__(self):
+        self._totals = pd.Series(0.0, index=list(ROLLUP_COLUMNS))
+        self._daily = pd.DataFrame(columns=["date", *ROLLUP_COLUMNS])
+        self._hist_total = np.zeros(N_BINS, dtype=np.int64)
+        self._hists: Dict[Any, np.ndarray] = {}
+
+    def update(self, df: pd.DataFrame):
+        """이벤트 청크 하나를 반영합니다 (열 형식은 process_weekly_data 입력과 같음)."""
+        if df.empty:
+            return
+        cols = _weekly_columns(df)
+        cols["temp_n"] = cols["temp_c"].notna()
+
+        # 날짜가 없는 이벤트도 KPI에는 포함 (process_weekly_data와 동일)
+        self._hist_total += _temp_counts(cols, None)
+        dated = cols.dropna(subset=["date"])
+        for day, counts in zip(sorted(dated["date"].unique()), _temp_counts(dated, ["date"])):
+            self._hists[day] = self._hists[day] + counts if day in self._hists else counts
+
+        cols = cols.rename(columns={"temp_c": "temp_sum", "hate_hit": "hate_n", "mock_hit": "aggr_n"})
+        dated = dated.rename(columns={"temp_c": "temp_sum", "hate_hit": "hate_n", "mock_hit": "aggr_n"})
+        self._totals += cols[list(ROLLUP_COLUMNS)].sum()
+        part = dated.groupby("date", sort=False)[list(ROLLUP_COLUMNS)].sum().reset_index()
+        if self._daily.empty:
+            self._daily = part
+        else:
+            self._daily = pd.concat([self._daily, part]).groupby("date", sort=False)[list(ROLLUP_COLUMNS)].sum().reset_index()
+
+    def daily_sums(self) -> pd.DataFrame:
+        """지금까지의 날짜별 합계 행 [date, ROLLUP_COLUMNS...] (daily_rollup과 같은 형식, 사용자 열 없음)."""
+        return self._daily.sort_values("date").reset_index(drop=True)
+
+    def daily_hists(self) -> Dict[Any, np.ndarray]:
+        """날짜별 온도 구간 히스토그램 {날짜: (N_BINS,) 건수}."""
+        return self._hists
+
+    def result(self) -> Tuple[Dict[str, Any], pd.DataFrame]:
+        if not self._totals["n"]:
+            return {}, pd.DataFrame()
+        daily = self.daily_sums()
+        counts = np.stack([self._hists.get(d, np.zeros(N_BINS, dtype=np.int64)) for d in daily["date"]])
+        return (_weekly_kpis(self._totals, _temp_mean(self._totals), self._hist_total),
+                _daily_from_sums(daily, counts))
+
+
+def stream_weekly_data(chunks: Iterable[pd.DataFrame]) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    이벤트 청크 이터레이터(database.iter_user_events 등)를 한 번 훑어 주간 데이터를 처리합니다.
+    전체 이벤트를 메모리에 올리지 않으며 결과는 process_weekly_data와 같습니다.
+    """
+    agg = WeeklyAggregator()
+    for chunk in chunks:
+        agg.update(chunk)
+    return agg.result()
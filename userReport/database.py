@@ -2,13 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import os
+import threading
 import pandas as pd
+from datetime import datetime
 from sqlalchemy import create_engine, text
-from typing import Optional, List, Dict, Any
+from sqlalchemy.pool import StaticPool
+from typing import Optional, List, Dict, Any, Iterator
+from post_aggregate import PostAggregate
+from records import Comment
+from config import (
+    KST, EVENTS_CHUNK_SIZE, DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT,
+)
 
+# 프로세스 전역 엔진 레지스트리 {URL: 엔진} (Streamlit 세션/재실행 간 공유, 테이블 초기화는 URL당 한 번)
+_engines: Dict[str, Any] = {}
+_engines_lock = threading.Lock()
+
+
+def database_url() -> Optional[str]:
+    """DTALKS_DATABASE_URL, 없으면 ORA_* 환경변수로 만든 Oracle URL. 둘 다 없으면 None."""
+    if DATABASE_URL:
+        return DATABASE_URL
 
-def get_oracle_engine():
-    """Oracle 데이터베이스 엔진을 생성하고 필요한 테이블을 초기화합니다."""
     host = os.getenv("ORA_HOST")
     user = os.getenv("ORA_USER")
     pw = os.getenv("ORA_PASSWORD")
@@ -18,18 +33,106 @@ def get_oracle_engine():
     if not (host and user and pw and svc):
         return None
 
-    url = f"oracle+oracledb://{user}:{pw}@{host}:{port}/?service_name={svc}"
+    return f"oracle+oracledb://{user}:{pw}@{host}:{port}/?service_name={svc}"
 
-    try:
-        eng = create_engine(url, pool_pre_ping=True)
-        _initialize_tables(eng)
-        return eng
-    except Exception:
+
+def get_engine(url: Optional[str] = None):
+    """
+    URL(기본: database_url())의 엔진을 돌려줍니다. 프로세스에서 처음 요청될 때만 엔진을 만들고
+    테이블을 초기화하며, 이후에는 같은 엔진(커넥션 풀)을 재사용합니다. 연결할 수 없으면 None.
+    """
+    url = url or database_url()
+    if not url:
         return None
 
+    eng = _engines.get(url)
+    if eng is not None:
+        return eng
+
+    with _engines_lock:
+        eng = _engines.get(url)
+        if eng is None:
+            try:
+                eng = _create_engine(url)
+                _initialize_tables(eng)
+            except Exception:
+                # 실패한 엔진은 등록하지 않음 (다음 호출에서 다시 시도)
+                return None
+            _engines[url] = eng
+    return eng
+
+
+def get_oracle_engine():
+    """설정된 데이터베이스(Oracle 또는 DTALKS_DATABASE_URL) 엔진. get_engine()과 같습니다."""
+    return get_engine()
+
+
+def dispose_engines():
+    """등록된 엔진의 커넥션 풀을 모두 닫고 레지스트리를 비웁니다 (테스트/종료용)."""
+    with _engines_lock:
+        for eng in _engines.values():
+            eng.dispose()
+        _engines.clear()
+
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # 메모리 DB는 커넥션마다 따로 생기므로 커넥션 하나를 모든 스레드가 공유
+            return create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                             pool_timeout=DB_POOL_TIMEOUT, connect_args={"check_same_thread": False})
+    return create_engine(url, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                         pool_recycle=DB_POOL_RECYCLE, pool_timeout=DB_POOL_TIMEOUT)
+
+
+_SQLITE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS IG_COMMENTS (
+      ID          INTEGER PRIMARY KEY,
+      SOURCE      TEXT DEFAULT 'instagram',
+      POST_ID     TEXT,
+      AUTHOR      TEXT,
+      COMMENT_AT  TEXT,
+      TEXT        TEXT,
+      META_JSON   TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS EVENTS (
+      ID           INTEGER PRIMARY KEY,
+      COMMENT_ID   INTEGER,
+      CREATED_AT   TEXT NOT NULL,
+      USER_ID      TEXT,
+      RAW_TEXT     TEXT,
+      SUGGESTION   TEXT,
+      SCORES_JSON  TEXT,
+      TOXICITY     REAL,
+      AGGRESSION   REAL,
+      HATE         REAL,
+      TEMP_C       REAL,
+      SEVERITY     TEXT,
+      SENT_CHOICE  TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS POST_AGGREGATES (
+      POST_ID     TEXT PRIMARY KEY,
+      STATE_JSON  TEXT,
+      UPDATED_AT  TEXT
+    )
+    """,
+)
+
 
 def _initialize_tables(engine):
-    """필요한 테이블들을 생성합니다."""
+    """필요한 테이블들을 생성합니다 (get_engine이 엔진마다 한 번 호출)."""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            for ddl in _SQLITE_DDL:
+                conn.exec_driver_sql(ddl)
+        return
+
     with engine.begin() as conn:
         # IG_COMMENTS 테이블 생성
         exists = conn.exec_driver_sql(
@@ -78,6 +181,23 @@ def _initialize_tables(engine):
             )
 
 
+        # POST_AGGREGATES 테이블 생성 (게시글 단위 온도/사유 집계 상태)
+        exists = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = 'POST_AGGREGATES'"
+        ).scalar()
+
+        if not exists:
+            conn.exec_driver_sql(
+                """
+                CREATE TABLE POST_AGGREGATES (
+                  POST_ID     VARCHAR2(64) PRIMARY KEY,
+                  STATE_JSON  CLOB CHECK (STATE_JSON IS JSON),
+                  UPDATED_AT  TIMESTAMP WITH TIME ZONE
+                )
+                """
+            )
+
+
 def get_post_list(engine) -> List[str]:
     """게시글 목록을 가져옵니다."""
     if engine is None:
@@ -96,7 +216,7 @@ def get_post_list(engine) -> List[str]:
     return list(posts)
 
 
-def get_comments_by_post(engine, post_id: str) -> List[Dict[str, Any]]:
+def get_comments_by_post(engine, post_id: str) -> List[Comment]:
     """특정 게시글의 댓글들을 가져옵니다."""
     if engine is None:
         return []
@@ -109,21 +229,23 @@ def get_comments_by_post(engine, post_id: str) -> List[Dict[str, Any]]:
             WHERE POST_ID = :pid
             ORDER BY comment_at ASC NULLS LAST, id ASC
             """
-        ), {"pid": post_id}).mappings().all()
+        ), {"pid": post_id}).all()
 
+    # 결과 키의 대소문자는 드라이버마다 다르므로 위치로 읽음
     return [
-        {
-            "id": r["ID"],
-            "author": r.get("AUTHOR", "?"),
-            "text": r.get("TEXT", ""),
-            "dt": r.get("COMMENT_AT")
-        }
+        Comment(
+            id=r[0],
+            author=r[1] if r[1] is not None else "?",
+            text=r[2] if r[2] is not None else "",
+            dt=_as_datetime(r[3]),
+            post_id=post_id,
+        )
         for r in rows
     ]
 
 
 def get_user_events(engine, user_id: str, start_date, end_date) -> pd.DataFrame:
-    """특정 사용자의 이벤트 데이터를 가져옵니다."""
+    """특정 사용자의 이벤트 데이터를 가져옵니다. 기간 경계는 시간대가 없으면 KST로 봅니다."""
     if engine is None:
         return pd.DataFrame()
 
@@ -133,6 +255,125 @@ def get_user_events(engine, user_id: str, start_date, end_date) -> pd.DataFrame:
             SELECT * FROM EVENTS
             WHERE CREATED_AT BETWEEN :s AND :e AND USER_ID = :uid
             """
-        ), conn, params={"s": start_date, "e": end_date, "uid": user_id})
+        ), conn, params={"s": _db_time(engine, start_date), "e": _db_time(engine, end_date), "uid": user_id})
+
+    # 드라이버마다 열 이름 대소문자가 다르므로 소문자로 맞춤 (iter_user_events와 같음)
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
+
+def iter_user_events(engine, user_id: str, start_date, end_date,
+                     chunksize: int = EVENTS_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    주간 리포트에 필요한 열만 chunksize 행씩 서버 측 커서로 읽어 반환합니다.
+    RAW_TEXT/SUGGESTION/SCORES_JSON CLOB은 읽지 않고 제안 여부만 has_suggestion으로 받습니다.
+    열 이름은 소문자이며 data_processor.stream_weekly_data에 그대로 넘기면 됩니다.
+    """
+    if engine is None:
+        return
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        chunks = pd.read_sql(text(
+            """
+            SELECT CREATED_AT AS created_at, USER_ID AS user_id,
+                   CASE WHEN SUGGESTION IS NULL THEN 0 ELSE 1 END AS has_suggestion,
+                   SENT_CHOICE AS sent_choice, HATE AS hate, AGGRESSION AS aggression, TEMP_C AS temp_c
+            FROM EVENTS
+            WHERE CREATED_AT BETWEEN :s AND :e AND USER_ID = :uid
+            """
+        ), conn, params={"s": _db_time(engine, start_date), "e": _db_time(engine, end_date), "uid": user_id},
+            chunksize=chunksize)
+        for chunk in chunks:
+            chunk.columns = [c.lower() for c in chunk.columns]
+            yield chunk
+
+
+def load_post_aggregate(engine, post_id: str) -> Optional[PostAggregate]:
+    """저장된 게시글 집계 상태를 불러옵니다. 없거나 읽을 수 없으면 None."""
+    if engine is None:
+        return None
+
+    try:
+        with engine.begin() as conn:
+            state = conn.execute(text(
+                "SELECT STATE_JSON FROM POST_AGGREGATES WHERE POST_ID = :pid"
+            ), {"pid": post_id}).scalar()
+        return PostAggregate.from_json(state) if state else None
+    except Exception:
+        return None
+
+
+def load_post_aggregate_stats(engine, since) -> List[Dict[str, Any]]:
+    """
+    since 이후 갱신된 게시글 집계의 (post_id, harmful, total, updated_at)만 읽습니다.
+    댓글을 다시 분석하지 않고 게시글 온도 순위 인덱스를 채울 때 사용합니다.
+    """
+    if engine is None:
+        return []
+
+    if engine.dialect.name == "sqlite":
+        harmful, total = "json_extract(STATE_JSON, '$.harmful')", "json_extract(STATE_JSON, '$.total')"
+    else:
+        harmful = "JSON_VALUE(STATE_JSON, '$.harmful' RETURNING NUMBER)"
+        total = "JSON_VALUE(STATE_JSON, '$.total' RETURNING NUMBER)"
+
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            f"""
+            SELECT POST_ID, {harmful}, {total}, UPDATED_AT
+            FROM POST_AGGREGATES
+            WHERE UPDATED_AT >= :since
+            """
+        ), {"since": _db_time(engine, since)}).all()
+
+    return [
+        {"post_id": r[0], "harmful": int(r[1] or 0), "total": int(r[2] or 0), "updated_at": _as_datetime(r[3])}
+        for r in rows
+    ]
+
+
+def save_post_aggregate(engine, aggregate: PostAggregate):
+    """게시글 집계 상태를 저장합니다 (POST_ID 기준 upsert)."""
+    if engine is None or aggregate.post_id is None:
+        return
+
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text(
+                """
+                INSERT INTO POST_AGGREGATES (POST_ID, STATE_JSON, UPDATED_AT) VALUES (:pid, :state, :now)
+                ON CONFLICT(POST_ID) DO UPDATE SET STATE_JSON = excluded.STATE_JSON, UPDATED_AT = excluded.UPDATED_AT
+                """
+            ), {"pid": aggregate.post_id, "state": aggregate.to_json(), "now": _db_time(engine, datetime.now(KST))})
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            """
+            MERGE INTO POST_AGGREGATES t
+            USING (SELECT :pid AS POST_ID FROM dual) s
+            ON (t.POST_ID = s.POST_ID)
+            WHEN MATCHED THEN UPDATE SET t.STATE_JSON = :state, t.UPDATED_AT = SYSTIMESTAMP
+            WHEN NOT MATCHED THEN INSERT (POST_ID, STATE_JSON, UPDATED_AT) VALUES (:pid, :state, SYSTIMESTAMP)
+            """
+        ), {"pid": aggregate.post_id, "state": aggregate.to_json()})
+
+
+def _db_time(engine, value):
+    """SQLite는 시각을 문자열로 비교하므로 UTC ISO 문자열로 맞춰 넘깁니다 (Oracle은 그대로)."""
+    if engine.dialect.name == "sqlite" and isinstance(value, datetime):
+        ts = pd.Timestamp(value)
+        ts = ts.tz_localize(KST) if ts.tzinfo is None else ts
+        return ts.tz_convert("UTC").isoformat(sep=" ")
+    return value
+
 
-    return df
\ No newline at end of file
+def _as_datetime(value):
+    """SQLite에서 문자열로 돌아온 시각을 datetime으로 바꿉니다."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
@@ -0,0 +1,103 @@
+# dedup.py
+# -*- coding: utf-8 -*-
+
+import zlib
+import numpy as np
+from typing import Dict, List
+
+from cache import normalize_text
+from config import DEDUP_THRESHOLD, DEDUP_SHINGLE_SIZE, DEDUP_BANDS, DEDUP_ROWS
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, k: int = DEDUP_SHINGLE_SIZE) -> set:
+    """정규화(공백 제거) 텍스트의 문자 k-gram 집합을 반환합니다."""
+    t = normalize_text(text).replace(" ", "").lower()
+    if len(t) <= k:
+        return {t}
+    return {t[i:i + k] for i in range(len(t) - k + 1)}
+
+
+class MinHasher:
+    """문자 shingle 집합의 MinHash 서명을 계산합니다."""
+
+    def __init__(self, num_perm: int = DEDUP_BANDS * DEDUP_ROWS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) & _MERSENNE_PRIME for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set)
+        )
+        # (a * x + b) mod p 의 최솟값 (a, x < 2^31 이므로 uint64 범위 내)
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """텍스트별 서명을 (len(texts), num_perm) 배열로 반환합니다."""
+        if not texts:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+        return np.stack([self.signature(shingles(t)) for t in texts])
+
+
+_default_hasher = MinHasher()
+
+
+def cluster_texts(texts: List[str], threshold: float = DEDUP_THRESHOLD,
+                  bands: int = DEDUP_BANDS, rows: int = DEDUP_ROWS) -> List[int]:
+    """
+    유사 중복 텍스트를 묶습니다 (MinHash + LSH 밴딩).
+
+    같은 밴드 버킷에 들어간 후보 쌍 중 추정 자카드 유사도가 threshold 이상인
+    쌍을 합칩니다.
+
+    Returns:
+        list: 텍스트별 대표 인덱스 (각 클러스터의 첫 번째 텍스트 위치)
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+
+    hasher = _default_hasher if bands * rows == _default_hasher.num_perm else MinHasher(bands * rows)
+    sigs = hasher.signatures(list(texts))
+
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for b in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, band in enumerate(sigs[:, b * rows:(b + 1) * rows]):
+            buckets.setdefault(band.tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            head = members[0]
+            for j in members[1:]:
+                ri, rj = find(head), find(j)
+                if ri == rj:
+                    continue
+                if float(np.mean(sigs[head] == sigs[j])) >= threshold:
+                    # 작은 인덱스를 대표로 유지
+                    if ri < rj:
+                        parent[rj] = ri
+                    else:
+                        parent[ri] = rj
+
+    return [find(i) for i in range(n)]
+
+
+def cluster_sizes(labels: List[int]) -> Dict[int, int]:
+    """대표 인덱스별 클러스터 크기를 반환합니다."""
+    sizes: Dict[int, int] = {}
+    for rep in labels:
+        sizes[rep] = sizes.get(rep, 0) + 1
+    return sizes
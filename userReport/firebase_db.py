@@ -5,7 +5,7 @@ import os
 import json
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import streamlit as st
 
 try:
@@ -17,7 +17,29 @@ except ImportError:
     FIREBASE_AVAILABLE = False
     st.error("Firebase Admin SDK가 설치되지 않았습니다. `pip install firebase-admin`을 실행하세요.")
 
-from config import KST
+from records import Comment, Event, to_frame
+from config import KST, EVENTS_CHUNK_SIZE
+
+
+def event_row(event_id: str, event_data: Dict[str, Any], user_id: str) -> Event:
+    """users/{user_id}/events 문서 하나를 EVENTS 행 형식의 레코드로 변환합니다 (to_frame으로 DataFrame 변환)."""
+    # Firestore Timestamp를 datetime으로 변환
+    created_at = event_data.get('createdAt')
+    if hasattr(created_at, 'seconds'):  # Firestore Timestamp
+        created_at = datetime.fromtimestamp(created_at.seconds, tz=KST)
+
+    return Event(
+        id=event_id,
+        created_at=created_at,
+        user_id=user_id,
+        raw_text=event_data.get('rawText', ''),
+        suggestion=event_data.get('suggestion', ''),
+        toxicity=event_data.get('toxicity', 0.0),
+        aggression=event_data.get('aggression', 0.0),
+        hate=event_data.get('hate', 0.0),
+        temp_c=event_data.get('tempC', 36.5),
+        sent_choice=event_data.get('sentChoice', '원문'),
+    )
 
 
 class FirebaseManager:
@@ -142,35 +164,46 @@ class FirebaseManager:
 
             events = events_ref.stream()
 
-            rows = []
-            for event in events:
-                event_data = event.to_dict()
-
-                # Firestore Timestamp를 datetime으로 변환
-                created_at = event_data.get('createdAt')
-                if hasattr(created_at, 'seconds'):  # Firestore Timestamp
-                    created_at = datetime.fromtimestamp(created_at.seconds, tz=KST)
-
-                rows.append({
-                    'id': event.id,
-                    'created_at': created_at,
-                    'user_id': user_id,
-                    'raw_text': event_data.get('rawText', ''),
-                    'suggestion': event_data.get('suggestion', ''),
-                    'toxicity': event_data.get('toxicity', 0.0),
-                    'aggression': event_data.get('aggression', 0.0),
-                    'hate': event_data.get('hate', 0.0),
-                    'temp_c': event_data.get('tempC', 36.5),
-                    'sent_choice': event_data.get('sentChoice', '원문'),
-                })
-
-            return pd.DataFrame(rows)
+            rows = [event_row(event.id, event.to_dict(), user_id) for event in events]
+            return to_frame(rows, Event)
 
         except Exception as e:
             st.error(f"이벤트 데이터 조회 실패: {str(e)}")
             return pd.DataFrame()
 
-    def get_user_comments(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    def iter_user_events(self, user_id: str, start_date: datetime, end_date: datetime,
+                         chunk_size: int = EVENTS_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        주간 리포트용 이벤트를 chunk_size개씩 페이지로 나눠 반환합니다.
+        리포트에 필요한 필드만 가져오며(rawText 제외), 한 번에 한 페이지만 메모리에 둡니다.
+        """
+        if not self.is_connected():
+            return
+
+        query = (self.db.collection('users')
+                 .document(user_id)
+                 .collection('events')
+                 .where('createdAt', '>=', start_date)
+                 .where('createdAt', '<=', end_date)
+                 .order_by('createdAt')
+                 .select(['createdAt', 'suggestion', 'sentChoice', 'hate', 'aggression', 'toxicity', 'tempC']))
+
+        last = None
+        while True:
+            try:
+                page = query.start_after(last) if last is not None else query
+                docs = list(page.limit(chunk_size).stream())
+            except Exception as e:
+                st.error(f"이벤트 데이터 조회 실패: {str(e)}")
+                return
+            if not docs:
+                return
+            yield to_frame([event_row(d.id, d.to_dict(), user_id) for d in docs], Event)
+            if len(docs) < chunk_size:
+                return
+            last = docs[-1]
+
+    def get_user_comments(self, user_id: str, limit: int = 50) -> List[Comment]:
         """특정 사용자의 최근 댓글들을 가져옵니다."""
         if not self.is_connected():
             return []
@@ -202,13 +235,13 @@ class FirebaseManager:
                 else:
                     created_at = datetime.now(KST)
 
-                comment_list.append({
-                    'id': comment.id,
-                    'author': user_id,
-                    'text': comment_data.get('text', ''),
-                    'dt': created_at,
-                    'post_id': comment_data.get('postId', 'unknown'),
-                })
+                comment_list.append(Comment(
+                    id=comment.id,
+                    author=user_id,
+                    text=comment_data.get('text', ''),
+                    dt=created_at,
+                    post_id=comment_data.get('postId', 'unknown'),
+                ))
 
             # 댓글이 없는 경우 시뮬레이션 데이터 생성
             if not comment_list:
@@ -221,26 +254,26 @@ class FirebaseManager:
                 ]
 
                 for i, text in enumerate(sample_comments):
-                    comment_list.append({
-                        'id': f'sample_{i}',
-                        'author': user_id,
-                        'text': text,
-                        'dt': datetime.now(KST),
-                        'post_id': 'sample_post',
-                    })
+                    comment_list.append(Comment(
+                        id=f'sample_{i}',
+                        author=user_id,
+                        text=text,
+                        dt=datetime.now(KST),
+                        post_id='sample_post',
+                    ))
 
             return comment_list
 
         except Exception as e:
             st.error(f"댓글 데이터 조회 실패: {str(e)}")
             # 에러 발생 시에도 샘플 데이터 반환
-            return [{
-                'id': 'error_sample',
-                'author': user_id,
-                'text': f'Firebase 조회 중 오류 발생: {str(e)}',
-                'dt': datetime.now(KST),
-                'post_id': 'error_post',
-            }]
+            return [Comment(
+                id='error_sample',
+                author=user_id,
+                text=f'Firebase 조회 중 오류 발생: {str(e)}',
+                dt=datetime.now(KST),
+                post_id='error_post',
+            )]
 
     def update_user_stats(self, user_id: str, rewriting_count: int = None, rewrite_accept: int = None):
         """사용자의 리라이팅 통계를 업데이트합니다."""
@@ -0,0 +1,159 @@
+# hll.py
+# -*- coding: utf-8 -*-
+"""
+작성자 수 추정용 HyperLogLog 스케치.
+
+작성자 id를 모두 들고 있지 않고 2^HLL_PRECISION개 레지스터(1바이트씩, 기본 4KB)만으로
+서로 다른 작성자 수를 상대 표준오차 1.04/√m(기본 약 1.6%)로 추정합니다.
+레지스터별 최댓값으로 병합하므로 게시글/날짜 스케치를 합쳐도 같은 작성자가 두 번 세지지 않고,
+같은 댓글을 다시 더해도 값이 바뀌지 않습니다. 제거는 지원하지 않습니다.
+
+    sketch = AuthorSketch().add(authors, harmful)
+    sketch.counts()  # {"authors": 57, "harmful_authors": 12, "error": 0.016}
+"""
+
+import base64
+import hashlib
+import numpy as np
+from datetime import date
+from typing import Any, Dict, Iterable, Optional
+
+from config import HLL_PRECISION
+
+
+def hash64(values: Iterable[Any]) -> np.ndarray:
+    """문자열로 바꾼 값의 64비트 해시 (프로세스와 무관하게 같은 값이므로 저장된 스케치와 병합 가능)."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(v).encode("utf-8"), digest_size=8).digest(), "little") for v in values),
+        dtype=np.uint64,
+    )
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """uint64 배열의 비트 길이 (0은 0)."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for s in (32, 16, 8, 4, 2, 1):
+        big = x >= np.uint64(1 << s)
+        n[big] += s
+        x[big] >>= np.uint64(s)
+    return n + (x > 0)
+
+
+class HyperLogLog:
+    """서로 다른 값의 수를 추정하는 HyperLogLog (64비트 해시, 레지스터 m = 2^p)."""
+
+    def __init__(self, p: int = HLL_PRECISION):
+        self.p = int(p)
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, values: Iterable[Any]) -> "HyperLogLog":
+        return self.add_hashes(hash64(values))
+
+    def add_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """hash64 결과를 더합니다 (같은 해시를 여러 스케치에 나눠 넣을 때 해시를 한 번만 계산)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return self
+        q = 64 - self.p
+        idx = (hashes >> np.uint64(q)).astype(np.int64)
+        rest = hashes & np.uint64((1 << q) - 1)
+        rank = (q - _bit_length(rest) + 1).astype(np.uint8)  # 남은 비트의 앞자리 0 개수 + 1
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError(f"HyperLogLog precision mismatch: {self.p} != {other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self) -> float:
+        """추정치의 상대 표준오차 1.04/√m."""
+        return 1.04 / self.m ** 0.5
+
+    def count(self) -> int:
+        """서로 다른 값의 추정 개수 (작은 범위는 linear counting으로 보정)."""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """채워진 레지스터가 적으면 (번호, 값) 목록, 많으면 전체 레지스터를 base64로 담습니다."""
+        nz = np.flatnonzero(self.registers)
+        if len(nz) * 3 < self.m:
+            return {"p": self.p, "idx": nz.tolist(), "rank": self.registers[nz].tolist()}
+        return {"p": self.p, "dense": base64.b64encode(self.registers.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        hll = cls(int(data.get("p", HLL_PRECISION)))
+        if "dense" in data:
+            hll.registers = np.frombuffer(base64.b64decode(data["dense"]), dtype=np.uint8).copy()
+        elif data.get("idx"):
+            hll.registers[np.asarray(data["idx"], dtype=np.int64)] = data["rank"]
+        return hll
+
+
+class AuthorSketch:
+    """전체 작성자와 유해 댓글 작성자의 HyperLogLog 쌍."""
+
+    def __init__(self, p: int = HLL_PRECISION):
+        self.authors = HyperLogLog(p)
+        self.harmful_authors = HyperLogLog(p)
+
+    def add(self, authors: Iterable[Any], harmful=None) -> "AuthorSketch":
+        """작성자 목록 (n,)과 댓글별 유해 여부 (n,)를 더합니다 (harmful이 없으면 전체 작성자에만)."""
+        return self.add_hashes(hash64(authors), harmful)
+
+    def add_hashes(self, hashes: np.ndarray, harmful=None) -> "AuthorSketch":
+        self.authors.add_hashes(hashes)
+        if harmful is not None:
+            self.harmful_authors.add_hashes(np.asarray(hashes)[np.asarray(harmful, dtype=bool)])
+        return self
+
+    def merge(self, other: "AuthorSketch") -> "AuthorSketch":
+        self.authors.merge(other.authors)
+        self.harmful_authors.merge(other.harmful_authors)
+        return self
+
+    def counts(self) -> Dict[str, Any]:
+        """{"authors": 추정 작성자 수, "harmful_authors": 추정 유해 작성자 수, "error": 상대 표준오차}"""
+        return {
+            "authors": self.authors.count(),
+            "harmful_authors": self.harmful_authors.count(),
+            "error": self.authors.relative_error,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"authors": self.authors.to_dict(), "harmful_authors": self.harmful_authors.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AuthorSketch":
+        sketch = cls()
+        sketch.authors = HyperLogLog.from_dict(data.get("authors") or {})
+        sketch.harmful_authors = HyperLogLog.from_dict(data.get("harmful_authors") or {})
+        return sketch
+
+
+def merge_days(daily_maps: Iterable[Dict[date, AuthorSketch]], first_day: date,
+               last_day: date) -> Optional[AuthorSketch]:
+    """
+    여러 게시글의 {날짜: AuthorSketch}에서 [first_day, last_day] 날짜만 합칩니다.
+    해당 기간 스케치가 하나도 없으면 None.
+    """
+    merged = None
+    for daily in daily_maps:
+        for day, sketch in daily.items():
+            if first_day <= day <= last_day:
+                merged = (merged or AuthorSketch(sketch.authors.p)).merge(sketch)
+    return merged
@@ -0,0 +1,115 @@
+# hot_posts.py
+# -*- coding: utf-8 -*-
+"""
+게시글 온도 순위 인덱스 (관리자용 "지금 가장 뜨거운 게시글").
+
+게시글 집계가 갱신될 때마다 (온도, 유해 비율, 갱신 시각) 항목을 힙에 넣고, 예전 항목은
+지우지 않고 무시합니다(지연 삭제). 조회는 힙 배열을 루트부터 최선 우선으로 훑어
+"최근 H시간 안에 갱신된 상위 k개"를 O(k log k)(+ 건너뛴 항목 수)로 돌려줍니다.
+살아 있는 게시글은 HOT_POSTS_CAPACITY개까지만 유지하고 넘치면 가장 차가운 게시글부터 버립니다.
+
+    hot_posts.update_from_aggregate(aggregate)   # process_comments가 호출
+    hot_posts.top(20, hours=24)                  # [{"post_id", "post_temp", "harm_rate", ...}, ...]
+"""
+
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import post_temp_from_rate
+from config import KST, HOT_POSTS_CAPACITY
+
+# 힙 항목: (-온도, -유해 비율, -갱신 시각(초), 순번, post_id) — 작을수록 뜨거움
+_Entry = Tuple[float, float, float, int, str]
+
+
+class HotPostIndex:
+    """게시글 온도/유해 비율 기준 상위 k개 조회용 지연 삭제 힙."""
+
+    def __init__(self, capacity: int = HOT_POSTS_CAPACITY):
+        self.capacity = int(capacity)
+        self._heap: List[_Entry] = []
+        self._live: Dict[str, _Entry] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, post_id) -> bool:
+        return str(post_id) in self._live
+
+    def update(self, post_id: str, harmful: int, total: int, updated_at: Optional[datetime] = None):
+        """게시글의 현재 유해/전체 댓글 수를 반영합니다 (O(log n))."""
+        post_id = str(post_id)
+        updated_at = updated_at or datetime.now(KST)
+        harm_rate = harmful / total if total else 0.0
+        post_temp = post_temp_from_rate(harm_rate)
+        entry = (-post_temp, -harm_rate, -updated_at.timestamp(), next(self._seq), post_id)
+        with self._lock:
+            heapq.heappush(self._heap, entry)
+            self._live[post_id] = entry
+            self._stats[post_id] = {
+                "post_id": post_id,
+                "post_temp": post_temp,
+                "harm_rate": harm_rate,
+                "harmful": int(harmful),
+                "total": int(total),
+                "updated_at": updated_at,
+            }
+            if len(self._heap) > 2 * self.capacity:
+                self._compact()
+
+    def update_from_aggregate(self, aggregate, updated_at: Optional[datetime] = None):
+        """PostAggregate(post_id, harmful, total)로 갱신합니다. post_id가 없으면 무시합니다."""
+        if aggregate.post_id is not None:
+            self.update(aggregate.post_id, aggregate.harmful, aggregate.total, updated_at)
+
+    def remove(self, post_id: str) -> bool:
+        with self._lock:
+            self._stats.pop(str(post_id), None)
+            return self._live.pop(str(post_id), None) is not None
+
+    def _compact(self):
+        """지난 항목을 버리고, 살아 있는 게시글이 capacity를 넘으면 가장 뜨거운 capacity개만 남깁니다."""
+        live = list(self._live.values())
+        if len(live) > self.capacity:
+            live = heapq.nsmallest(self.capacity, live)
+            kept = {e[-1] for e in live}
+            for post_id in [p for p in self._live if p not in kept]:
+                del self._live[post_id]
+                del self._stats[post_id]
+        heapq.heapify(live)
+        self._heap = live
+
+    def top(self, k: int = 20, hours: Optional[float] = None, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        가장 뜨거운 게시글 k개 (온도 → 유해 비율 → 최근 갱신 순).
+
+        Args:
+            hours: 주어지면 최근 hours시간 안에 갱신된 게시글만
+        """
+        cutoff = float("-inf")
+        if hours is not None:
+            cutoff = ((now or datetime.now(KST)) - timedelta(hours=hours)).timestamp()
+
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            heap = self._heap
+            # 힙 배열을 루트부터 최선 우선 탐색: 부모가 자식보다 항상 뜨거우므로 꺼낸 순서가 곧 순위
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(out) < k:
+                entry, i = heapq.heappop(frontier)
+                if self._live.get(entry[-1]) is entry and -entry[2] >= cutoff:
+                    out.append(dict(self._stats[entry[-1]]))
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+        return out
+
+
+# 프로세스 전역 인덱스 (Streamlit 세션 간 공유)
+hot_posts = HotPostIndex()
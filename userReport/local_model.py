@@ -0,0 +1,248 @@
+# local_model.py
+# -*- coding: utf-8 -*-
+"""
+CPU 전용 로컬 유해성 모델 (문자 n-gram 해싱 + 희소 로지스틱 회귀).
+
+    python local_model.py train labeled.jsonl --out local_model.npz
+    python local_model.py predict "댓글 내용"
+
+학습 데이터(JSONL) 한 줄 예시:
+    {"text": "...", "toxicity": 1, "hate": 0, "aggression": 1, "demean": 0}
+toxicity 대신 "label"을 써도 되며, 없는 항목은 학습에서 제외(마스킹)됩니다.
+
+가중치 파일과 학습 데이터는 저장소에 포함되어 있지 않습니다. 학습해서 LOCAL_MODEL_PATH에 두기 전까지
+get_local_model()은 None이고 대체 경로는 시뮬레이션을 사용합니다.
+"""
+
+import os
+import sys
+import json
+import zlib
+import argparse
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+from cache import normalize_text
+from config import LOCAL_MODEL_PATH, LOCAL_MODEL_FEATURES, LOCAL_MODEL_NGRAMS
+
+HEADS = ("toxicity", "hate", "aggression", "demean")
+MODEL_VERSION = 1
+
+
+class HashingVectorizer:
+    """문자 n-gram을 고정 크기 해시 공간의 희소 벡터(CSR)로 변환합니다."""
+
+    def __init__(self, n_features: int = LOCAL_MODEL_FEATURES, ngram_range: Tuple[int, int] = LOCAL_MODEL_NGRAMS):
+        self.n_features = int(n_features)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+
+    def _features(self, text: str) -> Tuple[List[int], List[float]]:
+        t = f" {normalize_text(text).lower()} "
+        counts = {}
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            for i in range(len(t) - n + 1):
+                h = zlib.crc32(t[i:i + n].encode("utf-8"))
+                # 하위 비트는 버킷, 최상위 비트는 부호 (해시 충돌 상쇄)
+                idx = h % self.n_features
+                sign = 1.0 if h & 0x80000000 else -1.0
+                counts[idx] = counts.get(idx, 0.0) + sign
+        return list(counts.keys()), list(counts.values())
+
+    def transform(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            tuple: (indptr, indices, data) — 행별 L2 정규화된 CSR 배열
+        """
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            idx, val = self._features(text)
+            indices.extend(idx)
+            data.extend(val)
+            indptr.append(len(indices))
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(data, dtype=np.float32)
+
+        # 행별 L2 정규화
+        rows = _row_ids(indptr)
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(indptr) - 1))
+        norms[norms == 0] = 1.0
+        data = (data / norms[rows]).astype(np.float32)
+        return indptr, indices, data
+
+
+def _row_ids(indptr: np.ndarray) -> np.ndarray:
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+class LocalToxicityModel:
+    """해싱 특징 위의 다중 출력(toxicity/hate/aggression/demean) 로지스틱 회귀."""
+
+    def __init__(self, vectorizer: Optional[HashingVectorizer] = None,
+                 weights: Optional[np.ndarray] = None, bias: Optional[np.ndarray] = None,
+                 trained: Optional[np.ndarray] = None):
+        self.vectorizer = vectorizer or HashingVectorizer()
+        n = self.vectorizer.n_features
+        self.weights = weights if weights is not None else np.zeros((n, len(HEADS)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(HEADS), dtype=np.float32)
+        # 라벨이 한 번도 없었던 출력은 예측 시 0으로 둡니다
+        self.trained = trained if trained is not None else np.zeros(len(HEADS), dtype=bool)
+
+    def _logits(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> np.ndarray:
+        n_rows = len(indptr) - 1
+        rows = _row_ids(indptr)
+        contrib = self.weights[indices] * data[:, None]
+        out = np.stack([np.bincount(rows, weights=contrib[:, k], minlength=n_rows) for k in range(len(HEADS))],
+                       axis=1) if n_rows else np.zeros((0, len(HEADS)))
+        return out.astype(np.float32) + self.bias
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """텍스트별 (toxicity, hate, aggression, demean) 확률을 (n, 4) 배열로 반환합니다."""
+        if not texts:
+            return np.zeros((0, len(HEADS)), dtype=np.float32)
+        probs = _sigmoid(self._logits(*self.vectorizer.transform(texts)))
+        probs[:, ~self.trained] = 0.0
+        return probs
+
+    def fit(self, texts: List[str], labels: np.ndarray, epochs: int = 10, lr: float = 0.2,
+            l2: float = 1e-6, batch_size: int = 256, seed: int = 0, verbose: bool = False):
+        """
+        미니배치 경사하강법으로 학습합니다.
+
+        Args:
+            labels: (n, 4) 배열, 값은 0-1, 라벨이 없는 칸은 NaN
+        """
+        labels = np.asarray(labels, dtype=np.float32)
+        mask = ~np.isnan(labels)
+        self.trained = self.trained | mask.any(axis=0)
+        targets = np.nan_to_num(labels)
+        indptr, indices, data = self.vectorizer.transform(texts)
+        rng = np.random.default_rng(seed)
+        n = len(texts)
+
+        for epoch in range(epochs):
+            order = rng.permutation(n)
+            loss_sum = 0.0
+            for start in range(0, n, batch_size):
+                rows = order[start:start + batch_size]
+                # 배치 CSR 조립
+                lens = indptr[rows + 1] - indptr[rows]
+                b_indptr = np.concatenate([[0], np.cumsum(lens)])
+                take = np.concatenate([np.arange(indptr[r], indptr[r + 1]) for r in rows]) if len(rows) else []
+                b_idx, b_val = indices[take], data[take]
+
+                p = _sigmoid(self._logits(b_indptr, b_idx, b_val))
+                m = mask[rows]
+                err = (p - targets[rows]) * m
+                loss_sum += float(-(m * (targets[rows] * np.log(p + 1e-7)
+                                         + (1 - targets[rows]) * np.log(1 - p + 1e-7))).sum())
+
+                grad = err[_row_ids(b_indptr)] * b_val[:, None]
+                if l2:
+                    self.weights[b_idx] *= (1.0 - lr * l2)
+                np.add.at(self.weights, b_idx, -lr * grad)
+                self.bias -= lr * err.mean(axis=0)
+
+            if verbose:
+                print(f"epoch {epoch + 1}/{epochs}  loss={loss_sum / max(mask.sum(), 1):.4f}", file=sys.stderr)
+        return self
+
+    def save(self, path: str = LOCAL_MODEL_PATH):
+        """가중치를 .npz 파일로 저장합니다."""
+        np.savez(
+            path,
+            version=np.int64(MODEL_VERSION),
+            n_features=np.int64(self.vectorizer.n_features),
+            ngram_range=np.asarray(self.vectorizer.ngram_range, dtype=np.int64),
+            weights=self.weights.astype(np.float32),
+            bias=self.bias.astype(np.float32),
+            trained=self.trained.astype(bool),
+        )
+
+    @classmethod
+    def load(cls, path: str = LOCAL_MODEL_PATH) -> "LocalToxicityModel":
+        """저장된 가중치를 불러옵니다."""
+        with np.load(path) as f:
+            if int(f["version"]) != MODEL_VERSION:
+                raise ValueError(f"unsupported local model version: {int(f['version'])}")
+            vec = HashingVectorizer(int(f["n_features"]), tuple(int(x) for x in f["ngram_range"]))
+            return cls(vec, f["weights"].copy(), f["bias"].copy(), f["trained"].copy())
+
+
+_loaded_model = None
+_load_attempted = False
+
+
+def get_local_model() -> Optional[LocalToxicityModel]:
+    """LOCAL_MODEL_PATH의 모델을 한 번만 불러옵니다. 파일이 없으면 None."""
+    global _loaded_model, _load_attempted
+    if not _load_attempted:
+        _load_attempted = True
+        try:
+            if os.path.exists(LOCAL_MODEL_PATH):
+                _loaded_model = LocalToxicityModel.load(LOCAL_MODEL_PATH)
+        except Exception:
+            _loaded_model = None
+    return _loaded_model
+
+
+def read_labeled_jsonl(path: str) -> Tuple[List[str], np.ndarray]:
+    """라벨링된 JSONL을 읽어 (텍스트 목록, (n, 4) 라벨 배열)을 반환합니다."""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if "toxicity" not in row and "label" in row:
+                row["toxicity"] = row["label"]
+            texts.append(str(row.get("text", "")))
+            labels.append([float(row[h]) if row.get(h) is not None else np.nan for h in HEADS])
+    return texts, np.asarray(labels, dtype=np.float32).reshape(len(texts), len(HEADS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 유해성 모델 학습/예측")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_train = sub.add_parser("train", help="라벨링된 JSONL로 학습(재학습)")
+    p_train.add_argument("data", help="학습 데이터 JSONL 경로")
+    p_train.add_argument("--out", default=LOCAL_MODEL_PATH, help="가중치 저장 경로")
+    p_train.add_argument("--epochs", type=int, default=10)
+    p_train.add_argument("--lr", type=float, default=0.2)
+    p_train.add_argument("--l2", type=float, default=1e-6)
+    p_train.add_argument("--refit", action="store_true", help="기존 가중치에서 이어서 학습")
+
+    p_pred = sub.add_parser("predict", help="텍스트 점수 출력")
+    p_pred.add_argument("texts", nargs="+")
+    p_pred.add_argument("--model", default=LOCAL_MODEL_PATH)
+
+    args = parser.parse_args()
+
+    if args.cmd == "train":
+        texts, labels = read_labeled_jsonl(args.data)
+        if args.refit and os.path.exists(args.out):
+            model = LocalToxicityModel.load(args.out)
+        else:
+            model = LocalToxicityModel()
+        model.fit(texts, labels, epochs=args.epochs, lr=args.lr, l2=args.l2, verbose=True)
+        model.save(args.out)
+        print(f"saved {args.out} ({len(texts)} examples)")
+    else:
+        model = LocalToxicityModel.load(args.model)
+        for text, scores in zip(args.texts, model.predict(args.texts)):
+            print(json.dumps({"text": text, **{h: round(float(s), 4) for h, s in zip(HEADS, scores)}},
+                             ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,21 @@ import streamlit as st
 from datetime import datetime, timedelta
 
 # 로컬 모듈 임포트
-from config import KST, DEFAULT_CAUTION_TEMP, DEFAULT_WARN_TEMP, BLUR_THRESHOLD
+from config import (KST, DEFAULT_CAUTION_TEMP, DEFAULT_WARN_TEMP, BLUR_THRESHOLD, ANALYSIS_DEADLINE, REPORT_WINDOWS,
+                    HOT_POSTS_WINDOWS)
 from firebase_db import get_firebase_manager
 from simulation import generate_simulation_comments, generate_weekly_events
-from data_processor import process_comments, process_weekly_data
+from data_processor import process_comments
+from database import get_engine, load_post_aggregate, load_post_aggregate_stats, save_post_aggregate
+from post_aggregate import PostAggregate
+from temp_histogram import TempHistogram
+from hll import merge_days
+from hot_posts import hot_posts
+from raid_detector import raid_detector, RAID_STARTED
+from rollup import FirestoreRollupStore
+from timebuckets import chart_granularity, report_from_events, window_report
+from analyzer import stream_suggestion
+from resilience import CLOSED, Deadline, moderation_breaker
 from components import (
     thermo_icon, thermometer_3d, ig_post_card, reason_chips,
     blur_block, firebase_kpi_table
@@ -91,6 +102,38 @@ def load_post_data(source: str, engine, firebase_user_id: str = None):
     return items, selected_post
 
 
+# 위젯 변경 시 해당 블록만 다시 실행 (Streamlit 1.37+ st.fragment, 1.33+ experimental_fragment)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+
+@_fragment
+def render_threshold_what_if(hist: TempHistogram, key: str, unit: str = "댓글", show_post_temp: bool = True):
+    """온도 히스토그램으로 임의의 (주의, 경고) 임계값 결과를 재분석 없이 보여줍니다."""
+    with st.expander("🎚️ 임계값 what-if (재분석 없이 즉시 계산)"):
+        c1, c2 = st.columns(2)
+        caution = c1.slider("주의 임계(°C)", 37.5, 39.0, float(st.session_state.get("caution_c", DEFAULT_CAUTION_TEMP)),
+                            0.1, key=f"whatif-caution-{key}")
+        warn = c2.slider("경고 임계(°C)", 38.5, 40.0, float(st.session_state.get("warn_c", DEFAULT_WARN_TEMP)),
+                         0.1, key=f"whatif-warn-{key}")
+        r = hist.what_if(caution, warn)
+
+        cols = st.columns(4 if show_post_temp else 3)
+        cols[0].metric(f"유해 {unit}", f"{r['harmful']} / {r['total']}")
+        cols[1].metric("경고", r["badges"]["경고"])
+        cols[2].metric("주의", r["badges"]["주의"])
+        if show_post_temp:
+            cols[3].metric("게시글 온도", f"{r['post_temp']:.2f}°C")
+        st.caption(f"유해 비율 {r['harm_rate'] * 100:.1f}% · 온도 구간 {len(hist)}개 {unit} 기준")
+
+
+def get_post_aggregate(engine, post_id: str) -> PostAggregate:
+    """세션에 캐시된(없으면 DB에 저장된) 게시글 집계 상태를 가져옵니다."""
+    aggregates = st.session_state.setdefault("post_aggregates", {})
+    if post_id not in aggregates:
+        aggregates[post_id] = load_post_aggregate(engine, post_id) or PostAggregate(post_id)
+    return aggregates[post_id]
+
+
 def render_post_protection_tab(source: str, engine, firebase_user_id: str, icon_mode: bool, thermo_size: int,
                                thermo_h: int):
     """게시글 보호 모드 탭을 렌더링합니다."""
@@ -129,11 +172,21 @@ def render_post_protection_tab(source: str, engine, firebase_user_id: str, icon_
         return
 
     # 댓글 전수 분석
-    results, norm_reasons, post_temp, harmful_cnt = process_comments(items)
+    aggregate = get_post_aggregate(engine, selected_post)
+    results, norm_reasons, post_temp, harmful_cnt = process_comments(items, aggregate=aggregate)
+    try:
+        save_post_aggregate(engine, aggregate)
+    except Exception:
+        pass
+    if moderation_breaker.state != CLOSED:
+        st.caption(":orange[분석 API 응답이 불안정해 일부 댓글은 로컬 분석 결과로 표시됩니다.]")
 
     # 게시글 상단 카드
     st.subheader(f"게시글: {selected_post}")
-    blur_post = post_temp >= BLUR_THRESHOLD
+    # 유해 댓글이 갑자기 몰리면(레이드) 누적 온도가 임계에 닿기 전에도 보호 모드
+    raid_detector.sweep()
+    raiding = raid_detector.is_active(selected_post)
+    blur_post = post_temp >= BLUR_THRESHOLD or raiding
 
     c1, c2 = st.columns([2, 1])
     with c1:
@@ -148,7 +201,8 @@ def render_post_protection_tab(source: str, engine, firebase_user_id: str, icon_
         )
 
         if blur_post and not show:
-            st.info("보호 모드 적용됨 · 유해온도 39°C 이상. '게시글 보기'를 끄면 원문을 볼 수 있습니다.")
+            reason = "유해 댓글 급증 감지" if raiding and post_temp < BLUR_THRESHOLD else f"유해온도 {BLUR_THRESHOLD:.0f}°C 이상"
+            st.info(f"보호 모드 적용됨 · {reason}. '게시글 보기'를 끄면 원문을 볼 수 있습니다.")
 
     with c2:
         if icon_mode:
@@ -163,6 +217,20 @@ def render_post_protection_tab(source: str, engine, firebase_user_id: str, icon_
         reason_chips(norm_reasons)
         st.markdown(f":gray[유해 댓글 {harmful_cnt} / 전체 {len(items)}]")
 
+        # 서로 다른 작성자 수 (HyperLogLog 추정) — 유해 작성자가 많으면 여러 계정이 몰린 신호
+        authors = aggregate.authors.counts()
+        st.markdown(f":gray[유해 작성자 약 {authors['harmful_authors']}명 / 전체 작성자 약 {authors['authors']}명 "
+                    f"(±{authors['error'] * 100:.1f}%)]")
+
+        # 레이드 시작/종료 기록
+        for e in raid_detector.recent_events(selected_post, limit=3):
+            label = ":red[레이드 시작]" if e["type"] == RAID_STARTED else ":green[레이드 종료]"
+            st.caption(f"{label} · {e['at'].strftime('%m-%d %H:%M')} · 최근 유해 비율 {e['harm_rate'] * 100:.0f}% "
+                       f"· 분당 {e['arrivals_per_min']:.1f}개")
+
+    if aggregate.histogram is not None:
+        render_threshold_what_if(aggregate.histogram, key=str(selected_post))
+
     st.divider()
 
     # 댓글 목록 표시
@@ -175,25 +243,63 @@ def render_post_protection_tab(source: str, engine, firebase_user_id: str, icon_
             elif r.get("badge") == "주의":
                 sev_tag = " · :orange[주의]"
 
-            st.markdown(f"**@{r['author']}**{sev_tag} · :gray[{str(r['dt'])[:16]}]")
+            dup_tag = f" · :violet[유사 댓글 {r['cluster_size']}개]" if r.get("cluster_size", 1) > 1 else ""
+
+            st.markdown(f"**@{r['author']}**{sev_tag}{dup_tag} · :gray[{str(r['dt'])[:16]}]")
             st.write(r["text"])
+
+            # 유해 댓글은 순화 제안을 토큰 스트리밍으로 표시
+            if r.get("badge") and st.button("순화 제안 보기", key=f"suggest-{selected_post}-{r['id']}"):
+                st.write_stream(stream_suggestion(r["text"], Deadline(ANALYSIS_DEADLINE)))
             st.markdown("<hr style='border:none;height:1px;background:#eef2f7;margin:12px 0'>", unsafe_allow_html=True)
 
 
+def load_firebase_report(firebase_manager, user_id: str, start: datetime, end: datetime):
+    """
+    Firestore 일/주/월 롤업을 증분 갱신한 뒤 [start, end] 기간 리포트(KPI, 구간별 집계)를 만듭니다.
+    기간 양 끝의 부분 일은 원시 events로 보충합니다.
+    롤업을 쓸 수 없으면 None을 반환하고, 호출자는 원시 이벤트 경로로 넘어갑니다.
+
+    Returns:
+        tuple: (KPI, 구간별 집계, 기간 이벤트 온도 히스토그램) 또는 None
+    """
+    try:
+        store = FirestoreRollupStore(firebase_manager.db)
+        store.refresh(user_id)
+        kpi, series = window_report(
+            store, user_id, start, end,
+            edge_events=lambda s, e: firebase_manager.iter_user_events(user_id, s, e))
+        if not kpi:
+            return None
+        return kpi, series, store.read_histogram(user_id, start.date(), end.date())
+    except Exception:
+        return None
+
+
 def render_weekly_report_tab(source: str, firebase_user_id: str = None):
     """주간 리포트 탭을 렌더링합니다."""
+    window_days = st.selectbox("조회 기간", REPORT_WINDOWS, index=0, format_func=lambda d: f"최근 {d}일")
+    st.session_state.report_window = window_days
     end = datetime.now(KST)
-    start = end - timedelta(days=7)
+    start = end - timedelta(days=window_days)
+    granularity = chart_granularity(window_days)
 
     # Firebase 실제 데이터 변수 초기화
     firebase_suggested = 0
     firebase_accepted = 0
+    histogram = None
 
     # 데이터 수집
     if source == "Firebase":
         firebase_manager = get_firebase_manager()
         if firebase_manager.is_connected() and firebase_user_id:
-            df = firebase_manager.get_user_events(firebase_user_id, start, end)
+            # 롤업이 있으면 원시 events 대신 일/주/월 롤업으로, 없으면 events를 청크 단위로 읽어 집계
+            report = load_firebase_report(firebase_manager, firebase_user_id, start, end)
+            if report is not None:
+                kpi, daily, histogram = report
+            else:
+                kpi, daily = report_from_events(
+                    firebase_manager.iter_user_events(firebase_user_id, start, end), granularity)
 
             # Firebase 사용자 데이터에서 실제 통계 가져오기
             user_data = firebase_manager.get_user_data(firebase_user_id)
@@ -207,36 +313,41 @@ def render_weekly_report_tab(source: str, firebase_user_id: str = None):
                         f"**수락**: {firebase_accepted}")
 
             # 데이터 확인 및 디버깅
-            st.write(f"🔍 **7일간 events 조회 결과**: {len(df)}개 발견")
+            source_label = "롤업" if report is not None else "events"
+            st.write(f"🔍 **{window_days}일간 {source_label} 조회 결과**: {kpi.get('total', 0)}개 이벤트")
 
-            if df.empty:
-                st.warning("📊 7일간 events 데이터가 없어서 시뮬레이션 데이터로 주간 리포트를 생성합니다.")
+            if not kpi:
+                st.warning(f"📊 {window_days}일간 events 데이터가 없어서 시뮬레이션 데이터로 리포트를 생성합니다.")
                 st.info(f"조회 범위: {start.strftime('%Y-%m-%d')} ~ {end.strftime('%Y-%m-%d')}")
 
                 # 시뮬레이션 데이터로 대체 - 3개 인자 전달
                 df = generate_weekly_events(firebase_user_id, start, end)
+                kpi, daily = report_from_events([df], granularity)
+                histogram = TempHistogram.from_columns(df["temp_c"])
         else:
             st.info("Firebase 연결이 필요하거나 사용자를 선택해주세요.")
             return
     else:
         # 시뮬레이션 모드 - user_id 없이 기본값 사용, 3개 인자 전달
         df = generate_weekly_events("simulation_user", start, end)
+        kpi, daily = report_from_events([df], granularity)
+        histogram = TempHistogram.from_columns(df["temp_c"])
 
-    if df.empty:
+    if not kpi:
         st.info("데이터가 없습니다. '게시글 보기'에서 전송해 보거나 DB를 연결하세요.")
         return
 
-    # 데이터 처리
-    kpi, daily = process_weekly_data(df)
+    # 기간 온도 분위수 (kpi의 temp_p50/temp_p90/temp_p99)
+    temp_quantiles = {k[len("temp_"):]: v for k, v in kpi.items() if k.startswith("temp_p")}
 
     # Firebase 모드일 때는 실제 Firebase 데이터 사용, 다른 모드일 때는 기존 로직 사용
     if source == "Firebase" and firebase_user_id:
         # Firebase 실제 데이터로 KPI 테이블 표시
-        firebase_kpi_table(firebase_suggested, firebase_accepted)
+        firebase_kpi_table(firebase_suggested, firebase_accepted, temp_quantiles)
 
     else:
         # 기존 로직: 시뮬레이션 또는 DB 데이터 사용
-        firebase_kpi_table(kpi["total"], kpi["suggested"])
+        firebase_kpi_table(kpi["total"], kpi["suggested"], temp_quantiles)
 
     st.markdown("<div class='card'>", unsafe_allow_html=True)
 
@@ -253,6 +364,59 @@ def render_weekly_report_tab(source: str, firebase_user_id: str = None):
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # 기간 중 분석한 게시글들의 서로 다른 (유해) 작성자 수 — 게시글/날짜별 스케치를 병합
+    authors = merge_days((a.daily_authors for a in st.session_state.get("post_aggregates", {}).values()),
+                         start.date(), end.date())
+    if authors is not None:
+        counts = authors.counts()
+        c1, c2 = st.columns(2)
+        c1.metric("유해 댓글 작성자 (추정)", f"{counts['harmful_authors']}명")
+        c2.metric("전체 댓글 작성자 (추정)", f"{counts['authors']}명")
+        st.caption(f"분석한 게시글 댓글 기준 · HyperLogLog 추정 (상대 오차 약 ±{counts['error'] * 100:.1f}%)")
+
+    # 기간 이벤트의 온도 분포로 임계값 조정 결과 미리보기
+    if histogram is not None and len(histogram):
+        render_threshold_what_if(histogram, key=f"report-{firebase_user_id}-{window_days}",
+                                 unit="이벤트", show_post_temp=False)
+
+
+def render_hot_posts_admin(engine):
+    """관리자용: 최근 갱신된 게시글을 온도(→ 유해 비율) 높은 순으로 보여줍니다."""
+    st.subheader("🔥 주의가 필요한 게시글")
+    c1, c2 = st.columns(2)
+    k = c1.number_input("표시 개수", min_value=5, max_value=100, value=20, step=5)
+    hours = c2.selectbox("갱신 기간", HOT_POSTS_WINDOWS, index=HOT_POSTS_WINDOWS.index(24),
+                         format_func=lambda h: f"최근 {h}시간")
+
+    # 세션 처음에는 저장된 게시글 집계로 순위를 채움 (댓글 재분석 없음)
+    if engine is not None and not st.session_state.get("hot_posts_seeded"):
+        try:
+            since = datetime.now(KST) - timedelta(hours=max(HOT_POSTS_WINDOWS))
+            for row in load_post_aggregate_stats(engine, since):
+                updated_at = row["updated_at"]
+                if updated_at is not None and updated_at.tzinfo is None:
+                    updated_at = updated_at.replace(tzinfo=KST)
+                hot_posts.update(row["post_id"], row["harmful"], row["total"], updated_at)
+        except Exception:
+            pass
+        st.session_state.hot_posts_seeded = True
+
+    rows = hot_posts.top(int(k), hours=hours)
+    if not rows:
+        st.info("해당 기간에 분석된 게시글이 없습니다.")
+        return
+
+    st.dataframe(
+        [{
+            "게시글": r["post_id"],
+            "온도(°C)": r["post_temp"],
+            "유해 비율(%)": round(r["harm_rate"] * 100, 1),
+            "유해/전체 댓글": f"{r['harmful']} / {r['total']}",
+            "갱신": r["updated_at"].astimezone(KST).strftime("%Y-%m-%d %H:%M"),
+        } for r in rows],
+        use_container_width=True, hide_index=True,
+    )
+
 
 def main():
     """메인 애플리케이션을 실행합니다."""
@@ -267,7 +431,14 @@ def main():
     # 주간 리포트 직접 렌더링 (탭 없이)
     render_weekly_report_tab(source, firebase_user_id)
 
-    st.caption("ⓘ 주간 리포트는 총 작성 수, 리라이팅 제안/수락/수락률, 7일간 혐오·조롱 표현율만 표시합니다.")
+    # 관리자 보기: 게시글 온도 순위
+    if st.sidebar.toggle("관리자 보기", value=False, help="최근 분석된 게시글 중 온도가 높은 순으로 보여줍니다."):
+        # 엔진은 프로세스에서 한 번만 만들고 테이블도 그때 한 번만 확인 (렌더링마다 연결/DDL 조회 없음)
+        st.divider()
+        render_hot_posts_admin(get_engine())
+
+    window_days = st.session_state.get("report_window", REPORT_WINDOWS[0])
+    st.caption(f"ⓘ 리포트는 총 작성 수, 리라이팅 제안/수락/수락률, 최근 {window_days}일간 혐오·조롱 표현율만 표시합니다.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+# post_aggregate.py
+# -*- coding: utf-8 -*-
+
+import json
+import numpy as np
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from hll import AuthorSketch, hash64
+from config import MIN_TEMP, DEFAULT_CAUTION_TEMP
+
+REASON_KEYS = ("혐오", "조롱/모욕", "비하")
+
+# 댓글 한 개의 기여분: (유해 여부, 혐오, 조롱/모욕, 비하) — 유해가 아니면 사유는 0
+Contribution = Tuple[bool, float, float, float]
+_ZERO: Contribution = (False, 0.0, 0.0, 0.0)
+
+
+def comment_contribution(comment) -> Contribution:
+    """분석된 댓글(AnalyzedComment 또는 {"harmful", "reasons", ...})이 게시글 집계에 더하는 값을 계산합니다."""
+    if not comment.get("harmful"):
+        return _ZERO
+    scores = getattr(comment, "reason_scores", None)
+    if scores is not None:
+        return (True,) + tuple(float(s) for s in scores)
+    r = comment.get("reasons") or {}
+    return (True,) + tuple(float(r.get(k, 0.0)) for k in REASON_KEYS)
+
+
+class PostAggregate:
+    """
+    게시글 단위 온도/사유 집계 상태.
+
+    전체 댓글 수, 유해 댓글 수, 유해 댓글의 사유 합계와 댓글별 기여분을 들고 있어
+    댓글 추가/삭제/재채점을 O(1)로 반영합니다. to_json()/from_json()으로 게시글 옆에 저장합니다.
+    유해 여부는 caution 임계값 기준이므로 임계값이 바뀌면 다시 만들어야 합니다.
+    histogram(TempHistogram)이 있으면 다른 임계값에서의 값은 다시 만들지 않고 what_if로 조회합니다.
+    authors / daily_authors(AuthorSketch)는 게시글 전체와 KST 날짜별 서로 다른 (유해) 작성자 수 추정치입니다.
+    """
+
+    VERSION = 1
+
+    def __init__(self, post_id: Optional[str] = None, caution: float = DEFAULT_CAUTION_TEMP):
+        self.post_id = post_id
+        self.caution = float(caution)
+        self.total = 0
+        self.harmful = 0
+        self.reason_sums = [0.0, 0.0, 0.0]
+        self._members: Dict[str, Contribution] = {}
+        self.histogram = None  # TempHistogram (process_comments가 채움)
+        self.authors = AuthorSketch()
+        self.daily_authors: Dict[date, AuthorSketch] = {}
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __contains__(self, comment_id) -> bool:
+        return str(comment_id) in self._members
+
+    @property
+    def comment_ids(self) -> Iterable[str]:
+        return self._members.keys()
+
+    def _apply(self, contrib: Contribution, sign: int):
+        if contrib[0]:
+            self.harmful += sign
+            for k in range(len(REASON_KEYS)):
+                self.reason_sums[k] += sign * contrib[k + 1]
+            if self.harmful == 0:
+                # 부동소수점 오차가 남지 않도록 유해 댓글이 없어지면 합계를 0으로 되돌림
+                self.reason_sums = [0.0, 0.0, 0.0]
+
+    def add(self, comment: Dict[str, Any]):
+        """댓글을 추가합니다. 이미 있는 id면 rescore와 같습니다."""
+        key = str(comment["id"])
+        if key in self._members:
+            self.rescore(comment)
+            return
+        contrib = comment_contribution(comment)
+        self._members[key] = contrib
+        self.total += 1
+        self._apply(contrib, +1)
+
+    def remove(self, comment) -> bool:
+        """댓글(또는 댓글 id)을 제거합니다. 집계에 없던 댓글이면 False."""
+        key = str(comment if isinstance(comment, (str, int)) else comment["id"])
+        contrib = self._members.pop(key, None)
+        if contrib is None:
+            return False
+        self.total -= 1
+        self._apply(contrib, -1)
+        return True
+
+    def rescore(self, comment: Dict[str, Any]):
+        """다시 분석된 댓글의 기여분을 교체합니다. 집계에 없던 댓글이면 추가합니다."""
+        key = str(comment["id"])
+        old = self._members.get(key)
+        if old is None:
+            self.add(comment)
+            return
+        new = comment_contribution(comment)
+        if new != old:
+            self._apply(old, -1)
+            self._apply(new, +1)
+            self._members[key] = new
+
+    @classmethod
+    def from_columns(cls, ids: List[Any], harmful, reasons, post_id: Optional[str] = None,
+                     caution: float = DEFAULT_CAUTION_TEMP) -> "PostAggregate":
+        """
+        댓글 id, 유해 여부 (n,), 사유 점수 (n, 3) 배열로 한 번에 만듭니다.
+        사유 합계는 입력 순서대로 더한 값(add를 반복한 것과 같음)입니다.
+        """
+        return cls(post_id, caution).reset_from_columns(ids, harmful, reasons, caution)
+
+    def reset_from_columns(self, ids: List[Any], harmful, reasons,
+                           caution: Optional[float] = None) -> "PostAggregate":
+        """기존 상태를 버리고 배열로 다시 만듭니다 (임계값이 바뀌었을 때 등)."""
+        if caution is not None:
+            self.caution = float(caution)
+        # 작성자 스케치는 제거를 지원하지 않으므로 유해 여부가 다시 정해지면 새로 쌓음
+        self.authors = AuthorSketch()
+        self.daily_authors = {}
+        harmful = np.asarray(harmful, dtype=bool)
+        reasons = np.asarray(reasons, dtype=np.float64).reshape(len(harmful), len(REASON_KEYS))
+        reasons = np.where(harmful[:, None], reasons, 0.0)
+        self._members = {
+            str(i): ((True,) + tuple(r) if h else _ZERO)
+            for i, h, r in zip(ids, harmful.tolist(), reasons.tolist())
+        }
+        self.total = len(self._members)
+        self.harmful = int(harmful.sum())
+        self.reason_sums = [0.0, 0.0, 0.0]
+        if self.harmful:
+            # cumsum은 앞에서부터 순서대로 더하므로 반복문 누적과 같은 값이 나옴
+            self.reason_sums = np.cumsum(reasons[harmful], axis=0)[-1].tolist()
+        return self
+
+    def sync(self, comments: List[Dict[str, Any]]):
+        """
+        현재 댓글 목록에 맞춰 집계를 갱신합니다. 새 댓글은 추가하고 사라진 댓글은 제거하며,
+        이미 집계된 댓글은 rescore로 기여분(유해 여부/사유 점수)이 달라졌을 때만 교체합니다
+        (마감/서킷 브레이커 대체 점수로 집계된 댓글이 나중에 실제 점수를 받는 경우 등).
+        """
+        current = {str(c["id"]) for c in comments}
+        for key in [k for k in self._members if k not in current]:
+            self.remove(key)
+        for c in comments:
+            if str(c["id"]) in self._members:
+                self.rescore(c)
+            else:
+                self.add(c)
+
+    def add_authors(self, authors: List[Any], harmful, days: List[Optional[date]]):
+        """
+        댓글 작성자 (n,), 유해 여부 (n,), 작성일(KST, 없으면 None) (n,)을 작성자 스케치에 더합니다.
+        이미 더한 댓글을 다시 더해도 추정치는 바뀌지 않습니다.
+        """
+        hashes = hash64(authors)
+        harmful = np.asarray(harmful, dtype=bool)
+        self.authors.add_hashes(hashes, harmful)
+        for day in {d for d in days if d is not None}:
+            mask = np.fromiter((d == day for d in days), dtype=bool, count=len(days))
+            self.daily_authors.setdefault(day, AuthorSketch()).add_hashes(hashes[mask], harmful[mask])
+
+    @property
+    def harm_rate(self) -> float:
+        return self.harmful / self.total if self.total else 0.0
+
+    @property
+    def post_temp(self) -> float:
+        """게시글 온도: 유해발언 비율 1%p당 +0.035°C (0% = 36.5°C, 100% = 40.0°C)."""
+        return round(MIN_TEMP + self.harm_rate * 3.5, 2)
+
+    @property
+    def norm_reasons(self) -> Dict[str, float]:
+        """유해 댓글 사유 합계를 최댓값 기준으로 정규화합니다 (유해 댓글이 없으면 0)."""
+        if self.harmful <= 0:
+            return {k: 0.0 for k in REASON_KEYS}
+        maxv = max(self.reason_sums) or 1e-9
+        return {k: v / maxv for k, v in zip(REASON_KEYS, self.reason_sums)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.VERSION,
+            "post_id": self.post_id,
+            "caution": self.caution,
+            "total": self.total,
+            "harmful": self.harmful,
+            "reason_sums": list(self.reason_sums),
+            "members": {k: [int(c[0]), c[1], c[2], c[3]] for k, c in self._members.items()},
+            "histogram": self.histogram.to_dict() if self.histogram is not None else None,
+            "authors": self.authors.to_dict(),
+            "daily_authors": {d.isoformat(): s.to_dict() for d, s in self.daily_authors.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PostAggregate":
+        if int(data.get("version", 0)) != cls.VERSION:
+            raise ValueError(f"unsupported post aggregate version: {data.get('version')}")
+        agg = cls(data.get("post_id"), float(data.get("caution", DEFAULT_CAUTION_TEMP)))
+        agg._members = {k: (bool(v[0]), float(v[1]), float(v[2]), float(v[3]))
+                        for k, v in (data.get("members") or {}).items()}
+        agg.total = int(data.get("total", len(agg._members)))
+        agg.harmful = int(data.get("harmful", 0))
+        agg.reason_sums = [float(v) for v in data.get("reason_sums", [0.0, 0.0, 0.0])]
+        if data.get("histogram"):
+            from temp_histogram import TempHistogram
+            agg.histogram = TempHistogram.from_dict(data["histogram"])
+        if data.get("authors"):
+            agg.authors = AuthorSketch.from_dict(data["authors"])
+        agg.daily_authors = {date.fromisoformat(d): AuthorSketch.from_dict(s)
+                             for d, s in (data.get("daily_authors") or {}).items()}
+        return agg
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "PostAggregate":
+        return cls.from_dict(json.loads(text))
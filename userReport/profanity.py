@@ -0,0 +1,233 @@
+# profanity.py
+# -*- coding: utf-8 -*-
+
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import LEXICON_VERDICT_WEIGHT
+
+# 한글 자모 테이블 (호환 자모)
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ("", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+         "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+_JAMO_FIRST = 0x3131
+_JAMO_LAST = 0x318E
+
+# 단독 자모(예: "ㅅㅂ") 앞에 붙이는 표식.
+# 음절에서 분해된 자모와 구분해 "것바"(ㄱㅓㅅㅂㅏ)가 "ㅅㅂ"에 걸리지 않게 합니다.
+# NFKC는 호환 자모를 첫가끝 자모로 바꾸므로 NFKC 전에 판별합니다.
+_STANDALONE = "\x00"
+
+# 한국어 욕설/비하 사전: (표현, 사유, 가중치)
+# 가중치가 LEXICON_VERDICT_WEIGHT 이상이면 API 호출 없이 바로 판정합니다.
+ABUSE_LEXICON: Tuple[Tuple[str, str, float], ...] = (
+    # 욕설 (조롱/모욕)
+    ("시발", "조롱/모욕", 0.95), ("씨발", "조롱/모욕", 0.95), ("씨빨", "조롱/모욕", 0.95),
+    ("ㅅㅂ", "조롱/모욕", 0.9), ("ㅆㅂ", "조롱/모욕", 0.9), ("ㅅㅂㄹㅁ", "조롱/모욕", 0.95),
+    ("개새끼", "조롱/모욕", 0.95), ("개새기", "조롱/모욕", 0.95), ("ㄱㅅㄲ", "조롱/모욕", 0.9),
+    ("좆", "조롱/모욕", 0.9), ("ㅈㄹ", "조롱/모욕", 0.85), ("지랄", "조롱/모욕", 0.9),
+    ("닥쳐", "조롱/모욕", 0.85), ("ㄷㅊ", "조롱/모욕", 0.85), ("꺼져", "조롱/모욕", 0.7),
+    ("엿먹어", "조롱/모욕", 0.85), ("미친놈", "조롱/모욕", 0.9), ("미친년", "조롱/모욕", 0.9),
+    ("ㅁㅊ", "조롱/모욕", 0.7), ("관종", "조롱/모욕", 0.6), ("역겹", "조롱/모욕", 0.6),
+    # 비하
+    ("병신", "비하", 0.95), ("ㅂㅅ", "비하", 0.85), ("븅신", "비하", 0.95), ("등신", "비하", 0.9),
+    ("찐따", "비하", 0.85), ("노답", "비하", 0.6), ("수준바닥", "비하", 0.7), ("쓰레기", "비하", 0.6),
+    ("멍청", "비하", 0.6),
+    # 혐오
+    ("한남충", "혐오", 0.95), ("김치녀", "혐오", 0.95), ("된장녀", "혐오", 0.9), ("맘충", "혐오", 0.95),
+    ("틀딱", "혐오", 0.95), ("급식충", "혐오", 0.9), ("짱깨", "혐오", 0.95), ("쪽바리", "혐오", 0.95),
+    ("흑형", "혐오", 0.85), ("장애인같", "혐오", 0.85), ("충들", "혐오", 0.7),
+)
+
+# 욕설과 겹치지만 정상적인 표현 (이 표현과 겹치는 매칭은 제외)
+ALLOWLIST: Tuple[str, ...] = ("시발점", "시발역", "등신대")
+
+
+@lru_cache(maxsize=None)
+def _jamo_tokens(ch: str) -> Tuple[str, ...]:
+    """문자 하나를 자모 토큰들로 분해합니다. 한글이 아니면 소문자 그대로 반환합니다."""
+    code = ord(ch)
+    if _SYLLABLE_BASE <= code <= _SYLLABLE_LAST:
+        idx = code - _SYLLABLE_BASE
+        cho, jung, jong = idx // 588, (idx % 588) // 28, idx % 28
+        tokens = [] if cho == 11 else [_CHO[cho]]  # 초성 ㅇ은 무음이므로 제외 ("십알" → "시발")
+        tokens.append(_JUNG[jung])
+        tokens.extend(_JONG[jong])
+        return tuple(tokens)
+    if _JAMO_FIRST <= code <= _JAMO_LAST:
+        return (_STANDALONE + ch,)
+    return (ch.lower(),)
+
+
+def _syllables(word: str) -> List[Tuple[str, ...]]:
+    """단어를 음절(글자) 단위 자모 토큰 목록으로 바꿉니다. 단독 자모는 NFKC 전에 골라내고, 숫자/기호는 버립니다."""
+    units: List[Tuple[str, ...]] = []
+    for raw in word:
+        code = ord(raw)
+        if _SYLLABLE_BASE <= code <= _SYLLABLE_LAST or _JAMO_FIRST <= code <= _JAMO_LAST:
+            # 완성형 음절은 NFKC로 바뀌지 않고, 호환 자모는 NFKC 전에 단독 자모로 표시
+            units.append(_jamo_tokens(raw))
+            continue
+        for ch in unicodedata.normalize("NFKC", raw):
+            if ch.isalpha():
+                units.append(_jamo_tokens(ch))
+    return units
+
+
+def normalize_word(word: str) -> Tuple[str, FrozenSet[int]]:
+    """
+    공백 없는 단어 하나의 매칭용 정규화: 숫자/기호 제거 → 자모 분해 → 연속 반복 자모 축약
+    ("시1발", "시바알", "십알" → "시발"의 자모).
+
+    Returns:
+        tuple: (자모 문자열, 음절 경계 위치들) — 사전 표현은 양 끝이 음절 경계에 맞을 때만 인정합니다
+            ("조정"(ㅈㅗ|ㅈㅓㅇ) 안의 "좆"(ㅈㅗㅈ)은 음절 중간에서 끝나므로 매칭 아님).
+    """
+    out: List[str] = []
+    size = 0
+    bounds = {0}
+    last = None
+    for tokens in _syllables(word):
+        bounds.add(size)
+        for tok in tokens:
+            if tok != last:
+                out.append(tok)
+                size += len(tok)
+                last = tok
+        bounds.add(size)
+    return "".join(out), frozenset(bounds)
+
+
+def normalize_jamo(text: str) -> str:
+    """단어별 normalize_word 자모 문자열을 공백으로 이어 붙입니다 (단어 경계를 넘는 매칭은 하지 않음)."""
+    return " ".join(normalize_word(w)[0] for w in (text or "").split())
+
+
+class AhoCorasick:
+    """문자열 다중 패턴 매칭 오토마타 (Aho-Corasick)."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pid, pat in enumerate(self.patterns):
+            if not pat:
+                continue
+            node = 0
+            for ch in pat:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+
+        # BFS로 실패 링크 구성
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> List[Tuple[int, int]]:
+        """(끝_위치, 패턴_번호) 목록을 반환합니다."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        hits = []
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.extend((pos, pid) for pid in out[node])
+        return hits
+
+
+class ProfanityFilter:
+    """
+    자모 분해 + Aho-Corasick 기반 한국어 욕설 사전 필터.
+
+    공백으로 나눈 단어마다 따로 매칭하고("다시 발생" ≠ "시발"), 표현의 양 끝이 음절 경계에 맞아야 인정합니다.
+    단어 첫 음절에서 시작하는 매칭만 확실한 매칭으로 보고 verdict에 사용하며,
+    단어 중간의 매칭("다시발생"의 "시발")은 matches에만 나오고 판정은 다음 단계(로컬 모델/API)에 맡깁니다.
+    """
+
+    def __init__(self, lexicon=ABUSE_LEXICON, allowlist=ALLOWLIST):
+        self.entries = [(normalize_word(word)[0], reason, float(weight)) for word, reason, weight in lexicon]
+        self.allowlist = tuple(normalize_word(w)[0] for w in allowlist)
+        self._matcher = AhoCorasick([e[0] for e in self.entries])
+        self._allowed = AhoCorasick(list(self.allowlist))
+
+    def _scan(self, text: str) -> List[Tuple[int, bool]]:
+        """음절 경계에 맞는 매칭의 (사전 번호, 단어 첫 음절에서 시작하는지) 목록. 허용 표현과 겹치는 매칭은 제외."""
+        found = []
+        for word in (text or "").split():
+            norm, bounds = normalize_word(word)
+            hits = self._matcher.finditer(norm)
+            if not hits:
+                continue
+            allowed = [(end + 1 - len(self.allowlist[pid]), end + 1) for end, pid in self._allowed.finditer(norm)]
+            for end, pid in hits:
+                stop = end + 1
+                start = stop - len(self.entries[pid][0])
+                if start not in bounds or stop not in bounds:
+                    continue
+                if any(a < stop and start < b for a, b in allowed):
+                    continue
+                found.append((pid, start == 0))
+        return found
+
+    def matches(self, text: str) -> List[Tuple[str, str, float]]:
+        """매칭된 (정규화_표현, 사유, 가중치) 목록을 반환합니다 (중복 제거, 단어 중간 매칭 포함)."""
+        seen = set()
+        found = []
+        for pid, _ in self._scan(text):
+            if pid not in seen:
+                seen.add(pid)
+                found.append(self.entries[pid])
+        return found
+
+    def verdict(self, text: str) -> Optional[Dict[str, any]]:
+        """
+        단어 첫 음절에서 시작하는 확실한 매칭만으로 유해하다고 판정되면 analyze_text와 같은 형식의 결과를,
+        애매하거나(단어 중간 매칭, 낮은 가중치) 매칭이 없으면 None을 반환합니다.
+        """
+        hits = [self.entries[pid] for pid in {pid for pid, head in self._scan(text) if head}]
+        if not hits or max(w for _, _, w in hits) < LEXICON_VERDICT_WEIGHT:
+            return None
+
+        scores = {"혐오": 0.0, "조롱/모욕": 0.0, "비하": 0.0}
+        for _, reason, weight in hits:
+            scores[reason] = max(scores[reason], weight)
+
+        tox = max(scores.values())
+        maxv = tox or 1e-9
+        return {
+            "toxicity": tox,
+            "hate": scores["혐오"],
+            "aggression": scores["조롱/모욕"],
+            "demean": scores["비하"],
+            "reasons": {k: v / maxv for k, v in scores.items()},
+            "suggestion": None,
+        }
+
+
+# 전역 필터 인스턴스 (모듈 로드 시 1회 컴파일)
+profanity_filter = ProfanityFilter()
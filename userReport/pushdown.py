@@ -0,0 +1,159 @@
+# pushdown.py
+# -*- coding: utf-8 -*-
+"""
+DB 집계 푸시다운 (Oracle / SQLite).
+
+원시 EVENTS 행을 모두 읽어 파이썬에서 집계하는 대신 KST 날짜별 합계를 DB의
+GROUP BY로 계산해 결과 행(기간의 일 수만큼)만 받아옵니다. 합계 형식은 일별 롤업 행과 같으므로
+weekly_from_rollup으로 process_weekly_data와 같은 KPI/일별 집계를 만듭니다.
+온도 분위수가 필요하면 (날짜, 온도 구간)별 건수도 DB에서 세어 받습니다.
+
+    kpi, daily = weekly_report(engine, user_id, start, end)   # process_weekly_data(get_user_events(...))와 같음
+    temps = get_post_temps(engine, ["p1", "p2"])               # {"p1": {"harmful", "total", "post_temp"}, ...}
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from data_processor import ROLLUP_COLUMNS, weekly_from_rollup
+from database import _db_time
+from rollup import _as_date, _hist_arrays, _rollup_frame
+from temp_histogram import N_BINS
+from utils import post_temp_from_rate
+from config import MIN_TEMP, TEMP_HIST_STEP
+
+# CREATED_AT → KST 날짜 (SQLite는 UTC 기준 ISO 문자열로 저장된다고 보고 9시간을 더함)
+_DAY_EXPR = {
+    "oracle": "TRUNC(CAST(CREATED_AT AT TIME ZONE '+09:00' AS DATE))",
+    "sqlite": "date(CREATED_AT, '+9 hours')",
+}
+
+# TEMP_C → temp_histogram 구간 번호 (temp_bins와 같은 반올림/자르기)
+# Oracle은 GROUP BY 식에 바인드 변수가 있으면 SELECT 식과 같은 식으로 보지 않으므로 상수를 직접 넣음
+_BIN_ARGS = {"max_bin": N_BINS - 1, "min_temp": MIN_TEMP, "step": TEMP_HIST_STEP}
+_BIN_EXPR = {
+    "oracle": "GREATEST(0, LEAST({max_bin}, ROUND((TEMP_C - {min_temp}) / {step})))".format(**_BIN_ARGS),
+    "sqlite": "MAX(0, MIN({max_bin}, CAST(ROUND((TEMP_C - {min_temp}) / {step}) AS INTEGER)))".format(**_BIN_ARGS),
+}
+
+# 게시글 집계 상태(STATE_JSON)의 숫자 필드
+_JSON_NUMBER = {
+    "oracle": "JSON_VALUE(STATE_JSON, '$.{field}' RETURNING NUMBER)",
+    "sqlite": "json_extract(STATE_JSON, '$.{field}')",
+}
+
+# 롤업 열 → EVENTS 집계식 (혐오/조롱 기준 0.5와 수락 여부는 data_processor._weekly_columns와 같음)
+_SUM_EXPRS = {
+    "n": "COUNT(*)",
+    "suggested": "SUM(CASE WHEN SUGGESTION IS NOT NULL THEN 1 ELSE 0 END)",
+    "accepted": "SUM(CASE WHEN SENT_CHOICE = :accepted THEN 1 ELSE 0 END)",
+    "temp_sum": "SUM(TEMP_C)",
+    "temp_n": "COUNT(TEMP_C)",
+    "hate_n": "SUM(CASE WHEN HATE >= 0.5 THEN 1 ELSE 0 END)",
+    "aggr_n": "SUM(CASE WHEN AGGRESSION >= 0.5 THEN 1 ELSE 0 END)",
+}
+
+
+def _dialect(engine) -> str:
+    name = engine.dialect.name
+    if name not in _DAY_EXPR:
+        raise ValueError(f"unsupported pushdown dialect: {name}")
+    return name
+
+
+def daily_sums(engine, user_id: str, start_date, end_date) -> pd.DataFrame:
+    """
+    사용자의 [start_date, end_date] 이벤트를 KST 날짜별 합계로 DB에서 집계합니다 (시간대 없는 경계는 KST).
+
+    Returns:
+        DataFrame: [user_id, date, n, suggested, accepted, temp_sum, temp_n, hate_n, aggr_n]
+            (daily_rollup과 같은 형식, 날짜순)
+    """
+    if engine is None:
+        return _rollup_frame([])
+
+    day = _DAY_EXPR[_dialect(engine)]
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            f"""
+            SELECT {day} AS EVENT_DAY, {", ".join(_SUM_EXPRS.values())}
+            FROM EVENTS
+            WHERE CREATED_AT BETWEEN :s AND :e AND USER_ID = :uid
+            GROUP BY {day}
+            ORDER BY 1
+            """
+        ), {"s": _db_time(engine, start_date), "e": _db_time(engine, end_date), "uid": user_id,
+            "accepted": "순화"}).all()
+
+    return _rollup_frame([
+        {"user_id": user_id, "date": _as_date(r[0]), **{k: (v or 0) for k, v in zip(ROLLUP_COLUMNS, r[1:])}}
+        for r in rows
+    ])
+
+
+def daily_temp_hists(engine, user_id: str, start_date, end_date) -> Dict[date, np.ndarray]:
+    """사용자의 [start_date, end_date] 이벤트 온도를 (KST 날짜, 온도 구간)별로 DB에서 셉니다. {날짜: (N_BINS,)}"""
+    if engine is None:
+        return {}
+
+    dialect = _dialect(engine)
+    day, temp_bin = _DAY_EXPR[dialect], _BIN_EXPR[dialect]
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            f"""
+            SELECT {day}, {temp_bin}, COUNT(*)
+            FROM EVENTS
+            WHERE CREATED_AT BETWEEN :s AND :e AND USER_ID = :uid AND TEMP_C IS NOT NULL
+            GROUP BY {day}, {temp_bin}
+            """
+        ), {"s": _db_time(engine, start_date), "e": _db_time(engine, end_date), "uid": user_id}).all()
+
+    return _hist_arrays((_as_date(r[0]), int(r[1]), int(r[2])) for r in rows)
+
+
+def weekly_report(engine, user_id: str, start_date, end_date,
+                  quantiles: bool = True) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    process_weekly_data(get_user_events(...))와 같은 (KPI, 일별 집계)를 DB 집계 결과로 만듭니다.
+    전송량은 이벤트 수와 무관하게 기간의 일 수만큼의 합계 행 (+ quantiles면 날짜별로 값이 있는 온도 구간 행)입니다.
+
+    Args:
+        quantiles: False면 온도 분위수(temp_p50/p90/p99)를 빼고 합계 행만 받습니다.
+    """
+    rows = daily_sums(engine, user_id, start_date, end_date)
+    hists = daily_temp_hists(engine, user_id, start_date, end_date) if quantiles and not rows.empty else None
+    return weekly_from_rollup(rows, hists)
+
+
+def get_post_temps(engine, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    저장된 게시글 집계(POST_AGGREGATES)에서 유해/전체 댓글 수만 DB에서 꺼내 게시글 온도를 계산합니다.
+    댓글별 기여분(members)이 담긴 STATE_JSON 전체를 읽지 않습니다. 집계가 없는 게시글은 빠집니다.
+
+    Returns:
+        dict: {post_id: {"harmful", "total", "harm_rate", "post_temp"}}
+    """
+    if engine is None or not post_ids:
+        return {}
+
+    number = _JSON_NUMBER[_dialect(engine)]
+    params = {f"p{i}": str(p) for i, p in enumerate(post_ids)}
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            f"""
+            SELECT POST_ID, {number.format(field="harmful")}, {number.format(field="total")}
+            FROM POST_AGGREGATES
+            WHERE POST_ID IN ({", ".join(":" + k for k in params)})
+            """
+        ), params).all()
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for post_id, harmful, total in rows:
+        harmful, total = int(harmful or 0), int(total or 0)
+        rate = harmful / total if total else 0.0
+        out[post_id] = {"harmful": harmful, "total": total, "harm_rate": rate, "post_temp": post_temp_from_rate(rate)}
+    return out
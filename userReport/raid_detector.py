@@ -0,0 +1,168 @@
+# raid_detector.py
+# -*- coding: utf-8 -*-
+"""
+게시글 댓글 폭주(레이드) 온라인 감지.
+
+게시글마다 상수 크기의 상태만 두고, 새로 분석된 댓글을 시간순으로 한 번씩만 반영합니다.
+- 유해 비율 EWMA(최근)와 평소 유해 비율(느린 EWMA, 레이드 중에는 고정)
+- 도착률: 반감기 RAID_RATE_HALFLIFE초로 감쇠하는 댓글 수 (분당 댓글 수로 환산)
+- CUSUM: S = max(0, S + x - (평소 비율 + k)), S가 h를 넘고 도착률이 충분하면 레이드 시작,
+  최근 유해 비율이 평소 비율 + k 아래로 돌아오거나 RAID_QUIET_SECONDS 동안 댓글이 없으면 종료
+
+    events = raid_detector.observe(post_id, times, harmful, ids)  # [{"type": "raid_started", "at": ...}, ...]
+    raid_detector.is_active(post_id)                         # 게시글 보기에서 보호 모드 전환
+"""
+
+import math
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    KST, RAID_EWMA_ALPHA, RAID_BASELINE_ALPHA, RAID_BASELINE_INIT, RAID_CUSUM_K, RAID_CUSUM_H,
+    RAID_RATE_HALFLIFE, RAID_MIN_ARRIVALS_PER_MIN, RAID_QUIET_SECONDS, RAID_EVENT_LOG,
+)
+
+RAID_STARTED = "raid_started"
+RAID_ENDED = "raid_ended"
+
+
+class RaidState:
+    """게시글 하나의 감지 상태 (댓글 수와 무관한 고정 크기, last_ids만 마지막 시각에 동시에 달린 댓글 수만큼)."""
+
+    __slots__ = ("last_ts", "last_ids", "harm_ewma", "baseline", "arrivals", "cusum", "active", "started_at")
+
+    def __init__(self):
+        self.last_ts = float("-inf")       # 마지막으로 반영한 댓글 시각 (epoch 초)
+        self.last_ids: set = set()         # last_ts에 반영한 댓글 ID (같은 시각 댓글 구분)
+        self.harm_ewma = 0.0
+        self.baseline = RAID_BASELINE_INIT
+        self.arrivals = 0.0                # 감쇠 댓글 수
+        self.cusum = 0.0
+        self.active = False
+        self.started_at: Optional[float] = None
+
+    def arrivals_per_min(self, now: Optional[float] = None) -> float:
+        """now 시각(기본: 마지막 댓글)의 도착률 (분당 댓글 수)."""
+        decay = 1.0 if now is None else math.exp2(-max(now - self.last_ts, 0.0) / RAID_RATE_HALFLIFE)
+        return self.arrivals * decay * 60.0 / (RAID_RATE_HALFLIFE / math.log(2))
+
+
+class RaidDetector:
+    """게시글별 RaidState 레지스트리. observe는 새 댓글 수에 비례하는 시간만 씁니다."""
+
+    def __init__(self, event_log: int = RAID_EVENT_LOG):
+        self._states: Dict[str, RaidState] = {}
+        self._active: set = set()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=event_log)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def state(self, post_id: str) -> Optional[RaidState]:
+        return self._states.get(str(post_id))
+
+    def is_active(self, post_id: str) -> bool:
+        state = self._states.get(str(post_id))
+        return bool(state and state.active)
+
+    def observe(self, post_id: str, times, harmful, ids=None) -> List[Dict[str, Any]]:
+        """
+        게시글 댓글들의 작성 시각(epoch 초, NaN은 무시) (n,)과 유해 여부 (n,)를 반영합니다.
+        이미 반영한 시각 이전의 댓글은 건너뛰므로 같은 목록을 다시 넣어도 됩니다.
+        ids (n,)를 주면 마지막으로 반영한 시각과 같은 시각의 댓글은 이미 반영한 ID만 건너뜁니다
+        (초 단위 시각은 레이드 중 자주 겹침). 없으면 그 시각의 댓글은 모두 건너뜁니다.
+
+        Returns:
+            list: 이번에 발생한 레이드 시작/종료 이벤트
+        """
+        post_id = str(post_id)
+        times = np.asarray(times, dtype=np.float64)
+        harmful = np.asarray(harmful, dtype=bool)
+        emitted: List[Dict[str, Any]] = []
+        with self._lock:
+            state = self._states.get(post_id)
+            if state is None:
+                state = self._states[post_id] = RaidState()
+            new = times > state.last_ts
+            if ids is not None:
+                ids = [str(i) for i in ids]
+                for i in np.flatnonzero(times == state.last_ts).tolist():
+                    new[i] = ids[i] not in state.last_ids
+            new = np.flatnonzero(new)
+            for i in new[np.argsort(times[new], kind="stable")].tolist():
+                self._step(post_id, state, float(times[i]), bool(harmful[i]), emitted,
+                           None if ids is None else ids[i])
+            self.events.extend(emitted)
+        return emitted
+
+    def _step(self, post_id: str, state: RaidState, ts: float, harmful: bool, emitted: List[Dict[str, Any]],
+              comment_id: Optional[str] = None):
+        # 오랫동안 조용했으면 이 댓글 전에 레이드 종료
+        if state.active and ts - state.last_ts >= RAID_QUIET_SECONDS:
+            self._end(post_id, state, state.last_ts + RAID_QUIET_SECONDS, emitted)
+
+        gap = ts - state.last_ts if math.isfinite(state.last_ts) else math.inf
+        state.arrivals = state.arrivals * math.exp2(-gap / RAID_RATE_HALFLIFE) + 1.0
+        if ts != state.last_ts:
+            state.last_ids = set()
+        state.last_ts = ts
+        if comment_id is not None:
+            state.last_ids.add(comment_id)
+
+        x = 1.0 if harmful else 0.0
+        state.harm_ewma += RAID_EWMA_ALPHA * (x - state.harm_ewma)
+        state.cusum = max(0.0, state.cusum + x - (state.baseline + RAID_CUSUM_K))
+
+        if not state.active:
+            state.baseline += RAID_BASELINE_ALPHA * (x - state.baseline)
+            if state.cusum > RAID_CUSUM_H and state.arrivals_per_min() >= RAID_MIN_ARRIVALS_PER_MIN:
+                state.active = True
+                state.started_at = ts
+                self._active.add(post_id)
+                emitted.append(self._event(post_id, RAID_STARTED, ts, state))
+        elif state.harm_ewma < state.baseline + RAID_CUSUM_K:
+            self._end(post_id, state, ts, emitted)
+
+    def _end(self, post_id: str, state: RaidState, ts: float, emitted: List[Dict[str, Any]]):
+        state.active = False
+        state.cusum = 0.0
+        self._active.discard(post_id)
+        emitted.append(self._event(post_id, RAID_ENDED, ts, state))
+        state.started_at = None
+
+    def sweep(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """진행 중인 레이드 중 RAID_QUIET_SECONDS 동안 댓글이 없는 게시글을 종료합니다 (진행 중인 게시글만 확인)."""
+        now = datetime.now(KST).timestamp() if now is None else now
+        emitted: List[Dict[str, Any]] = []
+        with self._lock:
+            for post_id in list(self._active):
+                state = self._states[post_id]
+                if now - state.last_ts >= RAID_QUIET_SECONDS:
+                    self._end(post_id, state, state.last_ts + RAID_QUIET_SECONDS, emitted)
+            self.events.extend(emitted)
+        return emitted
+
+    def recent_events(self, post_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """최근 이벤트 (post_id가 주어지면 그 게시글만), 최신순."""
+        out = [e for e in reversed(self.events) if post_id is None or e["post_id"] == str(post_id)]
+        return out[:limit]
+
+    @staticmethod
+    def _event(post_id: str, kind: str, ts: float, state: RaidState) -> Dict[str, Any]:
+        return {
+            "post_id": post_id,
+            "type": kind,
+            "at": datetime.fromtimestamp(ts, KST),
+            "harm_rate": state.harm_ewma,
+            "baseline": state.baseline,
+            "arrivals_per_min": state.arrivals_per_min(),
+        }
+
+
+# 프로세스 전역 감지기 (Streamlit 세션 간 공유)
+raid_detector = RaidDetector()
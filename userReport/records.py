@@ -0,0 +1,185 @@
+# records.py
+# -*- coding: utf-8 -*-
+"""
+댓글/분석 결과/이벤트 레코드.
+
+행마다 딕셔너리를 두지 않고 __slots__ 객체로 들고 있어 레코드당 메모리가 작고 속성 접근이 빠릅니다.
+기존 코드와 맞추기 위해 r["text"], r.get("badge"), r.to_dict()처럼 딕셔너리식으로도 읽을 수 있습니다.
+DataFrame과는 필드(열) 단위로 변환하므로 행마다 중간 딕셔너리를 만들지 않습니다.
+
+    items = [Comment(1, "user01", "텍스트", dt)]
+    df = to_frame(items)              # [id, author, text, dt, post_id, sim_temp, sim_harm]
+    items = from_frame(df, Comment)
+"""
+
+import inspect
+import math
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import pandas as pd
+
+from post_aggregate import REASON_KEYS
+
+R = TypeVar("R", bound="Record")
+
+
+class Record:
+    """__slots__ 레코드 공통 기반. 하위 클래스의 __init__ 인자 순서와 이름은 __slots__와 같습니다."""
+
+    __slots__ = ()
+
+    @classmethod
+    def defaults(cls) -> Dict[str, Any]:
+        """기본값이 있는 필드 {이름: 기본값} (__init__ 시그니처에서 읽음)."""
+        return {name: p.default for name, p in inspect.signature(cls).parameters.items()
+                if p.default is not inspect.Parameter.empty}
+
+    @classmethod
+    def from_mapping(cls: Type[R], data) -> R:
+        """레코드는 그대로, 딕셔너리는 아는 필드만 골라 레코드로 만듭니다."""
+        if isinstance(data, cls):
+            return data
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+    # 딕셔너리식 접근 (기존 호출부 호환)
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        if key not in self.keys():
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.keys() else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self.__slots__)})"
+
+
+class Comment(Record):
+    """분석 전 댓글. sim_temp/sim_harm은 시뮬레이션 데이터의 고정 온도/유해 여부입니다 (없으면 NaN/False)."""
+
+    __slots__ = ("id", "author", "text", "dt", "post_id", "sim_temp", "sim_harm")
+
+    def __init__(self, id, author, text, dt, post_id=None, sim_temp=math.nan, sim_harm=False):
+        self.id = id
+        self.author = author
+        self.text = text
+        self.dt = dt
+        self.post_id = post_id
+        self.sim_temp = sim_temp
+        self.sim_harm = sim_harm
+
+
+class AnalyzedComment(Record):
+    """
+    process_comments 결과 한 건. 사유는 REASON_KEYS 순서의 튜플(reason_scores)로 들고 있고,
+    r["reasons"] / r.reasons로 읽으면 {"혐오": ..., "조롱/모욕": ..., "비하": ...} 딕셔너리를 만들어 줍니다.
+    """
+
+    __slots__ = ("id", "author", "text", "dt", "temp_c", "severity", "harmful", "suggestion", "badge",
+                 "cluster_size", "reason_scores")
+    _KEYS = __slots__[:-1] + ("reasons",)
+
+    def __init__(self, id, author, text, dt, temp_c, severity, harmful, suggestion=None, badge=None,
+                 cluster_size=1, reason_scores=(0.0,) * len(REASON_KEYS)):
+        self.id = id
+        self.author = author
+        self.text = text
+        self.dt = dt
+        self.temp_c = temp_c
+        self.severity = severity
+        self.harmful = harmful
+        self.suggestion = suggestion
+        self.badge = badge
+        self.cluster_size = cluster_size
+        self.reason_scores = reason_scores
+
+    @property
+    def reasons(self) -> Dict[str, float]:
+        return dict(zip(REASON_KEYS, self.reason_scores))
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._KEYS
+
+    def __setitem__(self, key: str, value):
+        if key == "reasons":
+            self.reason_scores = tuple(float(value.get(k, 0.0)) for k in REASON_KEYS)
+        else:
+            super().__setitem__(key, value)
+
+
+class Event(Record):
+    """EVENTS 행 (리라이팅 제안/선택 이벤트)."""
+
+    __slots__ = ("id", "created_at", "user_id", "raw_text", "suggestion", "toxicity", "aggression", "hate",
+                 "temp_c", "sent_choice")
+
+    def __init__(self, id, created_at, user_id, raw_text="", suggestion=None, toxicity=0.0, aggression=0.0,
+                 hate=0.0, temp_c=36.5, sent_choice="원문"):
+        self.id = id
+        self.created_at = created_at
+        self.user_id = user_id
+        self.raw_text = raw_text
+        self.suggestion = suggestion
+        self.toxicity = toxicity
+        self.aggression = aggression
+        self.hate = hate
+        self.temp_c = temp_c
+        self.sent_choice = sent_choice
+
+
+def to_frame(records: Sequence[Record], cls: Optional[Type[Record]] = None) -> pd.DataFrame:
+    """
+    레코드 목록을 DataFrame으로 바꿉니다. 필드마다 한 번씩 열을 모으므로 행마다 딕셔너리를 만들지 않습니다.
+    AnalyzedComment는 reason_scores 대신 REASON_KEYS 열(사유별 점수)로 펼칩니다.
+    """
+    cls = cls or (type(records[0]) if len(records) else Record)
+    fields = list(cls.__slots__)
+    columns = {name: list(map(attrgetter(name), records)) for name in fields}
+    if cls is AnalyzedComment:
+        scores = columns.pop("reason_scores")
+        fields.remove("reason_scores")
+        for k, name in enumerate(REASON_KEYS):
+            columns[name] = [s[k] for s in scores]
+            fields.append(name)
+    return pd.DataFrame(columns, columns=fields)
+
+
+def from_frame(df: pd.DataFrame, cls: Type[R]) -> List[R]:
+    """DataFrame 열을 레코드 필드로 읽습니다 (없는 열은 기본값, AnalyzedComment는 REASON_KEYS 열을 다시 묶음)."""
+    n = len(df)
+    defaults = cls.defaults()
+    columns: List[Iterable[Any]] = []
+    for name in cls.__slots__:
+        if name in df.columns:
+            col = df[name]
+            if name in defaults and defaults[name] is None and col.hasnans:
+                # 비어 있던 칸은 NaN으로 읽히므로 기본값(None)으로 되돌림
+                col = col.astype(object).where(col.notna(), None)
+            columns.append(col.tolist())
+        elif cls is AnalyzedComment and name == "reason_scores" and all(k in df.columns for k in REASON_KEYS):
+            columns.append(zip(*(df[k].tolist() for k in REASON_KEYS)))
+        elif name in defaults:
+            columns.append([defaults[name]] * n)
+        else:
+            raise KeyError(f"{cls.__name__}: missing column '{name}'")
+    return [cls(*row) for row in zip(*columns)]
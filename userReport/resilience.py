@@ -0,0 +1,326 @@
+# resilience.py
+# -*- coding: utf-8 -*-
+"""
+업스트림(OpenAI) 호출 보호: 마감 시간(deadline), 서킷 브레이커, 헤지 요청.
+
+    deadline = Deadline(8.0)                    # 호출자가 정한 전체 예산 (초)
+    res = guarded_call(lambda t: client.moderations.create(..., timeout=t),
+                       moderation_breaker, deadline, hedge_after=HEDGE_DELAY)
+
+- 호출 함수는 남은 시간(초, 없으면 None)을 인자로 받아 요청 timeout으로 넘깁니다.
+- 브레이커가 열려 있거나 마감이 지났으면 요청 없이 바로 예외를 던지므로,
+  호출자는 로컬 대체 경로(fallback_scores 등)로 넘어가면 됩니다.
+"""
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_SLOW_CALL_SECONDS, BREAKER_SLOW_CALL_RATE,
+    BREAKER_WINDOW, BREAKER_RESET_TIMEOUT, HEDGE_MAX_WORKERS
+)
+
+try:
+    from openai import APITimeoutError  # APIConnectionError 계열이며 TimeoutError의 하위 클래스가 아님
+except Exception:
+    APITimeoutError = None
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 브레이커가 타임아웃(느린 호출)으로 세는 예외
+TIMEOUT_ERRORS = tuple(t for t in (TimeoutError, asyncio.TimeoutError, APITimeoutError) if t is not None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """호출자가 정한 마감 시간이 지났습니다."""
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않았습니다."""
+
+
+class Deadline:
+    """절대 마감 시각 (time.monotonic 기준). seconds가 None이면 마감 없음."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.at = None if seconds is None else time.monotonic() + max(0.0, float(seconds))
+
+    def remaining(self) -> Optional[float]:
+        """남은 시간(초). 마감이 없으면 None."""
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def check(self):
+        """마감이 지났으면 DeadlineExceeded를 던집니다."""
+        if self.expired():
+            raise DeadlineExceeded("deadline exceeded")
+
+    def cap(self, seconds: Optional[float]) -> Optional[float]:
+        """seconds와 남은 시간 중 작은 값을 반환합니다 (둘 다 없으면 None)."""
+        left = self.remaining()
+        if seconds is None:
+            return left
+        return seconds if left is None else min(seconds, left)
+
+
+NO_DEADLINE = Deadline(None)
+
+
+class CircuitBreaker:
+    """
+    연속 실패 또는 느린 호출 비율로 여는 서킷 브레이커.
+
+    - closed: 정상 호출. 연속 실패 failure_threshold회 또는 최근 window개 호출 중
+      slow_call_seconds 이상 걸린 호출 비율이 slow_call_rate 이상이면 open
+    - open: reset_timeout 동안 모든 호출을 거절 (호출자는 로컬 대체 경로 사용)
+    - half_open: 탐침 호출 1개만 허용, 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS, slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+                 window: int = BREAKER_WINDOW, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.slow_call_seconds = float(slow_call_seconds)
+        self.slow_call_rate = float(slow_call_rate)
+        self.reset_timeout = float(reset_timeout)
+
+        self._state = CLOSED
+        self._changed_at = time.monotonic()
+        self._consecutive_failures = 0
+        self._recent = deque(maxlen=max(1, int(window)))  # 최근 호출의 느림 여부
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "calls": 0, "successes": 0, "failures": 0, "slow_calls": 0, "timeouts": 0,
+            "rejected": 0, "hedges": 0, "hedge_wins": 0,
+        }
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self.time_in_state = {CLOSED: 0.0, OPEN: 0.0, HALF_OPEN: 0.0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state: str):
+        now = time.monotonic()
+        self.time_in_state[self._state] += now - self._changed_at
+        self._state = state
+        self._changed_at = now
+        self.transitions[state] += 1
+        if state != HALF_OPEN:
+            self._probe_started = None
+        if state == CLOSED:
+            self._consecutive_failures = 0
+            self._recent.clear()
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._changed_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+
+    def allow(self) -> bool:
+        """지금 요청을 보내도 되는지 반환합니다. half_open에서는 탐침 1개만 허용합니다."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                now = time.monotonic()
+                # 결과가 기록되지 않은 탐침은 reset_timeout 뒤에 새 탐침으로 교체
+                if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                    self._probe_started = now
+                    return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self, elapsed: float):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["successes"] += 1
+            slow = elapsed >= self.slow_call_seconds
+            self.stats["slow_calls"] += int(slow)
+            if self._state == HALF_OPEN:
+                self._set_state(CLOSED)
+                return
+            self._consecutive_failures = 0
+            self._recent.append(slow)
+            self._trip_if_slow()
+
+    def record_failure(self, elapsed: float, timeout: bool = False):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["failures"] += 1
+            self.stats["timeouts"] += int(timeout)
+            if self._state == HALF_OPEN:
+                self._set_state(OPEN)
+                return
+            if self._state == OPEN:
+                return
+            self._consecutive_failures += 1
+            self._recent.append(timeout or elapsed >= self.slow_call_seconds)
+            if self._consecutive_failures >= self.failure_threshold:
+                self._set_state(OPEN)
+            else:
+                self._trip_if_slow()
+
+    def _trip_if_slow(self):
+        if len(self._recent) == self._recent.maxlen and sum(self._recent) / len(self._recent) >= self.slow_call_rate:
+            self._set_state(OPEN)
+
+    def record_hedge(self, won: bool):
+        with self._lock:
+            self.stats["hedges"] += 1
+            self.stats["hedge_wins"] += int(won)
+
+    def reset(self):
+        """강제로 closed 상태로 되돌립니다."""
+        with self._lock:
+            self._set_state(CLOSED)
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        """현재 상태, 카운터, 상태별 진입 횟수/체류 시간(초)을 반환합니다."""
+        with self._lock:
+            self._maybe_half_open()
+            time_in_state = dict(self.time_in_state)
+            time_in_state[self._state] += time.monotonic() - self._changed_at
+            return {
+                "name": self.name,
+                "state": self._state,
+                **self.stats,
+                "transitions": dict(self.transitions),
+                "time_in_state": time_in_state,
+            }
+
+
+# 업스트림별 전역 브레이커
+moderation_breaker = CircuitBreaker("moderation")
+suggestion_breaker = CircuitBreaker("suggestion")
+
+# 헤지/마감 적용 동기 호출용 스레드 풀 (마감 후에도 남은 호출은 자체 timeout으로 정리됨)
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="upstream")
+
+
+def guarded_call(fn: Callable[[Optional[float]], Any], breaker: CircuitBreaker,
+                 deadline: Optional[Deadline] = None, hedge_after: Optional[float] = None) -> Any:
+    """
+    fn(timeout)을 브레이커/마감/헤지를 적용해 호출합니다.
+
+    Raises:
+        CircuitOpenError: 브레이커가 열려 있음
+        DeadlineExceeded: 마감 전에 응답을 받지 못함
+    """
+    deadline = deadline or NO_DEADLINE
+    deadline.check()
+    if not breaker.allow():
+        raise CircuitOpenError(breaker.name)
+
+    start = time.monotonic()
+    try:
+        if deadline.at is None and not hedge_after:
+            result = fn(None)
+        else:
+            result = _hedged(fn, breaker, deadline, hedge_after)
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - start, timeout=isinstance(e, TIMEOUT_ERRORS))
+        raise
+    breaker.record_success(time.monotonic() - start)
+    return result
+
+
+def _hedged(fn: Callable[[Optional[float]], Any], breaker: CircuitBreaker,
+            deadline: Deadline, hedge_after: Optional[float]) -> Any:
+    """스레드에서 fn을 실행하고, hedge_after 안에 끝나지 않으면 같은 요청을 한 번 더 보냅니다."""
+    primary = _executor.submit(fn, deadline.remaining())
+    futures = [primary]
+    if hedge_after:
+        done, _ = concurrent.futures.wait(futures, timeout=deadline.cap(hedge_after))
+        if not done and not deadline.expired():
+            futures.append(_executor.submit(fn, deadline.remaining()))
+
+    error: Optional[BaseException] = None
+    pending = set(futures)
+    while pending:
+        done, pending = concurrent.futures.wait(pending, timeout=deadline.remaining(),
+                                                return_when=concurrent.futures.FIRST_COMPLETED)
+        if not done:
+            break
+        for f in done:
+            if f.exception() is None:
+                if len(futures) > 1:
+                    breaker.record_hedge(won=f is not primary)
+                for other in pending:
+                    other.cancel()
+                return f.result()
+            error = f.exception()
+
+    if len(futures) > 1:
+        breaker.record_hedge(won=False)
+    if pending or error is None:
+        raise DeadlineExceeded("deadline exceeded")
+    raise error
+
+
+async def aguarded_call(make_request: Callable[[Optional[float]], Awaitable[Any]], breaker: CircuitBreaker,
+                        deadline: Optional[Deadline] = None, hedge_after: Optional[float] = None) -> Any:
+    """guarded_call의 비동기 버전입니다. make_request(timeout)은 코루틴을 반환해야 합니다."""
+    deadline = deadline or NO_DEADLINE
+    deadline.check()
+    if not breaker.allow():
+        raise CircuitOpenError(breaker.name)
+
+    start = time.monotonic()
+    try:
+        result = await _ahedged(make_request, breaker, deadline, hedge_after)
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - start, timeout=isinstance(e, TIMEOUT_ERRORS))
+        raise
+    breaker.record_success(time.monotonic() - start)
+    return result
+
+
+async def _ahedged(make_request: Callable[[Optional[float]], Awaitable[Any]], breaker: CircuitBreaker,
+                   deadline: Deadline, hedge_after: Optional[float]) -> Any:
+    primary = asyncio.ensure_future(make_request(deadline.remaining()))
+    tasks = [primary]
+    try:
+        if hedge_after:
+            done, _ = await asyncio.wait(tasks, timeout=deadline.cap(hedge_after))
+            if not done and not deadline.expired():
+                tasks.append(asyncio.ensure_future(make_request(deadline.remaining())))
+
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=deadline.remaining(),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for t in done:
+                if t.exception() is None:
+                    if len(tasks) > 1:
+                        breaker.record_hedge(won=t is not primary)
+                    return t.result()
+                error = t.exception()
+
+        if len(tasks) > 1:
+            breaker.record_hedge(won=False)
+        if pending or error is None:
+            raise DeadlineExceeded("deadline exceeded")
+        raise error
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
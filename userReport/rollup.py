@@ -0,0 +1,603 @@
+# rollup.py
+# -*- coding: utf-8 -*-
+"""
+주간/장기 리포트용 (사용자, 일/주/월) 롤업 저장소.
+
+EVENTS 원시 행 대신 사용자·구간별 합계(건수, 제안, 수락, 온도 합, 혐오/조롱 건수)를
+일·주·월 단위로 미리 쌓아 두고, 리포트는 기간 안의 롤업 행만 읽습니다 (timebuckets.window_report).
+
+    store = SQLRollupStore(engine)          # Oracle 또는 SQLite
+    store.refresh()                         # 워터마크 이후(+ 늦게 커밋된 이벤트 확인 구간) 새 EVENTS만 반영
+    kpi, daily = weekly_from_rollup(store.read(user_id, start_day, end_day),
+                                    store.read_histograms(user_id, start_day, end_day))
+
+    store = FirestoreRollupStore(firebase_manager.db)
+    store.refresh(user_id)                  # users/{uid}/events → users/{uid}/daily_rollups
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+
+from data_processor import daily_rollup, daily_temp_histogram, ROLLUP_COLUMNS
+from records import Event, to_frame
+from temp_histogram import N_BINS, TempHistogram
+from timebuckets import LEVELS, hist_to_level, to_level
+from config import ROLLUP_BATCH_SIZE, ROLLUP_LATE_ID_WINDOW, ROLLUP_LATE_SECONDS
+
+# 롤업 열 → 테이블 컬럼
+_SQL_COLUMNS = {
+    "n": "EVENT_COUNT",
+    "suggested": "SUGGESTED",
+    "accepted": "ACCEPTED",
+    "temp_sum": "TEMP_SUM",
+    "temp_n": "TEMP_COUNT",
+    "hate_n": "HATE_COUNT",
+    "aggr_n": "AGGR_COUNT",
+}
+
+# 단위별 롤업 테이블 (EVENT_DAY는 버킷 시작일: 일 / 주의 월요일 / 월의 1일)
+_SQL_TABLES = {"day": "USER_DAILY_ROLLUP", "week": "USER_WEEKLY_ROLLUP", "month": "USER_MONTHLY_ROLLUP"}
+
+_ORACLE_ROLLUP_DDL = """
+        CREATE TABLE {table} (
+          USER_ID      VARCHAR2(64) NOT NULL,
+          EVENT_DAY    DATE NOT NULL,
+          EVENT_COUNT  NUMBER(10) DEFAULT 0,
+          SUGGESTED    NUMBER(10) DEFAULT 0,
+          ACCEPTED     NUMBER(10) DEFAULT 0,
+          TEMP_SUM     NUMBER DEFAULT 0,
+          TEMP_COUNT   NUMBER(10) DEFAULT 0,
+          HATE_COUNT   NUMBER(10) DEFAULT 0,
+          AGGR_COUNT   NUMBER(10) DEFAULT 0,
+          PRIMARY KEY (USER_ID, EVENT_DAY)
+        )
+"""
+
+_ORACLE_WATERMARK_DDL = """
+        CREATE TABLE ROLLUP_WATERMARK (
+          NAME     VARCHAR2(64) PRIMARY KEY,
+          LAST_ID  NUMBER
+        )
+"""
+
+_SQLITE_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+      USER_ID      TEXT NOT NULL,
+      EVENT_DAY    TEXT NOT NULL,
+      EVENT_COUNT  INTEGER DEFAULT 0,
+      SUGGESTED    INTEGER DEFAULT 0,
+      ACCEPTED     INTEGER DEFAULT 0,
+      TEMP_SUM     REAL DEFAULT 0,
+      TEMP_COUNT   INTEGER DEFAULT 0,
+      HATE_COUNT   INTEGER DEFAULT 0,
+      AGGR_COUNT   INTEGER DEFAULT 0,
+      PRIMARY KEY (USER_ID, EVENT_DAY)
+    )
+"""
+
+# 사용자·구간별 이벤트 온도 히스토그램 (TEMP_BIN: temp_histogram 구간 번호, 분위수/what-if용)
+_HIST_TABLES = {"day": "USER_DAILY_TEMP_HIST", "week": "USER_WEEKLY_TEMP_HIST", "month": "USER_MONTHLY_TEMP_HIST"}
+
+_ORACLE_HIST_DDL = """
+        CREATE TABLE {table} (
+          USER_ID      VARCHAR2(64) NOT NULL,
+          EVENT_DAY    DATE NOT NULL,
+          TEMP_BIN     NUMBER(5) NOT NULL,
+          EVENT_COUNT  NUMBER(10) DEFAULT 0,
+          PRIMARY KEY (USER_ID, EVENT_DAY, TEMP_BIN)
+        )
+"""
+
+_SQLITE_HIST_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+      USER_ID      TEXT NOT NULL,
+      EVENT_DAY    TEXT NOT NULL,
+      TEMP_BIN     INTEGER NOT NULL,
+      EVENT_COUNT  INTEGER DEFAULT 0,
+      PRIMARY KEY (USER_ID, EVENT_DAY, TEMP_BIN)
+    )
+"""
+
+_SQLITE_WATERMARK_DDL = """
+    CREATE TABLE IF NOT EXISTS ROLLUP_WATERMARK (
+      NAME     TEXT PRIMARY KEY,
+      LAST_ID  INTEGER
+    )
+"""
+
+# 워터마크 아래 ROLLUP_LATE_ID_WINDOW 구간에서 이미 반영한 EVENTS.ID (구간을 다시 읽을 때 중복 반영 방지)
+_ORACLE_SEEN_DDL = """
+        CREATE TABLE ROLLUP_SEEN (
+          NAME      VARCHAR2(64) NOT NULL,
+          EVENT_ID  NUMBER NOT NULL,
+          PRIMARY KEY (NAME, EVENT_ID)
+        )
+"""
+
+_SQLITE_SEEN_DDL = """
+    CREATE TABLE IF NOT EXISTS ROLLUP_SEEN (
+      NAME      TEXT NOT NULL,
+      EVENT_ID  INTEGER NOT NULL,
+      PRIMARY KEY (NAME, EVENT_ID)
+    )
+"""
+
+_EMPTY_ROLLUP = pd.DataFrame(columns=["user_id", "date", *ROLLUP_COLUMNS])
+
+
+class SQLRollupStore:
+    """
+    EVENTS 테이블과 같은 DB(Oracle/SQLite)에 일/주/월 롤업 테이블을 유지합니다.
+
+    워터마크는 반영한 가장 큰 EVENTS.ID이지만, ID는 커밋 순서가 아니라 발급 순서이므로 갱신할 때마다
+    워터마크 아래 late_window개 ID 구간을 다시 읽고 그 구간에서 이미 반영한 ID(ROLLUP_SEEN)는 건너뜁니다.
+    제한: 워터마크보다 late_window 이상 작은 ID로 늦게 커밋된 이벤트는 반영되지 않으므로
+    그런 지연이 가능하면 late_window를 늘리거나 롤업을 다시 만들어야 합니다.
+    """
+
+    WATERMARK = "EVENTS"
+
+    def __init__(self, engine, late_window: int = ROLLUP_LATE_ID_WINDOW):
+        self.engine = engine
+        self.late_window = max(0, int(late_window))
+        self.dialect = engine.dialect.name
+        if self.dialect not in ("oracle", "sqlite"):
+            raise ValueError(f"unsupported rollup dialect: {self.dialect}")
+        self._initialize_tables()
+
+    def _table_exists(self, conn, table: str) -> bool:
+        if self.dialect == "sqlite":
+            sql = f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = '{table}'"
+        else:
+            sql = f"SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = '{table}'"
+        return bool(conn.exec_driver_sql(sql).scalar())
+
+    def _initialize_tables(self):
+        rollup_ddl = _SQLITE_ROLLUP_DDL if self.dialect == "sqlite" else _ORACLE_ROLLUP_DDL
+        watermark_ddl = _SQLITE_WATERMARK_DDL if self.dialect == "sqlite" else _ORACLE_WATERMARK_DDL
+        hist_ddl = _SQLITE_HIST_DDL if self.dialect == "sqlite" else _ORACLE_HIST_DDL
+        seen_ddl = _SQLITE_SEEN_DDL if self.dialect == "sqlite" else _ORACLE_SEEN_DDL
+        with self.engine.begin() as conn:
+            had_daily = self._table_exists(conn, _SQL_TABLES["day"])
+            created = []
+            for level, table in _SQL_TABLES.items():
+                if not self._table_exists(conn, table):
+                    conn.exec_driver_sql(rollup_ddl.format(table=table))
+                    created.append(level)
+            if not self._table_exists(conn, "ROLLUP_WATERMARK"):
+                conn.exec_driver_sql(watermark_ddl)
+            if not self._table_exists(conn, "ROLLUP_SEEN"):
+                conn.exec_driver_sql(seen_ddl)
+                # 예전 방식(워터마크 이하 전부 반영됨)으로 쌓인 롤업: 확인 구간의 ID를 반영한 것으로 기록
+                last = self._watermark(conn)
+                conn.execute(text(
+                    """
+                    INSERT INTO ROLLUP_SEEN (NAME, EVENT_ID)
+                    SELECT :name, ID FROM EVENTS WHERE ID > :low AND ID <= :last
+                    """
+                ), {"name": self.WATERMARK, "low": last - self.late_window, "last": last})
+            hist_created = []
+            for level, table in _HIST_TABLES.items():
+                if not self._table_exists(conn, table):
+                    conn.exec_driver_sql(hist_ddl.format(table=table))
+                    hist_created.append(level)
+            if "day" in hist_created:
+                # 이미 롤업된 이벤트의 온도 분포는 워터마크까지 EVENTS를 다시 읽어 채움
+                self._backfill_histogram(conn, self._watermark(conn), hist_created)
+            elif hist_created:
+                daily_hist = self._read_all_hist_days(conn)
+                for level in hist_created:
+                    self._upsert_histogram(conn, hist_to_level(daily_hist, level), level)
+
+            # 일별 롤업만 있던 DB에 주/월 테이블이 새로 생기면 기존 일별 행으로 채움
+            if had_daily and created:
+                daily = self._read_all_days(conn)
+                for level in created:
+                    self._upsert(conn, to_level(daily, level), level)
+
+    def _backfill_histogram(self, conn, upto: int, levels: List[str], batch_size: int = ROLLUP_BATCH_SIZE):
+        # 롤업에 반영된 이벤트만: 확인 구간 아래 ID 전부 + 확인 구간에서 ROLLUP_SEEN에 있는 ID
+        seen = self._seen_ids(conn)
+        low = upto - self.late_window
+        after = 0
+        while after < upto:
+            events = self._fetch_events(conn, after, batch_size)
+            if events.empty:
+                return
+            ids = events["id"]
+            hist = daily_temp_histogram(events[(ids <= low) | ((ids <= upto) & ids.isin(seen))])
+            for level in levels:
+                self._upsert_histogram(conn, hist_to_level(hist, level), level)
+            after = int(events["id"].max())
+
+    def _read_all_hist_days(self, conn) -> pd.DataFrame:
+        rows = conn.execute(text(
+            f"SELECT USER_ID, EVENT_DAY, TEMP_BIN, EVENT_COUNT FROM {_HIST_TABLES['day']}"
+        )).all()
+        return pd.DataFrame(
+            [{"user_id": r[0], "date": _as_date(r[1]), "bin": int(r[2]), "count": int(r[3])} for r in rows],
+            columns=["user_id", "date", "bin", "count"],
+        )
+
+    def _read_all_days(self, conn) -> pd.DataFrame:
+        rows = conn.execute(text(
+            f"SELECT USER_ID, EVENT_DAY, {', '.join(_SQL_COLUMNS.values())} FROM {_SQL_TABLES['day']}"
+        )).all()
+        return self._frame(rows)
+
+    @staticmethod
+    def _frame(rows) -> pd.DataFrame:
+        return _rollup_frame([
+            {"user_id": r[0], "date": _as_date(r[1]), **dict(zip(_SQL_COLUMNS, r[2:]))}
+            for r in rows
+        ])
+
+    def _day(self, day: date):
+        # SQLite는 ISO 문자열, Oracle은 DATE로 저장
+        return day.isoformat() if self.dialect == "sqlite" else day
+
+    def _watermark(self, conn) -> int:
+        last = conn.execute(text(
+            "SELECT LAST_ID FROM ROLLUP_WATERMARK WHERE NAME = :name"
+        ), {"name": self.WATERMARK}).scalar()
+        return int(last) if last is not None else 0
+
+    def _set_watermark(self, conn, last_id: int):
+        if self.dialect == "sqlite":
+            sql = """
+                INSERT INTO ROLLUP_WATERMARK (NAME, LAST_ID) VALUES (:name, :last_id)
+                ON CONFLICT(NAME) DO UPDATE SET LAST_ID = excluded.LAST_ID
+            """
+        else:
+            sql = """
+                MERGE INTO ROLLUP_WATERMARK t
+                USING (SELECT :name AS NAME FROM dual) s
+                ON (t.NAME = s.NAME)
+                WHEN MATCHED THEN UPDATE SET t.LAST_ID = :last_id
+                WHEN NOT MATCHED THEN INSERT (NAME, LAST_ID) VALUES (:name, :last_id)
+            """
+        conn.execute(text(sql), {"name": self.WATERMARK, "last_id": int(last_id)})
+
+    def _seen_ids(self, conn) -> set:
+        return set(conn.execute(text(
+            "SELECT EVENT_ID FROM ROLLUP_SEEN WHERE NAME = :name"
+        ), {"name": self.WATERMARK}).scalars().all())
+
+    def _mark_seen(self, conn, ids: List[int], last_id: int):
+        """반영한 ID 중 새 확인 구간(last_id - late_window, last_id]에 드는 것만 기록하고, 구간 아래 기록은 지웁니다."""
+        low = last_id - self.late_window
+        params = [{"name": self.WATERMARK, "id": int(i)} for i in ids if i > low]
+        if params:
+            conn.execute(text("INSERT INTO ROLLUP_SEEN (NAME, EVENT_ID) VALUES (:name, :id)"), params)
+        conn.execute(text(
+            "DELETE FROM ROLLUP_SEEN WHERE NAME = :name AND EVENT_ID <= :low"
+        ), {"name": self.WATERMARK, "low": low})
+
+    def _fetch_events(self, conn, after_id: int, limit: int, unseen: bool = False) -> pd.DataFrame:
+        """ID > after_id인 이벤트를 ID순으로 limit개 읽습니다. unseen이면 ROLLUP_SEEN에 있는 ID는 제외합니다."""
+        # 리포트에 필요한 열만 읽음 (RAW_TEXT/SUGGESTION/SCORES_JSON CLOB 제외)
+        limit_clause = "LIMIT :lim" if self.dialect == "sqlite" else "FETCH FIRST :lim ROWS ONLY"
+        seen_clause = (
+            "AND NOT EXISTS (SELECT 1 FROM ROLLUP_SEEN s WHERE s.NAME = :name AND s.EVENT_ID = e.ID)"
+            if unseen else ""
+        )
+        df = pd.read_sql(text(
+            f"""
+            SELECT ID AS id, USER_ID AS user_id, CREATED_AT AS created_at,
+                   CASE WHEN SUGGESTION IS NULL THEN 0 ELSE 1 END AS has_suggestion,
+                   SENT_CHOICE AS sent_choice, HATE AS hate, AGGRESSION AS aggression, TEMP_C AS temp_c
+            FROM EVENTS e
+            WHERE ID > :after {seen_clause}
+            ORDER BY ID
+            {limit_clause}
+            """
+        ), conn, params={"after": int(after_id), "lim": int(limit), "name": self.WATERMARK})
+        df.columns = [c.lower() for c in df.columns]
+        return df
+
+    def _upsert(self, conn, rows: pd.DataFrame, level: str = "day"):
+        table = _SQL_TABLES[level]
+        cols = list(_SQL_COLUMNS.values())
+        if self.dialect == "sqlite":
+            sql = f"""
+                INSERT INTO {table} (USER_ID, EVENT_DAY, {", ".join(cols)})
+                VALUES (:uid, :day, {", ".join(":" + k for k in _SQL_COLUMNS)})
+                ON CONFLICT(USER_ID, EVENT_DAY) DO UPDATE SET
+                  {", ".join(f"{c} = {c} + excluded.{c}" for c in cols)}
+            """
+        else:
+            sql = f"""
+                MERGE INTO {table} t
+                USING (SELECT :uid AS USER_ID, :day AS EVENT_DAY FROM dual) s
+                ON (t.USER_ID = s.USER_ID AND t.EVENT_DAY = s.EVENT_DAY)
+                WHEN MATCHED THEN UPDATE SET
+                  {", ".join(f"t.{c} = t.{c} + :{k}" for k, c in _SQL_COLUMNS.items())}
+                WHEN NOT MATCHED THEN INSERT (USER_ID, EVENT_DAY, {", ".join(cols)})
+                  VALUES (:uid, :day, {", ".join(":" + k for k in _SQL_COLUMNS)})
+            """
+        params = [
+            {"uid": str(r["user_id"]), "day": self._day(r["date"]),
+             **{k: (float(r[k]) if k == "temp_sum" else int(r[k])) for k in _SQL_COLUMNS}}
+            for r in rows.to_dict("records")
+        ]
+        if params:
+            conn.execute(text(sql), params)
+
+    def _upsert_histogram(self, conn, rows: pd.DataFrame, level: str = "day"):
+        table = _HIST_TABLES[level]
+        if self.dialect == "sqlite":
+            sql = f"""
+                INSERT INTO {table} (USER_ID, EVENT_DAY, TEMP_BIN, EVENT_COUNT)
+                VALUES (:uid, :day, :bin, :cnt)
+                ON CONFLICT(USER_ID, EVENT_DAY, TEMP_BIN) DO UPDATE SET EVENT_COUNT = EVENT_COUNT + excluded.EVENT_COUNT
+            """
+        else:
+            sql = f"""
+                MERGE INTO {table} t
+                USING (SELECT :uid AS USER_ID, :day AS EVENT_DAY, :bin AS TEMP_BIN FROM dual) s
+                ON (t.USER_ID = s.USER_ID AND t.EVENT_DAY = s.EVENT_DAY AND t.TEMP_BIN = s.TEMP_BIN)
+                WHEN MATCHED THEN UPDATE SET t.EVENT_COUNT = t.EVENT_COUNT + :cnt
+                WHEN NOT MATCHED THEN INSERT (USER_ID, EVENT_DAY, TEMP_BIN, EVENT_COUNT) VALUES (:uid, :day, :bin, :cnt)
+            """
+        params = [
+            {"uid": str(r["user_id"]), "day": self._day(r["date"]), "bin": int(r["bin"]), "cnt": int(r["count"])}
+            for r in rows.to_dict("records")
+        ]
+        if params:
+            conn.execute(text(sql), params)
+
+    def refresh(self, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+        """
+        아직 반영하지 않은 이벤트(워터마크 이후 + 워터마크 아래 late_window 구간에 늦게 커밋된 것)를 롤업에 더합니다.
+        배치마다 롤업 갱신, 반영 ID 기록, 워터마크 이동을 한 트랜잭션으로 처리하므로 중복 반영되지 않습니다.
+
+        Returns:
+            int: 새로 반영한 이벤트 수
+        """
+        processed = 0
+        while True:
+            with self.engine.begin() as conn:
+                last = self._watermark(conn)
+                events = self._fetch_events(conn, max(last - self.late_window, 0), batch_size, unseen=True)
+                if events.empty:
+                    return processed
+                rows = daily_rollup(events)
+                hist = daily_temp_histogram(events)
+                for level in LEVELS:
+                    self._upsert(conn, to_level(rows, level), level)
+                    self._upsert_histogram(conn, hist_to_level(hist, level), level)
+                last = max(last, int(events["id"].max()))
+                self._mark_seen(conn, events["id"].tolist(), last)
+                self._set_watermark(conn, last)
+            processed += len(events)
+            if len(events) < batch_size:
+                return processed
+
+    def read(self, user_id: str, start_day: date, end_day: date, level: str = "day") -> pd.DataFrame:
+        """버킷 시작일이 [start_day, end_day]인 level(day/week/month) 롤업 행을 날짜순으로 반환합니다."""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                f"""
+                SELECT USER_ID, EVENT_DAY, {", ".join(_SQL_COLUMNS.values())}
+                FROM {_SQL_TABLES[level]}
+                WHERE USER_ID = :uid AND EVENT_DAY BETWEEN :s AND :e
+                ORDER BY EVENT_DAY
+                """
+            ), {"uid": user_id, "s": self._day(start_day), "e": self._day(end_day)}).all()
+        return self._frame(rows)
+
+    def read_histogram(self, user_id: str, start_day: date, end_day: date) -> TempHistogram:
+        """[start_day, end_day] 이벤트 온도 히스토그램 (구간별 합계는 DB에서 계산, 최대 구간 수만큼의 행만 전송)."""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                """
+                SELECT TEMP_BIN, SUM(EVENT_COUNT)
+                FROM USER_DAILY_TEMP_HIST
+                WHERE USER_ID = :uid AND EVENT_DAY BETWEEN :s AND :e
+                GROUP BY TEMP_BIN
+                """
+            ), {"uid": user_id, "s": self._day(start_day), "e": self._day(end_day)}).all()
+        return TempHistogram.from_bin_counts([r[0] for r in rows], [r[1] for r in rows])
+
+    def read_histograms(self, user_id: str, start_day: date, end_day: date,
+                        level: str = "day") -> Dict[date, np.ndarray]:
+        """버킷 시작일이 [start_day, end_day]인 level 버킷별 온도 구간 건수 {버킷 시작일: (N_BINS,)}."""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                f"""
+                SELECT EVENT_DAY, TEMP_BIN, EVENT_COUNT
+                FROM {_HIST_TABLES[level]}
+                WHERE USER_ID = :uid AND EVENT_DAY BETWEEN :s AND :e
+                """
+            ), {"uid": user_id, "s": self._day(start_day), "e": self._day(end_day)}).all()
+        return _hist_arrays((_as_date(r[0]), int(r[1]), int(r[2])) for r in rows)
+
+
+class FirestoreRollupStore:
+    """
+    Firestore 롤업: users/{uid}/{daily,weekly,monthly}_rollups/{버킷 시작일} 문서에 합계를 Increment로 누적합니다.
+    워터마크는 users/{uid}/rollup_state/events 문서의 마지막 createdAt과, 그 이전 late_seconds 안에서
+    이미 반영한 이벤트 문서 ID(recentIds)입니다. 갱신할 때마다 createdAt >= 워터마크 - late_seconds를 다시 읽고
+    recentIds에 있는 문서는 건너뛰므로 같은 createdAt의 문서나 조금 늦게 쓰인 문서도 빠지지 않습니다.
+    제한: 워터마크보다 late_seconds 이상 이른 createdAt으로 늦게 쓰인 문서는 반영되지 않습니다.
+    """
+
+    COLLECTIONS = {"day": "daily_rollups", "week": "weekly_rollups", "month": "monthly_rollups"}
+
+    def __init__(self, db, late_seconds: float = ROLLUP_LATE_SECONDS):
+        self.db = db
+        self.late_window = timedelta(seconds=max(0.0, float(late_seconds)))
+
+    def _user(self, user_id: str):
+        return self.db.collection('users').document(user_id)
+
+    def _since(self, last):
+        return last - self.late_window if isinstance(last, datetime) else last
+
+    def refresh(self, user_id: str, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+        """아직 반영하지 않은 users/{uid}/events 문서를 롤업에 더합니다. 반환: 반영한 이벤트 수"""
+        from firebase_db import event_row
+
+        user = self._user(user_id)
+        events_ref = user.collection('events')
+        state_ref = user.collection('rollup_state').document('events')
+        processed = 0
+        while True:
+            state = state_ref.get()
+            state_data = state.to_dict() if state.exists else {}
+            last = state_data.get('createdAt')
+            if last is not None and not (state_data.get('levels') and state_data.get('hist_levels')):
+                # 일별 롤업(또는 일별 온도 히스토그램)만 있던 사용자: 주/월 문서를 일별 문서로 채움
+                self._backfill_levels(user_id, state_ref, rollup=not state_data.get('levels'))
+
+            recent = dict(state_data.get('recentIds') or {})
+            query = events_ref.order_by('createdAt')
+            if last is not None:
+                if 'recentIds' not in state_data:
+                    # 예전 워터마크(createdAt 이하 전부 반영됨): 확인 구간의 문서를 반영한 것으로 기록
+                    recent = {d.id: d.to_dict().get('createdAt') for d in
+                              events_ref.where('createdAt', '>=', self._since(last))
+                              .where('createdAt', '<=', last).stream()}
+                query = query.where('createdAt', '>=', self._since(last))
+            # 이미 반영한 문서가 섞여도 새 문서를 batch_size개까지 받도록 그만큼 더 읽음
+            limit = batch_size + len(recent)
+            docs = list(query.limit(limit).stream())
+            fresh = [d for d in docs if d.id not in recent]
+            if not fresh:
+                return processed
+
+            events = to_frame([event_row(d.id, d.to_dict(), user_id) for d in fresh], Event)
+            rows = daily_rollup(events)
+
+            newest = docs[-1].to_dict().get('createdAt')
+            if last is not None and (newest is None or newest < last):
+                newest = last
+            recent.update((d.id, d.to_dict().get('createdAt')) for d in fresh)
+            since = self._since(newest)
+            recent = {k: v for k, v in recent.items() if v is not None and v >= since}
+
+            # 롤업 증가분과 워터마크를 한 배치로 커밋 (merge 필드 목록: recentIds 맵을 통째로 바꿔 오래된 ID 제거)
+            batch = self.db.batch()
+            hist = daily_temp_histogram(events)
+            for level in LEVELS:
+                self._add_increments(batch, user, to_level(rows, level), level, hist_to_level(hist, level))
+            batch.set(state_ref, {"createdAt": newest, "recentIds": recent,
+                                  "levels": list(LEVELS), "hist_levels": list(LEVELS)},
+                      merge=["createdAt", "recentIds", "levels", "hist_levels"])
+            batch.commit()
+
+            processed += len(fresh)
+            if len(docs) < limit:
+                return processed
+
+    def _add_increments(self, batch, user, rows: pd.DataFrame, level: str, hist: Optional[pd.DataFrame] = None):
+        """
+        롤업 행을 문서에 Increment로 더합니다. hist(같은 단위의 온도 히스토그램 행)가 주어지면
+        문서의 temp_hist 맵(구간 번호 → 이벤트 수)도 같은 쓰기로 더합니다.
+        rows가 비어 있으면 temp_hist만 더합니다.
+        """
+        from firebase_admin import firestore
+
+        by_day = {d: g for d, g in hist.groupby("date")} if hist is not None and not hist.empty else {}
+        docs: Dict[date, Dict[str, Any]] = {}
+        for r in rows.to_dict("records"):
+            docs[r["date"]] = {
+                "date": r["date"].isoformat(),
+                **{k: firestore.Increment(float(r[k]) if k == "temp_sum" else int(r[k])) for k in ROLLUP_COLUMNS},
+            }
+        for d, g in by_day.items():
+            doc = docs.setdefault(d, {"date": d.isoformat()})
+            doc["temp_hist"] = {str(int(b)): firestore.Increment(int(c)) for b, c in zip(g["bin"], g["count"])}
+        for d, doc in docs.items():
+            batch.set(user.collection(self.COLLECTIONS[level]).document(d.isoformat()), doc, merge=True)
+
+    def read_histogram(self, user_id: str, start_day: date, end_day: date) -> TempHistogram:
+        """[start_day, end_day] 일별 롤업 문서의 temp_hist를 합친 이벤트 온도 히스토그램."""
+        docs = (self._user(user_id).collection(self.COLLECTIONS["day"])
+                .where('date', '>=', start_day.isoformat())
+                .where('date', '<=', end_day.isoformat())
+                .select(['temp_hist'])
+                .stream())
+        bins, counts = [], []
+        for doc in docs:
+            for b, c in (doc.to_dict().get("temp_hist") or {}).items():
+                bins.append(int(b))
+                counts.append(int(c))
+        return TempHistogram.from_bin_counts(bins, counts)
+
+    def read_histograms(self, user_id: str, start_day: date, end_day: date,
+                        level: str = "day") -> Dict[date, np.ndarray]:
+        """버킷 시작일이 [start_day, end_day]인 level 문서별 temp_hist {버킷 시작일: (N_BINS,)}."""
+        docs = (self._user(user_id).collection(self.COLLECTIONS[level])
+                .where('date', '>=', start_day.isoformat())
+                .where('date', '<=', end_day.isoformat())
+                .select(['date', 'temp_hist'])
+                .stream())
+        return _hist_arrays(
+            (_as_date(data.get("date")), int(b), int(c))
+            for data in (doc.to_dict() for doc in docs)
+            for b, c in (data.get("temp_hist") or {}).items()
+        )
+
+    def _backfill_levels(self, user_id: str, state_ref, rollup: bool = True):
+        user = self._user(user_id)
+        snaps = list(user.collection(self.COLLECTIONS["day"]).stream())
+        daily = self._frame(user_id, snaps) if rollup else _EMPTY_ROLLUP
+        hist = pd.DataFrame(
+            [{"date": _as_date(d.get("date")), "bin": int(b), "count": int(c)}
+             for d in (s.to_dict() for s in snaps) for b, c in (d.get("temp_hist") or {}).items()],
+            columns=["date", "bin", "count"],
+        )
+        batch = self.db.batch()
+        for level in LEVELS[1:]:
+            self._add_increments(batch, user, to_level(daily, level), level, hist_to_level(hist, level))
+        batch.set(state_ref, {"levels": list(LEVELS), "hist_levels": list(LEVELS)}, merge=True)
+        batch.commit()
+
+    @staticmethod
+    def _frame(user_id: str, docs) -> pd.DataFrame:
+        rows = []
+        for doc in docs:
+            data = doc.to_dict()
+            rows.append({"user_id": user_id, "date": _as_date(data.get("date")),
+                         **{k: data.get(k, 0) for k in ROLLUP_COLUMNS}})
+        return _rollup_frame(rows)
+
+    def read(self, user_id: str, start_day: date, end_day: date, level: str = "day") -> pd.DataFrame:
+        """버킷 시작일이 [start_day, end_day]인 level(day/week/month) 롤업 문서를 날짜순으로 반환합니다."""
+        docs = (self._user(user_id).collection(self.COLLECTIONS[level])
+                .where('date', '>=', start_day.isoformat())
+                .where('date', '<=', end_day.isoformat())
+                .order_by('date')
+                .stream())
+        return self._frame(user_id, docs)
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date) and not hasattr(value, "hour"):
+        return value
+    if hasattr(value, "date"):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+
+def _hist_arrays(cells) -> Dict[date, np.ndarray]:
+    """(버킷 시작일, 구간 번호, 건수) 셀들 → {버킷 시작일: (N_BINS,) 건수}"""
+    out: Dict[date, np.ndarray] = {}
+    for day, b, c in cells:
+        if day not in out:
+            out[day] = np.zeros(N_BINS, dtype=np.int64)
+        out[day][b] += c
+    return out
+
+
+def _rollup_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    if not rows:
+        return _EMPTY_ROLLUP.copy()
+    df = pd.DataFrame(rows)
+    for k in ROLLUP_COLUMNS:
+        df[k] = pd.to_numeric(df[k]).astype("float64" if k == "temp_sum" else "int64")
+    return df
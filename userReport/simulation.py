@@ -4,12 +4,13 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List
 from config import KST
+from records import Comment
 from utils import map_temp
 
 
-def generate_simulation_comments() -> List[Dict[str, Any]]:
+def generate_simulation_comments() -> List[Comment]:
     """시뮬레이션용 댓글 데이터를 생성합니다."""
     sim_comments = [
         {"text": "뭐 이런 걸 올려? 진짜 수준 바닥이네 ㅅㅂ.", "level": "warn"},
@@ -34,14 +35,14 @@ def generate_simulation_comments() -> List[Dict[str, Any]]:
             sim_temp = 36.8
             sim_harm = False
 
-        items.append({
-            "id": i,
-            "author": f"user{i:02d}",
-            "text": c["text"],
-            "dt": datetime.now(KST),
-            "sim_temp": sim_temp,
-            "sim_harm": sim_harm,
-        })
+        items.append(Comment(
+            id=i,
+            author=f"user{i:02d}",
+            text=c["text"],
+            dt=datetime.now(KST),
+            sim_temp=sim_temp,
+            sim_harm=sim_harm,
+        ))
 
     return items
 
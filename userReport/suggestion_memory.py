@@ -0,0 +1,198 @@
+# suggestion_memory.py
+# -*- coding: utf-8 -*-
+
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from local_model import HashingVectorizer
+from config import (
+    SUGGESTION_MEMORY_CAPACITY, SUGGESTION_MEMORY_DIM, SUGGESTION_MEMORY_THRESHOLD,
+    SUGGESTION_MEMORY_IVF_LISTS, SUGGESTION_MEMORY_IVF_PROBES, SUGGESTION_MEMORY_IVF_MIN_SIZE
+)
+
+
+class SuggestionMemory:
+    """
+    유사 댓글 순화 제안 재사용 메모리.
+
+    (댓글 벡터, 제안) 쌍을 저장하고, 새 댓글과 코사인 유사도가 threshold 이상인
+    이전 댓글이 있으면 그 제안을 돌려줍니다.
+
+    - 임베딩: 문자 2~3-gram 해싱 TF × 저장 항목 기준 IDF
+    - 검색: NumPy 전수 top-k, 항목이 많으면 IVF(k-means 분할) 근사 검색
+    - 추가: 새 행만 현재 IDF로 가중해 가장 가까운 IVF 중심에 배정. 추가가 많이 쌓여 IDF가 달라졌을 때만
+      전체 가중치를 다시 계산하고 IVF를 다시 학습
+    - 용량 초과 시 가장 오래 사용되지 않은 항목부터 제거
+    """
+
+    def __init__(self, capacity: int = SUGGESTION_MEMORY_CAPACITY, dim: int = SUGGESTION_MEMORY_DIM,
+                 threshold: float = SUGGESTION_MEMORY_THRESHOLD, ivf_lists: int = SUGGESTION_MEMORY_IVF_LISTS,
+                 ivf_probes: int = SUGGESTION_MEMORY_IVF_PROBES, ivf_min_size: int = SUGGESTION_MEMORY_IVF_MIN_SIZE):
+        self.capacity = max(1, int(capacity))
+        self.dim = int(dim)
+        self.threshold = float(threshold)
+        self.ivf_lists = int(ivf_lists)
+        self.ivf_probes = max(1, int(ivf_probes))
+        self.ivf_min_size = int(ivf_min_size)
+
+        self._vectorizer = HashingVectorizer(self.dim, (2, 3))
+        self._tf = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        self._df = np.zeros(self.dim, dtype=np.float32)
+        self._used = np.zeros(self.capacity, dtype=bool)
+        self._last_used = np.zeros(self.capacity, dtype=np.int64)
+        self._texts: List[Optional[str]] = [None] * self.capacity
+        self._suggestions: List[Optional[str]] = [None] * self.capacity
+        self._clock = 0
+
+        # 검색용 가중 행렬(_weight_idf로 가중)/IVF. 첫 조회와 IDF가 많이 달라진 뒤의 조회 때만 전체를 다시 만듭니다
+        self._weighted = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        self._weight_idf: Optional[np.ndarray] = None
+        self._centroids = None
+        self._assign = np.full(self.capacity, -1, dtype=np.int64)
+        self._inserts_since_rebuild = 0
+
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "inserts": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return int(self._used.sum())
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """텍스트들을 (n, dim) TF 벡터(부호 없는 빈도)로 변환합니다."""
+        indptr, indices, data = self._vectorizer.transform(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        np.add.at(out, (rows, indices), np.abs(data))
+        return out
+
+    def _idf(self) -> np.ndarray:
+        n = float(self._used.sum())
+        return (np.log((n + 1.0) / (self._df + 1.0)) + 1.0).astype(np.float32)
+
+    @staticmethod
+    def _normalize(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return m / norms
+
+    def _needs_rebuild(self) -> bool:
+        if self._weight_idf is None:
+            return True
+        n = len(self)
+        if self._centroids is None and 0 < self.ivf_lists and self.ivf_min_size <= n:
+            return True
+        # 추가가 많이 쌓이면 IDF와 분할이 달라지므로 다시 가중하고 k-means를 다시 돌림
+        return self._inserts_since_rebuild > max(64, n // 4)
+
+    def _rebuild(self):
+        """사용 중인 행을 현재 IDF로 다시 가중하고 IVF를 다시 학습합니다."""
+        self._weight_idf = self._idf()
+        slots = np.flatnonzero(self._used)
+        self._weighted[slots] = self._normalize(self._tf[slots] * self._weight_idf)
+        self._inserts_since_rebuild = 0
+
+        if self.ivf_lists <= 0 or len(slots) < self.ivf_min_size:
+            self._centroids = None
+            self._assign[:] = -1
+        else:
+            self._build_ivf()
+
+    def _build_ivf(self, iterations: int = 8):
+        """사용 중인 벡터로 구면 k-means를 돌려 IVF 리스트를 만듭니다."""
+        slots = np.flatnonzero(self._used)
+        x = self._weighted[slots]
+        k = min(self.ivf_lists, len(slots))
+        rng = np.random.default_rng(0)
+        centroids = x[rng.choice(len(slots), size=k, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(x @ centroids.T, axis=1)
+            for c in range(k):
+                members = x[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+
+        self._centroids = centroids
+        self._assign[:] = -1
+        self._assign[slots] = np.argmax(x @ centroids.T, axis=1)
+
+    def search(self, text: str, k: int = 1) -> List[Tuple[float, str, str]]:
+        """가장 유사한 k개의 (유사도, 원문, 제안)을 반환합니다."""
+        with self._lock:
+            return [(s, self._texts[i], self._suggestions[i]) for s, i in self._search(text, k)]
+
+    def _search(self, text: str, k: int) -> List[Tuple[float, int]]:
+        if not self._used.any():
+            return []
+        if self._needs_rebuild():
+            self._rebuild()
+
+        q = self._normalize(self._embed([text])[0] * self._weight_idf)
+        if self._centroids is not None:
+            probes = np.argsort(-(self._centroids @ q))[:self.ivf_probes]
+            candidates = np.flatnonzero(np.isin(self._assign, probes))
+        else:
+            candidates = np.flatnonzero(self._used)
+        if len(candidates) == 0:
+            return []
+
+        sims = self._weighted[candidates] @ q
+        k = min(k, len(candidates))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(float(sims[i]), int(candidates[i])) for i in top]
+
+    def lookup(self, text: str) -> Optional[str]:
+        """유사도가 threshold 이상인 이전 댓글의 제안을 반환합니다. 없으면 None."""
+        with self._lock:
+            self.stats["lookups"] += 1
+            found = self._search(text, 1)
+            if not found or found[0][0] < self.threshold:
+                return None
+            slot = found[0][1]
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            self.stats["hits"] += 1
+            return self._suggestions[slot]
+
+    def add(self, text: str, suggestion: str):
+        """(댓글, 제안) 쌍을 저장합니다. 가득 차면 가장 오래 사용되지 않은 항목을 제거합니다."""
+        vec = self._embed([text])[0]
+        with self._lock:
+            free = np.flatnonzero(~self._used)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._df -= (self._tf[slot] > 0)
+                self.stats["evictions"] += 1
+
+            self._tf[slot] = vec
+            self._df += (vec > 0)
+            self._used[slot] = True
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            self._texts[slot] = text
+            self._suggestions[slot] = suggestion
+            if self._weight_idf is not None:
+                # 새 행만 가중하고 기존 IVF 중심에 배정 (전체 재계산은 _needs_rebuild일 때만)
+                row = self._normalize(vec * self._weight_idf)
+                self._weighted[slot] = row
+                if self._centroids is not None:
+                    self._assign[slot] = int(np.argmax(self._centroids @ row))
+            self._inserts_since_rebuild += 1
+            self.stats["inserts"] += 1
+
+    def hit_rate(self) -> float:
+        """조회 대비 재사용 비율(0-1)을 반환합니다."""
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def snapshot_stats(self) -> Dict[str, float]:
+        """현재 통계(크기, 적중률 포함)를 반환합니다."""
+        with self._lock:
+            return {**self.stats, "size": len(self), "hit_rate": self.hit_rate()}
+
+
+# 전역 제안 메모리
+suggestion_memory = SuggestionMemory()
@@ -0,0 +1,219 @@
+# temp_histogram.py
+# -*- coding: utf-8 -*-
+"""
+임계값 what-if용 온도 히스토그램.
+
+온도(36.5~40.0°C)를 TEMP_HIST_STEP(0.01°C) 구간으로 나눠 구간별 댓글 수, 주의 배지 대상 수,
+사유 합계를 들고 있습니다. 임의의 (주의, 경고) 임계값 쌍에 대한 유해 댓글 수, 게시글 온도,
+배지 분포를 댓글을 다시 분석하지 않고 누적합 조회로 계산합니다.
+
+    hist = TempHistogram.from_columns(temps, eligible, reasons)
+    hist.what_if(37.8, 39.0)  # {"total", "harmful", "harm_rate", "post_temp", "norm_reasons", "badges"}
+    hist.quantiles()          # {"p50": 37.41, "p90": 38.77, "p99": 39.62}
+
+온도는 소수 둘째 자리로 반올림된 값이므로 0.01°C 구간 히스토그램은 그대로 정확한 분위수 요약이 되고,
+구간별 합으로 게시글/날짜/사용자끼리 병합해도 오차가 생기지 않습니다.
+"""
+
+import numpy as np
+from typing import Any, Dict
+
+from post_aggregate import REASON_KEYS
+from config import MIN_TEMP, TEMP_RANGE, TEMP_HIST_STEP, TEMP_QUANTILES
+
+N_BINS = int(round(TEMP_RANGE / TEMP_HIST_STEP)) + 1
+
+
+def temp_bins(temps) -> np.ndarray:
+    """온도 배열을 구간 번호(0 = 36.5°C)로 바꿉니다. 범위 밖은 양 끝 구간으로 자릅니다."""
+    t = np.asarray(temps, dtype=np.float64)
+    return np.clip(np.round((t - MIN_TEMP) / TEMP_HIST_STEP), 0, N_BINS - 1).astype(np.int64)
+
+
+def threshold_bin(temp: float) -> int:
+    """temp 이상인 온도가 시작되는 구간 번호 (temp_c >= temp 비교와 같은 경계)."""
+    return int(np.clip(np.ceil(round((float(temp) - MIN_TEMP) / TEMP_HIST_STEP, 6)), 0, N_BINS))
+
+
+def quantile_label(q: float) -> str:
+    """0.9 → "p90", 0.99 → "p99"."""
+    return f"p{q * 100:g}"
+
+
+def quantiles_by_row(counts: np.ndarray, qs=TEMP_QUANTILES) -> Dict[str, np.ndarray]:
+    """
+    (그룹 수, N_BINS) 구간별 건수에서 행마다 분위수 온도를 구합니다.
+    pandas quantile(interpolation="lower")와 같은 정의(정렬된 값의 floor(q·(n-1))번째)이며 빈 행은 NaN입니다.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.int64))
+    cum = np.cumsum(counts, axis=1)
+    total = cum[:, -1] if cum.shape[1] else np.zeros(len(cum), dtype=np.int64)
+    out = {}
+    for q in qs:
+        k = np.floor(q * (total - 1))
+        b = (cum <= k[:, None]).sum(axis=1)
+        out[quantile_label(q)] = np.where(total > 0, np.round(MIN_TEMP + b * TEMP_HIST_STEP, 2), np.nan)
+    return out
+
+
+def quantiles_from_counts(counts, qs=TEMP_QUANTILES) -> Dict[str, float]:
+    """구간별 건수 하나(N_BINS,)의 분위수 {"p50": ..., "p90": ..., "p99": ...}."""
+    return {k: float(v[0]) for k, v in quantiles_by_row(counts, qs).items()}
+
+
+def quantile_from_counts(counts, q: float) -> float:
+    return quantiles_from_counts(counts, (q,))[quantile_label(q)]
+
+
+class TempHistogram:
+    """
+    온도 구간별 누적 집계.
+
+    - count: 구간별 댓글 수
+    - eligible: 주의 구간에 들면 '주의' 배지를 받는 댓글 수 (사유/점수 조건 충족 + 오탐 억제 통과)
+    - reasons: 구간별 사유 합계 (REASON_KEYS 순서)
+    - 시뮬레이션 댓글처럼 유해 여부가 임계값과 무관하게 정해진 댓글은 fixed_*로 따로 셉니다.
+    """
+
+    def __init__(self):
+        self.count = np.zeros(N_BINS, dtype=np.int64)
+        self.eligible = np.zeros(N_BINS, dtype=np.int64)
+        self.reasons = np.zeros((N_BINS, len(REASON_KEYS)), dtype=np.float64)
+        self.fixed = np.zeros(N_BINS, dtype=np.int64)          # 유해 여부 고정 댓글 수 (구간별)
+        self.fixed_harmful = 0
+        self.fixed_reasons = np.zeros(len(REASON_KEYS), dtype=np.float64)
+        self._cum = None
+
+    def __len__(self) -> int:
+        return int(self.count.sum())
+
+    @classmethod
+    def from_columns(cls, temps, eligible=None, reasons=None, fixed=None, fixed_harmful=None) -> "TempHistogram":
+        """댓글별 온도 (n,), 주의 배지 대상 여부 (n,), 사유 (n, 3), 유해 여부 고정 여부/값 (n,)으로 만듭니다."""
+        return cls().add(temps, eligible, reasons, fixed, fixed_harmful)
+
+    def add(self, temps, eligible=None, reasons=None, fixed=None, fixed_harmful=None,
+            weight: int = 1) -> "TempHistogram":
+        """댓글들을 더합니다 (weight=-1이면 뺍니다). eligible이 없으면 모두 대상으로 봅니다."""
+        bins = temp_bins(temps)
+        n = len(bins)
+        eligible = np.ones(n, dtype=bool) if eligible is None else np.asarray(eligible, dtype=bool)
+        reasons = (np.zeros((n, len(REASON_KEYS))) if reasons is None
+                   else np.asarray(reasons, dtype=np.float64).reshape(n, len(REASON_KEYS)))
+        fixed = np.zeros(n, dtype=bool) if fixed is None else np.asarray(fixed, dtype=bool)
+
+        self.count += weight * np.bincount(bins, minlength=N_BINS)
+        self.eligible += weight * np.bincount(bins[eligible], minlength=N_BINS)
+        self.fixed += weight * np.bincount(bins[fixed], minlength=N_BINS)
+        free = ~fixed
+        for k in range(len(REASON_KEYS)):
+            self.reasons[:, k] += weight * np.bincount(bins[free], weights=reasons[free, k], minlength=N_BINS)
+        if fixed.any() and fixed_harmful is not None:
+            harm = fixed & np.asarray(fixed_harmful, dtype=bool)
+            self.fixed_harmful += weight * int(harm.sum())
+            self.fixed_reasons += weight * reasons[harm].sum(axis=0)
+        self._cum = None
+        return self
+
+    def merge(self, other: "TempHistogram") -> "TempHistogram":
+        """다른 히스토그램(다른 게시글/날짜)을 더합니다."""
+        self.count += other.count
+        self.eligible += other.eligible
+        self.reasons += other.reasons
+        self.fixed += other.fixed
+        self.fixed_harmful += other.fixed_harmful
+        self.fixed_reasons += other.fixed_reasons
+        self._cum = None
+        return self
+
+    def _suffix(self):
+        """구간 b 이상의 합 (끝에 0 한 칸)을 한 번만 계산해 둡니다."""
+        if self._cum is None:
+            def suffix(a):
+                out = np.zeros((N_BINS + 1,) + a.shape[1:], dtype=a.dtype)
+                out[:-1] = np.cumsum(a[::-1], axis=0)[::-1]
+                return out
+            self._cum = {
+                "count": suffix(self.count),
+                "eligible": suffix(self.eligible),
+                "free": suffix(self.count - self.fixed),
+                "reasons": suffix(self.reasons),
+            }
+        return self._cum
+
+    def what_if(self, caution: float, warn: float) -> Dict[str, Any]:
+        """
+        (caution, warn) 임계값에서의 집계를 구간 누적합으로 계산합니다.
+
+        Returns:
+            dict: {"total", "harmful", "harm_rate", "post_temp", "norm_reasons",
+                   "badges": {"경고", "주의", "없음"}} — process_comments/PostAggregate와 같은 정의
+        """
+        cum = self._suffix()
+        c, w = threshold_bin(caution), threshold_bin(warn)
+        total = int(cum["count"][0])
+
+        harmful = int(cum["free"][c]) + self.fixed_harmful
+        reason_sums = cum["reasons"][c] + self.fixed_reasons
+        harm_rate = harmful / total if total else 0.0
+
+        warn_n = int(cum["count"][w])
+        caution_n = int(cum["eligible"][c] - cum["eligible"][max(c, w)]) if w > c else 0
+        if harmful > 0:
+            maxv = float(reason_sums.max()) or 1e-9
+            norm = {k: float(v) / maxv for k, v in zip(REASON_KEYS, reason_sums)}
+        else:
+            norm = {k: 0.0 for k in REASON_KEYS}
+        return {
+            "total": total,
+            "harmful": harmful,
+            "harm_rate": harm_rate,
+            "post_temp": round(MIN_TEMP + harm_rate * 3.5, 2),
+            "norm_reasons": norm,
+            "badges": {"경고": warn_n, "주의": caution_n, "없음": total - warn_n - caution_n},
+        }
+
+    def quantile(self, q: float) -> float:
+        """온도 분위수 (q: 0-1). 구간 폭이 0.01°C이므로 반올림된 온도에 대해 정확합니다."""
+        return quantile_from_counts(self.count, q)
+
+    def quantiles(self, qs=TEMP_QUANTILES) -> Dict[str, float]:
+        """{"p50": ..., "p90": ..., "p99": ...}"""
+        return quantiles_from_counts(self.count, qs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """0이 아닌 구간만 담은 직렬화 형식."""
+        nz = np.flatnonzero(self.count)
+        return {
+            "bins": nz.tolist(),
+            "count": self.count[nz].tolist(),
+            "eligible": self.eligible[nz].tolist(),
+            "fixed": self.fixed[nz].tolist(),
+            "reasons": self.reasons[nz].tolist(),
+            "fixed_harmful": self.fixed_harmful,
+            "fixed_reasons": self.fixed_reasons.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TempHistogram":
+        hist = cls()
+        bins = np.asarray(data.get("bins", []), dtype=np.int64)
+        if len(bins):
+            hist.count[bins] = data["count"]
+            hist.eligible[bins] = data.get("eligible", data["count"])
+            hist.fixed[bins] = data.get("fixed", [0] * len(bins))
+            hist.reasons[bins] = np.asarray(data.get("reasons", np.zeros((len(bins), len(REASON_KEYS)))),
+                                            dtype=np.float64).reshape(len(bins), len(REASON_KEYS))
+        hist.fixed_harmful = int(data.get("fixed_harmful", 0))
+        hist.fixed_reasons = np.asarray(data.get("fixed_reasons", [0.0] * len(REASON_KEYS)), dtype=np.float64)
+        return hist
+
+    @classmethod
+    def from_bin_counts(cls, bins, counts) -> "TempHistogram":
+        """(구간 번호, 이벤트 수) 쌍으로 만듭니다 (롤업 저장소에서 읽은 이벤트 온도 분포)."""
+        hist = cls()
+        bins = np.asarray(bins, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        np.add.at(hist.count, bins, counts)
+        np.add.at(hist.eligible, bins, counts)
+        return hist
@@ -0,0 +1,56 @@
+# test_async_analyzer.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+from async_analyzer import AsyncAnalyzer, SharedSemaphore, request_slots
+
+
+def test_shared_semaphore_limits_across_event_loops():
+    sem = SharedSemaphore(2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    async def work():
+        async with sem:
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    async def session():
+        await asyncio.gather(*(work() for _ in range(5)))
+
+    # run_sync처럼 스레드마다 따로 만든 이벤트 루프
+    threads = [threading.Thread(target=asyncio.run, args=(session(),)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+    assert sem._available == 2
+
+
+def test_cancelled_waiter_does_not_leak_a_permit():
+    sem = SharedSemaphore(1)
+
+    async def main():
+        await sem.acquire()
+        waiter = asyncio.ensure_future(sem.acquire())
+        await asyncio.sleep(0)
+        sem.release()  # 허가를 넘겨받은 직후 취소
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.wait_for(sem.acquire(), 1.0)
+        sem.release()
+
+    asyncio.run(main())
+    assert sem._available == 1
+
+
+def test_analyzers_share_the_process_semaphore_by_default():
+    assert AsyncAnalyzer(None)._semaphore is request_slots
+    assert AsyncAnalyzer(None, concurrency=3)._semaphore is not request_slots
@@ -0,0 +1,102 @@
+# test_cache.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import cache
+from cache import AnalysisCache, make_cache_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(cache, "time", c)
+    return c
+
+
+def _disk(tmp_path, **kwargs):
+    return AnalysisCache(path=str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def _disk_keys(c):
+    return {k for (k,) in c._conn.execute("SELECT CACHE_KEY FROM ANALYSIS_CACHE")}
+
+
+def test_cache_key_ignores_whitespace_and_depends_on_version():
+    assert make_cache_key("  안녕   하세요 ", "v1") == make_cache_key("안녕 하세요", "v1")
+    assert make_cache_key("안녕 하세요", "v1") != make_cache_key("안녕 하세요", "v2")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    c = AnalysisCache(path=None, memory_size=2)
+    c.set("a", {"v": 1})
+    c.set("b", {"v": 2})
+    assert c.get("a") == {"v": 1}  # a를 최근 사용으로
+    c.set("c", {"v": 3})
+    assert c.get("b") is None
+    assert c.get("a") == {"v": 1} and c.get("c") == {"v": 3}
+
+
+def test_disk_hit_is_promoted_to_memory_without_writing(tmp_path):
+    c = _disk(tmp_path, memory_size=1)
+    c.set("a", {"v": 1})
+    c.set("b", {"v": 2})  # a는 메모리에서 밀려나 디스크에만 있음
+
+    changes = c._conn.total_changes
+    assert c.get("a") == {"v": 1}
+    assert c._conn.total_changes == changes  # 접근 시각은 모아 두었다가 기록
+    assert c.get("a") == {"v": 1}
+    assert (c.stats["disk_hits"], c.stats["memory_hits"]) == (1, 1)
+
+
+def test_entries_expire_after_ttl_in_both_tiers(tmp_path, clock):
+    c = _disk(tmp_path, ttl=60)
+    c.set("a", {"v": 1})
+    clock.now += 30
+    assert c.get("a") == {"v": 1}
+
+    clock.now += 31
+    assert c.get("a") is None
+    c._memory.clear()
+    assert c.get("a") is None
+    c.flush()
+    assert _disk_keys(c) == set()
+
+
+def test_disk_size_is_enforced_every_n_writes_by_last_access(tmp_path, clock):
+    c = _disk(tmp_path, memory_size=0, disk_size=2, maintenance_every=3)
+    for key in ("a", "b"):
+        clock.now += 1
+        c.set(key, {"k": key})
+    clock.now += 1
+    assert c.get("a") == {"k": "a"}  # 디스크 접근으로 a가 b보다 최근
+
+    clock.now += 1
+    c.set("c", {"k": "c"})  # 세 번째 쓰기: 접근 시각 반영 후 정리
+    assert _disk_keys(c) == {"a", "c"}
+    assert c.stats["evictions"] == 1
+
+    clock.now += 1
+    c.set("d", {"k": "d"})  # 정리 주기 전에는 잠시 disk_size를 넘을 수 있음
+    assert _disk_keys(c) == {"a", "c", "d"}
+    c.flush()
+    assert _disk_keys(c) == {"c", "d"}
+
+
+def test_access_times_flush_in_batches(tmp_path):
+    c = _disk(tmp_path, memory_size=0, access_flush=2)
+    c.set("a", {"v": 1})
+    c.set("b", {"v": 2})
+    changes = c._conn.total_changes
+    c.get("a")
+    assert c._conn.total_changes == changes
+    c.get("b")
+    assert c._conn.total_changes == changes + 2
@@ -0,0 +1,35 @@
+# test_database.py
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from config import KST
+from database import get_user_events, iter_user_events
+
+# SQLite에는 UTC ISO 문자열로 저장됨: KST 1/1 23:59:59, 1/2 00:00:00, 1/2 23:59:59, 1/3 00:00:00
+UTC_TIMES = ["2024-01-01 14:59:59+00:00", "2024-01-01 15:00:00+00:00",
+             "2024-01-02 14:59:59+00:00", "2024-01-02 15:00:00+00:00"]
+
+
+@pytest.fixture
+def events_engine(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO EVENTS (CREATED_AT, USER_ID, RAW_TEXT) VALUES (:t, 'u1', 'x')"
+        ), [{"t": t} for t in UTC_TIMES])
+    return engine
+
+
+@pytest.mark.parametrize("start, end", [
+    (datetime(2024, 1, 2), datetime(2024, 1, 2, 23, 59, 59)),                                # 시간대 없음 = KST
+    (datetime(2024, 1, 2, tzinfo=KST), datetime(2024, 1, 2, 23, 59, 59, tzinfo=KST)),
+])
+def test_kst_day_bounds_select_events_of_that_kst_day(events_engine, start, end):
+    expected = UTC_TIMES[1:3]
+    assert sorted(get_user_events(events_engine, "u1", start, end)["created_at"]) == expected
+    chunks = list(iter_user_events(events_engine, "u1", start, end, chunksize=1))
+    assert sorted(pd.concat(chunks)["created_at"]) == expected
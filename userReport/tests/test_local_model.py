@@ -0,0 +1,74 @@
+# test_local_model.py
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+import local_model
+from local_model import HEADS, HashingVectorizer, LocalToxicityModel
+
+TOXIC = ["너 진짜 멍청하다", "멍청한 소리 그만해", "이런 멍청이 같으니", "진짜 한심하고 멍청해"]
+CLEAN = ["좋은 정보 감사합니다", "오늘도 좋은 하루 되세요", "정보 공유 감사해요", "좋은 글이네요 감사합니다"]
+
+
+def _model(n_features=1 << 12):
+    return LocalToxicityModel(HashingVectorizer(n_features, (1, 3)))
+
+
+def test_vectorizer_rows_are_l2_normalized_and_deterministic():
+    vec = HashingVectorizer(1 << 10, (1, 3))
+    indptr, indices, data = vec.transform(["안녕하세요", "", "ABC abc"])
+    assert list(np.diff(indptr)[:2] > 0) == [True, True]  # 빈 텍스트도 앞뒤 공백 n-gram은 있음
+    assert indices.min() >= 0 and indices.max() < 1 << 10
+    rows = np.repeat(np.arange(3), np.diff(indptr))
+    assert np.allclose(np.bincount(rows, weights=data * data), 1.0)
+
+    again = vec.transform(["안녕하세요"])
+    assert np.array_equal(again[1], indices[:indptr[1]]) and np.allclose(again[2], data[:indptr[1]])
+    # 대소문자/정규화가 같은 텍스트는 같은 벡터
+    upper, lower = vec.transform(["ABC"]), vec.transform(["abc"])
+    assert np.array_equal(upper[1], lower[1]) and np.allclose(upper[2], lower[2])
+
+
+def test_fit_separates_labels_and_masks_missing_heads():
+    texts = TOXIC + CLEAN
+    labels = np.full((len(texts), len(HEADS)), np.nan, dtype=np.float32)
+    labels[:, 0] = [1] * len(TOXIC) + [0] * len(CLEAN)  # toxicity만 라벨, 나머지 출력은 학습하지 않음
+    model = _model().fit(texts, labels, epochs=60, lr=0.5)
+
+    probs = model.predict(["멍청한 소리 하지마", "좋은 하루 감사합니다"])
+    assert probs.shape == (2, len(HEADS))
+    assert probs[0, 0] > 0.5 > probs[1, 0]
+    assert list(model.trained) == [True, False, False, False]
+    assert np.all(probs[:, 1:] == 0.0)
+    assert model.predict([]).shape == (0, len(HEADS))
+
+
+def test_save_load_round_trip(tmp_path):
+    texts = TOXIC + CLEAN
+    labels = np.zeros((len(texts), len(HEADS)), dtype=np.float32)
+    labels[:len(TOXIC)] = 1
+    model = _model().fit(texts, labels, epochs=5)
+
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = LocalToxicityModel.load(path)
+    assert loaded.vectorizer.n_features == model.vectorizer.n_features
+    assert loaded.vectorizer.ngram_range == model.vectorizer.ngram_range
+    assert np.array_equal(loaded.trained, model.trained)
+    assert np.allclose(loaded.predict(texts), model.predict(texts))
+
+
+def test_load_rejects_other_versions(tmp_path, monkeypatch):
+    path = str(tmp_path / "model.npz")
+    _model().save(path)
+    monkeypatch.setattr(local_model, "MODEL_VERSION", local_model.MODEL_VERSION + 1)
+    with pytest.raises(ValueError):
+        LocalToxicityModel.load(path)
+
+
+def test_get_local_model_is_none_without_weights(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_model, "LOCAL_MODEL_PATH", str(tmp_path / "missing.npz"))
+    monkeypatch.setattr(local_model, "_loaded_model", None)
+    monkeypatch.setattr(local_model, "_load_attempted", False)
+    assert local_model.get_local_model() is None
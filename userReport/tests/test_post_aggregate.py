@@ -0,0 +1,29 @@
+# test_post_aggregate.py
+# -*- coding: utf-8 -*-
+
+from post_aggregate import PostAggregate
+
+
+def _comment(cid, harmful, reasons=(0.0, 0.0, 0.0)):
+    return {"id": cid, "harmful": harmful, "reasons": dict(zip(("혐오", "조롱/모욕", "비하"), reasons))}
+
+
+def test_sync_rescores_existing_comments_whose_score_changed():
+    agg = PostAggregate("p1")
+    # 첫 렌더: 대체 경로 점수로 c2가 정상 처리됨
+    agg.sync([_comment(1, False), _comment(2, False)])
+    assert (agg.total, agg.harmful) == (2, 0)
+
+    # 다음 렌더: c2가 실제 점수를 받아 유해로 바뀜
+    agg.sync([_comment(1, False), _comment(2, True, (0.0, 1.0, 0.5))])
+    assert (agg.total, agg.harmful) == (2, 1)
+    assert agg.reason_sums == [0.0, 1.0, 0.5]
+    assert agg.post_temp == PostAggregate.from_columns([1, 2], [False, True], [[0, 0, 0], [0, 1, 0.5]]).post_temp
+
+
+def test_sync_adds_and_removes_comments():
+    agg = PostAggregate("p1")
+    agg.sync([_comment(1, True, (1.0, 0.0, 0.0)), _comment(2, False)])
+    agg.sync([_comment(2, False), _comment(3, False)])
+    assert sorted(agg.comment_ids) == ["2", "3"]
+    assert (agg.total, agg.harmful, agg.reason_sums) == (2, 0, [0.0, 0.0, 0.0])
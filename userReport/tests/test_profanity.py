@@ -0,0 +1,62 @@
+# test_profanity.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from analyzer import local_verdict
+from profanity import profanity_filter, normalize_word, _STANDALONE
+
+# 사전 표현과 자모/음절이 겹치지만 정상적인 문장 (공백을 넘거나 음절 중간에서 끝나는 매칭)
+BENIGN = [
+    "조정이 필요합니다",
+    "조직 문화",
+    "회의 조절",
+    "조작 아닌가요",
+    "다시 발생하면",
+    "다시 발표해주세요",
+    "병 신고했어",
+    "것바",
+    "시발점에서 출발",
+    "등신대 세웠어요",
+]
+
+ABUSIVE = ["시발", "ㅅㅂ 진짜", "시1발 뭐야", "십알", "시바알", "이 병신아", "개새끼야", "좆같네", "ㅈㄹ하네", "틀딱들"]
+
+
+@pytest.mark.parametrize("text", BENIGN)
+def test_benign_sentences_have_no_local_verdict(text):
+    assert profanity_filter.verdict(text) is None
+    assert profanity_filter.matches(text) == []
+
+
+@pytest.mark.parametrize("text", ABUSIVE)
+def test_abusive_words_get_local_verdict(text):
+    result = profanity_filter.verdict(text)
+    assert result is not None
+    assert result["toxicity"] >= 0.85
+
+
+@pytest.mark.parametrize("text", ["ㅅㅂ", "시발", "병신", "ㅈㄹ", "좆", " ㅅㅂ "])
+def test_short_profanity_is_not_passed_as_neutral(text):
+    # 2글자 이하라도 사전에 걸리면 짧은 중성 표현으로 통과시키지 않음
+    result = local_verdict(text)
+    assert result is not None
+    assert result["toxicity"] >= 0.85
+
+
+@pytest.mark.parametrize("text", ["ㅋㅋ", "네", "..", "ㅠㅠㅠ"])
+def test_short_neutral_text_is_clean(text):
+    assert local_verdict(text)["toxicity"] == 0.0
+
+
+def test_mid_word_match_is_left_to_next_tier():
+    # "다시발생"처럼 단어 중간에서 시작하는 매칭은 보고만 하고 판정하지 않음
+    assert profanity_filter.matches("다시발생하면")
+    assert profanity_filter.verdict("다시발생하면") is None
+
+
+def test_standalone_jamo_is_tagged_before_nfkc():
+    norm, _ = normalize_word("ㅅㅂ")
+    assert norm == _STANDALONE + "ㅅ" + _STANDALONE + "ㅂ"
+    # 음절에서 분해된 ㅅ, ㅂ("것바")은 단독 자모 표현에 걸리지 않음
+    assert _STANDALONE not in normalize_word("것바")[0]
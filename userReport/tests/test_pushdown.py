@@ -0,0 +1,53 @@
+# test_pushdown.py
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from data_processor import process_weekly_data
+from database import get_user_events
+from pushdown import daily_sums, daily_temp_hists, weekly_report
+
+# KST 1/1 23:00 ~ 1/4 01:00을 한 시간 간격으로 (SQLite에는 UTC ISO 문자열로 저장)
+START_UTC = datetime(2024, 1, 1, 14, tzinfo=timezone.utc)
+HOURS = 51
+
+
+@pytest.fixture
+def events_engine(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            """
+            INSERT INTO EVENTS (CREATED_AT, USER_ID, RAW_TEXT, SUGGESTION, AGGRESSION, HATE, TEMP_C, SENT_CHOICE)
+            VALUES (:t, 'u1', 'x', :suggestion, :aggression, 0.1, :temp_c, :choice)
+            """
+        ), [
+            {"t": (START_UTC + timedelta(hours=h)).isoformat(sep=" "), "suggestion": "y" if h % 2 else None,
+             "aggression": 0.9 if h % 3 == 0 else 0.2, "temp_c": 36.5 + h / 10, "choice": "순화" if h % 4 else "원문"}
+            for h in range(HOURS)
+        ])
+    return engine
+
+
+def test_daily_sums_use_kst_day_bounds(events_engine):
+    # 시간대 없는 경계 = KST: 1/2 00:00 ~ 1/3 23:59:59 → 이틀 × 24건 (UTC 날짜 중간에서 잘림)
+    start, end = datetime(2024, 1, 2), datetime(2024, 1, 3, 23, 59, 59)
+    rows = daily_sums(events_engine, "u1", start, end)
+    assert list(rows["date"]) == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert list(rows["n"]) == [24, 24]
+    hists = daily_temp_hists(events_engine, "u1", start, end)
+    assert {d: int(h.sum()) for d, h in hists.items()} == dict(zip(rows["date"], rows["n"]))
+
+
+def test_weekly_report_matches_process_weekly_data_at_day_boundaries(events_engine):
+    start, end = datetime(2024, 1, 2), datetime(2024, 1, 3, 23, 59, 59)
+    kpi, daily = process_weekly_data(get_user_events(events_engine, "u1", start, end))
+    push_kpi, push_daily = weekly_report(events_engine, "u1", start, end)
+    assert kpi["total"] == 48
+    assert kpi.keys() == push_kpi.keys() and all(np.isclose(kpi[k], push_kpi[k]) for k in kpi)
+    assert list(daily["date"]) == list(push_daily["date"])
+    assert np.allclose(daily.drop(columns="date").to_numpy(dtype=float),
+                       push_daily[daily.columns.drop("date")].to_numpy(dtype=float))
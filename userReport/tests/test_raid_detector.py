@@ -0,0 +1,46 @@
+# test_raid_detector.py
+# -*- coding: utf-8 -*-
+
+from raid_detector import RAID_STARTED, RaidDetector
+
+
+def _state(det):
+    s = det.state("p1")
+    return s.last_ts, round(s.arrivals, 9), round(s.cusum, 9), round(s.harm_ewma, 9), s.active
+
+
+def test_comments_tied_with_last_timestamp_count_in_later_calls():
+    # 초 단위 시각: 레이드 중에는 같은 시각에 여러 댓글이 달림
+    times = [100.0, 100.0, 101.0, 101.0, 101.0, 102.0]
+    harmful = [True] * len(times)
+    ids = [f"c{i}" for i in range(len(times))]
+
+    once = RaidDetector()
+    once.observe("p1", times, harmful, ids)
+
+    split = RaidDetector()
+    for n in (1, 3, 4, 6):  # 목록이 늘어날 때마다 다시 넣음 (같은 시각 101초가 두 호출에 걸침)
+        split.observe("p1", times[:n], harmful[:n], ids[:n])
+    assert _state(split) == _state(once)
+
+    # 같은 목록을 다시 넣어도 중복 반영되지 않음
+    split.observe("p1", times, harmful, ids)
+    assert _state(split) == _state(once)
+
+
+def test_without_ids_ties_at_last_timestamp_are_skipped():
+    det = RaidDetector()
+    det.observe("p1", [100.0], [True])
+    before = det.state("p1").arrivals
+    det.observe("p1", [100.0, 100.0], [True, True])
+    assert det.state("p1").arrivals == before
+
+
+def test_burst_of_tied_harmful_comments_starts_a_raid():
+    det = RaidDetector()
+    det.observe("p1", [float(t) for t in range(0, 3600, 60)], [False] * 60)
+    events = []
+    for k in range(10):
+        events += det.observe("p1", [3600.0] * (k + 1), [True] * (k + 1), [f"r{i}" for i in range(k + 1)])
+    assert [e["type"] for e in events] == [RAID_STARTED]
+    assert det.is_active("p1")
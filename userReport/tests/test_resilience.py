@@ -0,0 +1,131 @@
+# test_resilience.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded,
+    aguarded_call, guarded_call,
+)
+
+RESET = 0.05
+
+
+def _breaker(**kwargs):
+    return CircuitBreaker("test", **{"failure_threshold": 2, "slow_call_seconds": 1.0, "slow_call_rate": 0.5,
+                                     "window": 4, "reset_timeout": RESET, **kwargs})
+
+
+def _fail(timeout):
+    raise ConnectionError("upstream down")
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            guarded_call(_fail, breaker)
+    assert breaker.state == OPEN
+
+
+def test_consecutive_failures_open_and_reject_without_calling():
+    breaker = _breaker()
+    _open(breaker)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        guarded_call(lambda t: calls.append(t), breaker)
+    assert calls == []
+    assert breaker.stats["rejected"] == 1
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = _breaker()
+    _open(breaker)
+    time.sleep(RESET)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # 탐침 결과가 나오기 전의 두 번째 호출은 거절
+
+
+def test_probe_success_closes_and_probe_failure_reopens():
+    breaker = _breaker()
+    _open(breaker)
+    time.sleep(RESET)
+    with pytest.raises(ConnectionError):
+        guarded_call(_fail, breaker)
+    assert breaker.state == OPEN
+
+    time.sleep(RESET)
+    assert guarded_call(lambda t: "ok", breaker) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.transitions == {CLOSED: 1, OPEN: 2, HALF_OPEN: 2}
+
+
+def test_slow_call_rate_opens():
+    breaker = _breaker(failure_threshold=100)
+    for elapsed in (0.1, 2.0, 0.1):
+        breaker.record_success(elapsed)
+    assert breaker.state == CLOSED
+    breaker.record_success(2.0)  # 최근 4개 중 2개가 느림
+    assert breaker.state == OPEN
+
+
+def test_openai_timeout_counts_as_timeout_and_slow_call():
+    openai = pytest.importorskip("openai")
+    httpx = pytest.importorskip("httpx")
+
+    def timeout(t):
+        raise openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/moderations"))
+
+    breaker = _breaker(failure_threshold=100, window=2, slow_call_rate=1.0)
+    for _ in range(2):
+        with pytest.raises(openai.APITimeoutError):
+            guarded_call(timeout, breaker)
+    assert breaker.stats["timeouts"] == 2
+    assert breaker.state == OPEN  # 빠르게 실패했어도 타임아웃은 느린 호출로 셈
+
+
+def test_deadline_expiry_raises_and_counts_timeout():
+    breaker = _breaker()
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded):
+        guarded_call(lambda t: release.wait(1.0), breaker, Deadline(0.05))
+    release.set()
+    assert breaker.stats["timeouts"] == 1
+
+    with pytest.raises(DeadlineExceeded):
+        guarded_call(lambda t: "late", breaker, Deadline(0.0))
+
+
+def test_hedge_wins_when_primary_is_slow():
+    breaker = _breaker()
+    release = threading.Event()
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            release.wait(1.0)
+            return "primary"
+        return "hedge"
+
+    assert guarded_call(fn, breaker, Deadline(2.0), hedge_after=0.02) == "hedge"
+    release.set()
+    assert len(calls) == 2 and all(0 < t <= 2.0 for t in calls)
+    assert (breaker.stats["hedges"], breaker.stats["hedge_wins"]) == (1, 1)
+
+
+def test_async_hedge_wins_when_primary_is_slow():
+    breaker = _breaker()
+    calls = []
+
+    async def request(timeout):
+        calls.append(timeout)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0)
+        return len(calls)
+
+    assert asyncio.run(aguarded_call(request, breaker, Deadline(2.0), hedge_after=0.02)) == 2
+    assert (breaker.stats["hedges"], breaker.stats["hedge_wins"]) == (1, 1)
@@ -0,0 +1,78 @@
+# test_suggestion_memory.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from suggestion_memory import SuggestionMemory
+
+TEXTS = [f"{i}번째 댓글은 정말 이상한 주장 같아요 {chr(0xAC00 + i * 37)}" for i in range(40)]
+
+
+def _memory(**kwargs):
+    return SuggestionMemory(**{"capacity": 64, "dim": 1024, "threshold": 0.85, "ivf_lists": 0, **kwargs})
+
+
+def test_lookup_returns_suggestion_of_stored_comment():
+    mem = _memory()
+    mem.add("너 진짜 말하는 수준 하고는", "생각이 조금 다른 것 같아요")
+    assert mem.lookup("너 진짜 말하는 수준 하고는") == "생각이 조금 다른 것 같아요"
+    assert mem.lookup("오늘 날씨가 맑고 좋네요") is None
+    assert mem.snapshot_stats()["hit_rate"] == 0.5
+
+
+def test_threshold_decides_reuse():
+    stored, query = "너 진짜 말하는 수준 하고는 어휴", "너 진짜 말하는 수준 하고는"
+    sim = _memory()
+    sim.add(stored, "s")
+    score = sim.search(query)[0][0]
+    assert 0.0 < score < 1.0
+
+    below, above = _memory(threshold=score - 0.01), _memory(threshold=score + 0.01)
+    for mem in (below, above):
+        mem.add(stored, "s")
+    assert below.lookup(query) == "s"
+    assert above.lookup(query) is None
+
+
+def test_full_memory_evicts_least_recently_used():
+    mem = _memory(capacity=2)
+    mem.add(TEXTS[0], "a")
+    mem.add(TEXTS[1], "b")
+    assert mem.lookup(TEXTS[0]) == "a"  # a를 최근 사용으로
+
+    mem.add(TEXTS[2], "c")
+    assert len(mem) == 2
+    assert mem.stats["evictions"] == 1
+    assert mem.lookup(TEXTS[1]) is None
+    assert mem.lookup(TEXTS[0]) == "a"
+    assert mem.lookup(TEXTS[2]) == "c"
+
+
+@pytest.mark.parametrize("ivf_lists", [0, 4])
+def test_add_after_lookup_updates_index_without_full_rebuild(monkeypatch, ivf_lists):
+    mem = _memory(ivf_lists=ivf_lists, ivf_probes=1, ivf_min_size=8)
+    for i, t in enumerate(TEXTS[:20]):
+        mem.add(t, str(i))
+    assert mem.lookup(TEXTS[0]) == "0"
+
+    rebuilds = []
+    original = mem._rebuild
+    monkeypatch.setattr(mem, "_rebuild", lambda: (rebuilds.append(1), original())[1])
+    # 댓글마다 조회 후 추가하는 패턴: 새 항목은 추가할 때 바로 검색 가능해야 함
+    for i, t in enumerate(TEXTS[20:30], start=20):
+        assert mem.lookup(t) is None
+        mem.add(t, str(i))
+        assert mem.lookup(t) == str(i)
+    assert rebuilds == []
+
+
+def test_recalled_suggestion_is_not_cached_under_the_new_text(monkeypatch):
+    import analyzer
+    from cache import make_cache_key
+
+    mem = _memory(threshold=0.5)
+    mem.add("너 진짜 말하는 수준 하고는", "생각이 조금 다른 것 같아요")
+    monkeypatch.setattr(analyzer, "suggestion_memory", mem)
+    query = "너 진짜 말하는 수준 하고는!"
+    assert analyzer._recall_similar(query) == {"suggestion": "생각이 조금 다른 것 같아요"}
+    assert analyzer.analysis_cache.get(make_cache_key(query, analyzer.SUGGESTION_CACHE_VERSION)) is None
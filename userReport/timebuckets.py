@@ -0,0 +1,207 @@
+# timebuckets.py
+# -*- coding: utf-8 -*-
+"""
+일 → 주 → 월 계층 롤업으로 임의 기간(7/30/90/365일) 리포트를 만듭니다.
+
+기간을 가장 큰 버킷부터 채워(월 → 주 → 일) 몇 개의 굵은 버킷과 가장자리 일로 나누고,
+기간 양 끝의 하루 일부분(예: 30일 전 14시 이후)은 원시 이벤트로 보충합니다.
+
+    kpi, series = window_report(store, user_id, start, end,
+                                edge_events=lambda s, e: firebase_manager.iter_user_events(user_id, s, e))
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from data_processor import ROLLUP_COLUMNS, WeeklyAggregator, weekly_from_rollup
+from temp_histogram import N_BINS
+from config import KST
+
+LEVELS = ("day", "week", "month")
+
+Bucket = Tuple[str, date]  # (단위, 버킷 시작일)
+
+
+def bucket_start(day: date, level: str) -> date:
+    """day가 속한 버킷의 시작일 (주는 월요일, 월은 1일)."""
+    if level == "week":
+        return day - timedelta(days=day.weekday())
+    if level == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_end(start: date, level: str) -> date:
+    """버킷의 마지막 날 (포함)."""
+    if level == "week":
+        return start + timedelta(days=6)
+    if level == "month":
+        nxt = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return nxt - timedelta(days=1)
+    return start
+
+
+def plan_buckets(first_day: date, last_day: date, max_level: str = "month") -> List[Bucket]:
+    """
+    [first_day, last_day]를 겹치지 않는 버킷으로 나눕니다.
+    각 날짜에서 기간 안에 완전히 들어가는 가장 큰 버킷(max_level 이하)을 고르므로
+    1년도 월 버킷 십여 개 + 가장자리 주/일 버킷 몇 개로 표현됩니다.
+    """
+    levels = LEVELS[:LEVELS.index(max_level) + 1]
+    plan: List[Bucket] = []
+    day = first_day
+    while day <= last_day:
+        for level in reversed(levels):
+            end = bucket_end(day, level)
+            if bucket_start(day, level) == day and end <= last_day:
+                plan.append((level, day))
+                day = end + timedelta(days=1)
+                break
+    return plan
+
+
+def to_level(rows: pd.DataFrame, level: str, user_col: str = "user_id") -> pd.DataFrame:
+    """일별 롤업 행을 주/월 버킷 행으로 합칩니다 (date는 버킷 시작일)."""
+    if rows.empty or level == "day":
+        return rows
+    keys = [user_col, "date"] if user_col in rows.columns else ["date"]
+    out = rows.copy()
+    out["date"] = [bucket_start(d, level) for d in out["date"]]
+    return out.groupby(keys, sort=True)[list(ROLLUP_COLUMNS)].sum().reset_index()
+
+
+def hist_to_level(rows: pd.DataFrame, level: str, user_col: str = "user_id") -> pd.DataFrame:
+    """일별 온도 히스토그램 행 [user_col, date, bin, count]을 주/월 버킷 행으로 합칩니다."""
+    if rows.empty or level == "day":
+        return rows
+    keys = [user_col, "date", "bin"] if user_col in rows.columns else ["date", "bin"]
+    out = rows.copy()
+    out["date"] = [bucket_start(d, level) for d in out["date"]]
+    return out.groupby(keys, sort=True)["count"].sum().reset_index()
+
+
+def chart_granularity(days: int) -> str:
+    """기간 길이에 맞는 차트 단위: ~31일은 일, ~120일은 주, 그 이상은 월."""
+    if days <= 31:
+        return "day"
+    if days <= 120:
+        return "week"
+    return "month"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time(0), tzinfo=KST)
+
+
+def _runs(buckets: Iterable[Bucket]) -> List[Tuple[str, date, date]]:
+    """같은 단위로 이어지는 버킷들을 (단위, 첫 버킷 시작, 마지막 버킷 시작) 범위로 묶습니다."""
+    runs: List[Tuple[str, date, date]] = []
+    for level, start in sorted(set(buckets), key=lambda b: (LEVELS.index(b[0]), b[1])):
+        if runs and runs[-1][0] == level and bucket_end(runs[-1][2], level) + timedelta(days=1) == start:
+            runs[-1] = (level, runs[-1][1], start)
+        else:
+            runs.append((level, start, start))
+    return runs
+
+
+def _add_hist(hists: Dict[date, np.ndarray], point: date, counts: np.ndarray):
+    if point not in hists:
+        hists[point] = np.zeros(N_BINS, dtype=np.int64)
+    hists[point] += counts
+
+
+def window_report(store, user_id: str, start: datetime, end: datetime,
+                  edge_events: Optional[Callable[[datetime, datetime], Iterable[pd.DataFrame]]] = None,
+                  granularity: Optional[str] = None) -> Tuple[Dict, pd.DataFrame]:
+    """
+    롤업 저장소(read/read_histograms(user_id, first, last, level) 제공)에서 [start, end] 기간 리포트를 만듭니다.
+
+    Args:
+        edge_events: (시작, 끝) 시각의 원시 이벤트 청크를 돌려주는 함수. 주어지면 기간 양 끝의
+            하루 일부분은 원시 이벤트로 계산하고, 없으면 그 날의 일별 롤업 전체를 사용합니다.
+        granularity: 차트 단위 (None이면 기간 길이로 결정)
+
+    Returns:
+        tuple: (KPI_딕셔너리, [date, 혐오율, 조롱율, temp_avg, temp_p50/p90/p99] 구간별 집계)
+            — 형식은 process_weekly_data와 같고
+            date는 각 구간(일/주/월)의 시작일이며 series.attrs["granularity"]에 단위가 들어갑니다.
+    """
+    start, end = start.astimezone(KST), end.astimezone(KST)
+    first_day, last_day = start.date(), end.date()
+    granularity = granularity or chart_granularity((last_day - first_day).days + 1)
+
+    # 하루 전체가 기간 안에 있는 날만 롤업에서 읽고, 양 끝의 부분 일은 원시 이벤트로 보충
+    partial: List[date] = []
+    if edge_events is not None:
+        if start != _day_start(first_day):
+            partial.append(first_day)
+        if end < _day_start(last_day + timedelta(days=1)) - timedelta(microseconds=1):
+            partial.append(last_day)
+    full_first = first_day + timedelta(days=1) if first_day in partial else first_day
+    full_last = last_day - timedelta(days=1) if last_day in partial else last_day
+
+    # 차트 점(구간)마다 완전히 들어가는 버킷 계획
+    plans: Dict[date, List[Bucket]] = {}
+    point = bucket_start(first_day, granularity)
+    while point <= last_day:
+        lo = max(point, full_first)
+        hi = min(bucket_end(point, granularity), full_last)
+        plans[point] = plan_buckets(lo, hi, granularity) if lo <= hi else []
+        point = bucket_end(point, granularity) + timedelta(days=1)
+
+    cells: Dict[Bucket, pd.Series] = {}
+    hist_cells: Dict[Bucket, np.ndarray] = {}
+    for level, lo, hi in _runs(b for plan in plans.values() for b in plan):
+        rows = store.read(user_id, lo, hi, level)
+        for r in rows.to_dict("records"):
+            cells[(level, r["date"])] = pd.Series({k: r[k] for k in ROLLUP_COLUMNS})
+        for day, counts in store.read_histograms(user_id, lo, hi, level).items():
+            hist_cells[(level, day)] = counts
+
+    # 차트 점마다 버킷 히스토그램을 더해 둠 (분위수는 합칠 수 없으므로 구간 건수로 병합)
+    records = []
+    hists: Dict[date, np.ndarray] = {}
+    for point, plan in plans.items():
+        for b in plan:
+            if b in cells:
+                records.append({"date": point, **cells[b].to_dict()})
+            if b in hist_cells:
+                _add_hist(hists, point, hist_cells[b])
+
+    for day in sorted(set(partial)):
+        lo = max(start, _day_start(day))
+        hi = min(end, _day_start(day + timedelta(days=1)) - timedelta(microseconds=1))
+        agg = WeeklyAggregator()
+        for chunk in edge_events(lo, hi):
+            agg.update(chunk)
+        for r in agg.daily_sums().to_dict("records"):
+            records.append({**r, "date": bucket_start(r["date"], granularity)})
+        for d, counts in agg.daily_hists().items():
+            _add_hist(hists, bucket_start(d, granularity), counts)
+
+    if not records:
+        return {}, pd.DataFrame()
+    kpi, series = weekly_from_rollup(pd.DataFrame(records), hists)
+    series.attrs["granularity"] = granularity
+    return kpi, series
+
+
+def report_from_events(chunks: Iterable[pd.DataFrame], granularity: str = "day") -> Tuple[Dict, pd.DataFrame]:
+    """
+    원시 이벤트 청크로 리포트를 만들되 차트 구간을 granularity 단위로 묶습니다
+    (롤업이 없을 때의 대체 경로, KPI는 process_weekly_data와 같음).
+    """
+    agg = WeeklyAggregator()
+    for chunk in chunks:
+        agg.update(chunk)
+    kpi, series = agg.result()
+    if kpi and granularity != "day":
+        hists: Dict[date, np.ndarray] = {}
+        for d, counts in agg.daily_hists().items():
+            _add_hist(hists, bucket_start(d, granularity), counts)
+        _, series = weekly_from_rollup(to_level(agg.daily_sums(), granularity), hists)
+    if kpi:
+        series.attrs["granularity"] = granularity
+    return kpi, series
@@ -1,6 +1,9 @@
 # utils.py
 # -*- coding: utf-8 -*-
 
+import re
+import numpy as np
+import pandas as pd
 import streamlit as st
 from typing import Optional
 from config import (
@@ -30,6 +33,19 @@ def map_temp(tox_score: float) -> float:
     return round(MIN_TEMP + tox * TEMP_RANGE, 2)
 
 
+def map_temps(tox_scores) -> np.ndarray:
+    """map_temp의 배열 버전입니다. 결과는 map_temp와 비트 단위까지 같습니다."""
+    tox = np.clip(np.asarray(tox_scores, dtype=np.float64), 0.0, 1.0)
+    temps = MIN_TEMP + tox * TEMP_RANGE
+    out = np.round(temps, 2)
+    # np.round(x*100)은 .5 경계에서 round()와 다를 수 있으므로 경계값만 파이썬 round로 다시 계산
+    scaled = temps * 100.0
+    edge = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in edge.tolist():
+        out[i] = round(float(temps[i]), 2)
+    return out
+
+
 def post_temp_from_rate(rate: float) -> float:
     """
     게시글 단위 유해발언 비율(0-1)을 온도(36.5-40.0°C)로 매핑합니다.
@@ -51,14 +67,37 @@ def severity_from_temp(temp: float) -> str:
     return "정상"
 
 
+def severities_from_temps(temps, caution: float, warn: float) -> np.ndarray:
+    """온도 배열을 심각도('정상'/'주의'/'경고') 배열로 변환합니다 (임계값 명시)."""
+    temps = np.asarray(temps, dtype=np.float64)
+    return np.where(temps >= warn, "경고", np.where(temps >= caution, "주의", "정상")).astype(object)
+
+
+def looks_short_neutral(text: str) -> bool:
+    """텍스트가 짧거나 중성 문자(".", "ㅋㅋ", "ㅠㅠ" 등)로만 이루어졌는지 확인합니다."""
+    t = (text or "").strip()
+    return len(t) <= 2 or all(ch in NEUTRAL_SHORT_CHARS for ch in t)
+
+
 def looks_positive_or_short(text: str) -> bool:
     """텍스트가 긍정적이거나 짧은 중성 표현인지 확인합니다."""
-    t = (text or "").strip()
-    if len(t) <= 2 or all(ch in NEUTRAL_SHORT_CHARS for ch in t):
+    if looks_short_neutral(text):
         return True
+    t = (text or "").strip()
     return any(w in t for w in POSITIVE_HINTS)
 
 
+def looks_positive_or_short_many(texts) -> np.ndarray:
+    """looks_positive_or_short의 배열 버전입니다 (pandas 문자열 연산)."""
+    t = pd.Series(list(texts), dtype=object).fillna("").str.strip()
+    if t.empty:
+        return np.zeros(0, dtype=bool)
+    neutral = "[" + "".join(re.escape(ch) for ch in sorted(NEUTRAL_SHORT_CHARS)) + "]*"
+    positive = "|".join(re.escape(w) for w in POSITIVE_HINTS)
+    mask = (t.str.len() <= 2) | t.str.fullmatch(neutral) | t.str.contains(positive, regex=True)
+    return mask.to_numpy(dtype=bool)
+
+
 def badge_from_comment(text: str, res: dict, temp_c: float) -> Optional[str]:
     """
     댓글에 대한 표시용 배지를 결정합니다.